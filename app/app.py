@@ -20,7 +20,11 @@ from backend import (
     gerar_relatorio_pdf,
     prever_gastos,
     chatbot_financeiro,
-    assistente_pagamento
+    assistente_pagamento,
+    iniciar_monitor_pastas,
+    versao_dados_consolidados,
+    obter_dados_consolidados,
+    cache_metrics
 )
 # Assumindo que existe um arquivo layout.py
 from layout import (
@@ -48,23 +52,30 @@ def main():
 
     # O processamento de faturas pode ser pesado, então o ideal é usar o cache do Streamlit
     # para não reprocessar a cada interação na UI.
-    @st.cache_data
-    def carregar_dados():
-        df = processar_faturas()
-        return df
+    # Com MONITOR_PASTAS ativo, extratos novos são ingeridos em segundo plano
+    iniciar_monitor_pastas()
 
-    @st.cache_data
-    def carregar_graficos(df):
+    # A versão do consolidado entra na chave do cache: uma nova publicação
+    # (pelo monitor ou pelo assistente) invalida os dados em cache. O frame em si
+    # não fica no st.cache_data (uma cópia por processo): vem do provedor do
+    # backend, que mapeia o instantâneo Arrow compartilhado entre as réplicas.
+    # Acertos e falhas dos dois caches aparecem em Configurações > Estatísticas.
+    @cache_metrics.wrap_cache('streamlit.carregar_dados', st.cache_data)
+    def carregar_dados(versao):
+        processar_faturas()
+        return True
+
+    @cache_metrics.wrap_cache('streamlit.carregar_graficos', st.cache_data)
+    def carregar_graficos(versao):
+        df = obter_dados_consolidados()
+        # Só cria os gráficos se o dataframe não estiver vazio
+        if df.empty:
+            return None, None
         fig_col, fig_lin = criar_graficos(df)
         return fig_col, fig_lin
 
-    df_consolidado = carregar_dados()
-    
-    # Só cria os gráficos se o dataframe não estiver vazio
-    if df_consolidado is not None and not df_consolidado.empty:
-        fig_coluna, fig_linha = carregar_graficos(df_consolidado)
-    else:
-        fig_coluna, fig_linha = None, None
+    carregar_dados(versao_dados_consolidados())
+    fig_coluna, fig_linha = carregar_graficos(versao_dados_consolidados())
 
     pagina_selecionada = exibir_sidebar()
 
@@ -5,6 +5,7 @@ import pandas as pd
 import glob
 import os
 import json
+import csv
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
 import plotly.express as px
@@ -19,15 +20,38 @@ from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.linear_model import HuberRegressor
 from sklearn.preprocessing import RobustScaler
 import time
-from typing import Optional, Dict, Any, Tuple, List, Union
+from typing import Optional, Dict, Any, Tuple, List, Union, Iterator
 import logging
 import functools
 import pickle
+import shutil
+import sqlite3
+import threading
 import hashlib
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
+from contextlib import contextmanager
 from difflib import SequenceMatcher
 import warnings
+import copy
+from collections import OrderedDict
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.dataset as pa_ds
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow é opcional: sem ele toda leitura de CSV usa o motor C do pandas
+    pa = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos, só entre threads
+    fcntl = None
 
 
 # Import configuration
@@ -84,144 +108,2116 @@ class RateLimiter:
         # Remove old calls
         self.calls = [call_time for call_time in self.calls if now - call_time < self.time_window]
 
-        if len(self.calls) < self.max_calls:
-            self.calls.append(now)
-            return True
-        return False
+        if len(self.calls) < self.max_calls:
+            self.calls.append(now)
+            return True
+        return False
+
+# Global rate limiter
+rate_limiter = RateLimiter()
+
+# --- Performance Optimizations ---
+class CacheMetrics:
+    """
+    Process-wide registry of cache counters, grouped by namespace.
+
+    Caches record hits, misses and evictions, publish their current size
+    ('bytes', 'entries') and time how long serving a hit ('load') or rebuilding
+    a value on a miss ('compute') takes. `report()` puts everything in one
+    table for the Configurações page.
+    """
+
+    EVENTS = ('hits', 'misses', 'evictions')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._gauges: Dict[str, Dict[str, int]] = {}
+        self._latencies: Dict[str, Dict[str, List[float]]] = {}  # namespace -> kind -> [count, total, max]
+
+    def record(self, namespace: str, event: str, count: int = 1):
+        with self._lock:
+            counters = self._counters.setdefault(namespace, dict.fromkeys(self.EVENTS, 0))
+            counters[event] = counters.get(event, 0) + count
+
+    def set_gauge(self, namespace: str, name: str, value: int):
+        with self._lock:
+            self._gauges.setdefault(namespace, {})[name] = value
+
+    def observe(self, namespace: str, kind: str, seconds: float):
+        with self._lock:
+            sample = self._latencies.setdefault(namespace, {}).setdefault(kind, [0, 0.0, 0.0])
+            sample[0] += 1
+            sample[1] += seconds
+            sample[2] = max(sample[2], seconds)
+
+    @contextmanager
+    def timer(self, namespace: str, kind: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(namespace, kind, time.perf_counter() - start)
+
+    def wrap_cache(self, namespace: str, cache_decorator):
+        """
+        Apply a memoizing decorator (e.g. st.cache_data) and count its hits and misses.
+        The decorated body only runs on a miss, which is how the two are told apart.
+        """
+        state = threading.local()
+
+        def decorator(func):
+            @functools.wraps(func)
+            def compute(*args, **kwargs):
+                state.miss = True
+                self.record(namespace, 'misses')
+                with self.timer(namespace, 'compute'):
+                    return func(*args, **kwargs)
+
+            cached = cache_decorator(compute)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                state.miss = False
+                start = time.perf_counter()
+                result = cached(*args, **kwargs)
+                if not state.miss:
+                    self.record(namespace, 'hits')
+                    self.observe(namespace, 'load', time.perf_counter() - start)
+                return result
+
+            wrapper.clear = getattr(cached, 'clear', None)
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            namespaces = set(self._counters) | set(self._gauges) | set(self._latencies)
+            return {
+                namespace: {
+                    **dict.fromkeys(self.EVENTS, 0), **self._counters.get(namespace, {}),
+                    **self._gauges.get(namespace, {}),
+                    'latencies': {kind: list(sample) for kind, sample in self._latencies.get(namespace, {}).items()}
+                }
+                for namespace in namespaces
+            }
+
+    def report(self) -> pd.DataFrame:
+        """One row per namespace: counters, hit rate, size and mean/max latencies in ms."""
+        rows = []
+        for namespace, metrics in sorted(self.snapshot().items()):
+            lookups = metrics['hits'] + metrics['misses']
+            row = {
+                'namespace': namespace, 'hits': metrics['hits'], 'misses': metrics['misses'],
+                'hit_rate': metrics['hits'] / lookups if lookups else np.nan,
+                'evictions': metrics['evictions'],
+                'bytes': metrics.get('bytes', np.nan), 'entries': metrics.get('entries', np.nan),
+            }
+            for kind in ('load', 'compute'):
+                count, total, maximum = metrics['latencies'].get(kind, (0, 0.0, 0.0))
+                row[f'{kind}_ms'] = total / count * 1000 if count else np.nan
+                row[f'{kind}_max_ms'] = maximum * 1000 if count else np.nan
+            rows.append(row)
+        columns = ['namespace', 'hits', 'misses', 'hit_rate', 'evictions', 'bytes', 'entries',
+                   'load_ms', 'load_max_ms', 'compute_ms', 'compute_max_ms']
+        return pd.DataFrame(rows, columns=columns).set_index('namespace')
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._latencies.clear()
+
+# Global metrics registry
+cache_metrics = CacheMetrics()
+
+class DataCache:
+    """
+    Two-tier cache: an in-process LRU (L1) in front of files on disk (L2),
+    stored as Arrow IPC (or Parquet) and JSON, with pickle only as a fallback
+    behind CACHE_PICKLE_FALLBACK.
+
+    Sizes and creation/access times live in a small index (`indice.json`,
+    journaled through ArquivoRegras), so expiring entries and evicting the
+    least recently used ones never needs to walk and stat the cache folder.
+
+    Every set writes through to disk and keeps the object in memory; disk
+    hits are promoted to L1 and L1 overflow is demoted (dropped from memory,
+    still on disk). An L1 hit returns the cached object itself, not a copy.
+    Both tiers are bounded in bytes (the size on disk) and count hits and
+    misses in `stats`; with a `namespace` they also report hits, misses,
+    evictions, sizes and disk load latency to cache_metrics as
+    `<namespace>.memory` and `<namespace>.disk`.
+
+    Files are written to a temporary name and renamed into place, so readers
+    in other processes never see a partial entry. `lock(key)` is an advisory
+    per-key lock, striped over LOCK_STRIPES locks (flock on `.locks/<n>.lock`)
+    so neither lock files nor in-memory locks grow with the number of keys;
+    `get_or_compute` uses it so that when several threads or processes miss on
+    one key, only one computes the value and the others wait and read it.
+
+    Values are written with the first format in `formats` that can hold them:
+    DataFrames and Series as Arrow IPC (memory-mapped on read) or Parquet,
+    plain dicts as JSON. Pickle is only used when listed, which by default
+    depends on CACHE_PICKLE_FALLBACK; without it, pickle files are never loaded.
+    """
+
+    INDEX_FILE = 'indice.json'
+    LOCK_DIR = '.locks'
+    LOCK_STRIPES = 64  # Keys sharing a stripe also share its lock
+    ACCESS_RESOLUTION = 60  # Seconds; finer access updates are not recorded
+    EXTENSIONS = {'arrow': '.arrow', 'parquet': '.parquet', 'json': '.json', 'pickle': '.pkl'}
+    SERIES_METADATA = b'finbot_serie'  # Schema metadata marking a stored Series (value: its name as JSON)
+
+    def __init__(self, cache_dir: Union[str, Path] = None, ttl: Optional[int] = None, max_bytes: Optional[int] = None,
+                 memory_max_bytes: Optional[int] = None, formats: Optional[Tuple[str, ...]] = None,
+                 namespace: Optional[str] = None):
+        self.cache_dir = Path(cache_dir or config.PASTA_CACHE)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = config.CACHE_TTL if ttl is None else ttl
+        self.max_bytes = config.CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.memory_max_bytes = config.CACHE_MEMORIA_MAX_BYTES if memory_max_bytes is None else memory_max_bytes
+        if formats is None:
+            formats = ('arrow', 'json', 'pickle') if config.CACHE_PICKLE_FALLBACK else ('arrow', 'json')
+        unknown = set(formats) - set(self.EXTENSIONS)
+        if unknown:
+            raise ValueError(f"Unknown cache formats: {sorted(unknown)}")
+        self.formats = tuple(formats)
+        self.namespace = namespace
+        self._index: Optional['ArquivoRegras'] = None
+        self._memory: 'OrderedDict[str, Tuple[Any, int, float]]' = OrderedDict()  # key -> (value, bytes, created)
+        self._memory_bytes = 0
+        self._memory_lock = threading.Lock()
+        self._stripe_locks = [threading.RLock() for _ in range(self.LOCK_STRIPES)]
+        self._stripe_depth = [0] * self.LOCK_STRIPES
+        self.stats = {tier: {'hits': 0, 'misses': 0} for tier in ('memory', 'disk')}
+
+    @property
+    def index(self) -> 'ArquivoRegras':
+        if self._index is None:
+            index_path = self.cache_dir / self.INDEX_FILE
+            adopt = not index_path.exists()
+            self._index = ArquivoRegras(index_path)
+            if adopt:
+                self._adopt_existing_files()
+        return self._index
+
+    def _get_cache_key(self, data: Any) -> str:
+        """Generate cache key from data."""
+        if isinstance(data, str):
+            return hashlib.md5(data.encode()).hexdigest()
+        return hashlib.md5(str(data).encode()).hexdigest()
+
+    def _path(self, key: str, fmt: str = 'pickle') -> Path:
+        return self.cache_dir / f"{key}{self.EXTENSIONS[fmt]}"
+
+    def _format_for(self, data: Any) -> Optional[str]:
+        """First configured format that round-trips `data` (None if there is none)."""
+        for fmt in self.formats:
+            if fmt in ('arrow', 'parquet'):
+                if pa is not None and self._columnar(data):
+                    return fmt
+            elif fmt == 'json':
+                if isinstance(data, dict) and self._plain_json(data):
+                    return fmt
+            else:
+                return fmt
+        return None
+
+    @staticmethod
+    def _columnar(data: Any) -> bool:
+        if isinstance(data, pd.Series):
+            return data.name is None or isinstance(data.name, str)
+        if isinstance(data, pd.DataFrame):
+            # Arrow turns column names into strings; anything else would not come back as written
+            return data.columns.is_unique and all(isinstance(column, str) for column in data.columns)
+        return False
+
+    @classmethod
+    def _plain_json(cls, value: Any) -> bool:
+        """True if json.loads(json.dumps(value)) == value, type for type."""
+        if isinstance(value, dict):
+            return all(type(k) is str and cls._plain_json(v) for k, v in value.items())
+        if type(value) is list:
+            return all(cls._plain_json(item) for item in value)
+        return type(value) in (str, int, float, bool, type(None))
+
+    def _to_table(self, data: Union[pd.DataFrame, pd.Series]) -> 'pa.Table':
+        if isinstance(data, pd.Series):
+            table = pa.Table.from_pandas(data.to_frame(name='valor'), preserve_index=True)
+            metadata = {**(table.schema.metadata or {}), self.SERIES_METADATA: json.dumps(data.name).encode()}
+            return table.replace_schema_metadata(metadata)
+        return pa.Table.from_pandas(data, preserve_index=True)
+
+    def _from_table(self, table: 'pa.Table') -> Union[pd.DataFrame, pd.Series]:
+        df = table.to_pandas()
+        metadata = table.schema.metadata or {}
+        if self.SERIES_METADATA in metadata:
+            return df['valor'].rename(json.loads(metadata[self.SERIES_METADATA]))
+        return df
+
+    def _write(self, path: Path, data: Any, fmt: str):
+        if fmt == 'arrow':
+            table = self._to_table(data)
+            with pa.OSFile(str(path), 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        elif fmt == 'parquet':
+            pq.write_table(self._to_table(data), str(path))
+        elif fmt == 'json':
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+        else:
+            with open(path, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _read(self, path: Path, fmt: str) -> Any:
+        if fmt == 'arrow':
+            with pa.memory_map(str(path), 'r') as source:
+                return self._from_table(pa.ipc.open_file(source).read_all())
+        if fmt == 'parquet':
+            return self._from_table(pq.read_table(str(path), memory_map=True))
+        if fmt == 'json':
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def _expired(self, entry: dict, now: float) -> bool:
+        return self.ttl > 0 and now - entry['created'] > self.ttl
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get cached data (None if missing or expired)."""
+        if not config.CACHE_ENABLED:
+            return None
+
+        entry = self.index.obter(key)
+        if entry is None:
+            self._forget(key)
+            self._count('memory', 'misses')
+            self._count('disk', 'misses')
+            return None
+        now = time.time()
+        if self._expired(entry, now):
+            self.remove(key)
+            self._count('memory', 'misses')
+            self._count('disk', 'misses')
+            return None
+        if now - entry['accessed'] > self.ACCESS_RESOLUTION:
+            self.index.definir(key, {**entry, 'accessed': now})
+
+        with self._memory_lock:
+            cached = self._memory.get(key)
+            # The index says which write is current (another process may have replaced it)
+            if cached is not None and cached[2] == entry['created']:
+                self._memory.move_to_end(key)
+            else:
+                cached = None
+        if cached is not None:
+            self._count('memory', 'hits')
+            return cached[0]
+        self._count('memory', 'misses')
+
+        fmt = entry.get('format', 'pickle')
+        if fmt not in self.formats:
+            logger.warning(f"Cache entry {key} is stored as {fmt}, which this cache does not load")
+            self._count('disk', 'misses')
+            return None
+        start = time.perf_counter()
+        try:
+            data = self._read(self._path(key, fmt), fmt)
+        except FileNotFoundError:
+            # Only forget the entry we looked up; a writer may have just replaced it
+            if self.index.obter(key) == entry:
+                self.index.remover(key)
+            self._count('disk', 'misses')
+            return None
+        except Exception as e:
+            logger.warning(f"Failed to load cache {key}: {e}")
+            self._count('disk', 'misses')
+            return None
+
+        self._count('disk', 'hits')
+        if self.namespace:
+            cache_metrics.observe(f"{self.namespace}.disk", 'load', time.perf_counter() - start)
+        self._remember(key, data, entry['bytes'], entry['created'])
+        return data
+
+    def set(self, key: str, data: Any):
+        """Set cached data, then expire and evict entries beyond the budget."""
+        if not config.CACHE_ENABLED:
+            return
+
+        fmt = self._format_for(data)
+        if fmt is None:
+            logger.info(f"No cache format for {key} ({type(data).__name__}); not cached")
+            return
+
+        cache_file = self._path(key, fmt)
+        temporary = cache_file.with_name(f".{cache_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self._write(temporary, data, fmt)
+            size = temporary.stat().st_size
+            if self.max_bytes > 0 and size > self.max_bytes:
+                temporary.unlink()
+                logger.info(f"Cache entry {key} ({size} bytes) exceeds the cache budget; not cached")
+                return
+            os.replace(temporary, cache_file)
+        except Exception as e:
+            temporary.unlink(missing_ok=True)
+            logger.warning(f"Failed to save cache {key}: {e}")
+            return
+
+        previous = self.index.obter(key)
+        if previous is not None and previous.get('format', 'pickle') != fmt:
+            self._path(key, previous.get('format', 'pickle')).unlink(missing_ok=True)
+        now = time.time()
+        self.index.definir(key, {'bytes': size, 'created': now, 'accessed': now, 'format': fmt})
+        self._remember(key, data, size, now)
+        self._enforce_limits()
+        self._publish_sizes()
+
+    @contextmanager
+    def lock(self, key: str):
+        """
+        Exclusive lock on one key, between threads and (with fcntl) between processes.
+        Reentrant within a thread, so nested keys landing on the same stripe don't deadlock.
+        """
+        # A stable hash: every process has to pick the same stripe for a key
+        stripe = int(hashlib.sha256(key.encode()).hexdigest(), 16) % self.LOCK_STRIPES
+        with self._stripe_locks[stripe]:
+            if self._stripe_depth[stripe]:
+                self._stripe_depth[stripe] += 1
+                try:
+                    yield
+                finally:
+                    self._stripe_depth[stripe] -= 1
+                return
+            lock_file = self.cache_dir / self.LOCK_DIR / f"{stripe}.lock"
+            lock_file.parent.mkdir(exist_ok=True)
+            with open(lock_file, 'a') as handle:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_EX)
+                self._stripe_depth[stripe] = 1
+                try:
+                    yield
+                finally:
+                    self._stripe_depth[stripe] = 0
+                    if fcntl is not None:
+                        fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def get_or_compute(self, key: str, compute) -> Any:
+        """Cached value of `key`, or compute() stored under it; concurrent misses compute it once."""
+        if not config.CACHE_ENABLED:
+            return compute()
+        data = self.get(key)
+        if data is not None:
+            return data
+        with self.lock(key):
+            data = self.get(key)  # Filled by whoever held the lock before us
+            if data is not None:
+                return data
+            data = compute()
+            self.set(key, data)
+            return data
+
+    def remove(self, key: str):
+        """Drop one entry."""
+        self._forget(key)
+        entry = self.index.obter(key) or {}
+        self._path(key, entry.get('format', 'pickle')).unlink(missing_ok=True)
+        self.index.remover(key)
+
+    def _publish_sizes(self):
+        if not self.namespace:
+            return
+        entries = self.index.dados()
+        cache_metrics.set_gauge(f"{self.namespace}.disk", 'bytes', sum(e['bytes'] for e in entries.values()))
+        cache_metrics.set_gauge(f"{self.namespace}.disk", 'entries', len(entries))
+        with self._memory_lock:
+            memory_bytes, memory_entries = self._memory_bytes, len(self._memory)
+        cache_metrics.set_gauge(f"{self.namespace}.memory", 'bytes', memory_bytes)
+        cache_metrics.set_gauge(f"{self.namespace}.memory", 'entries', memory_entries)
+
+    def __getstate__(self):
+        # The memory tier belongs to this process; pickled copies (process pool workers) start empty
+        state = self.__dict__.copy()
+        for attribute in ('_memory', '_memory_bytes', '_memory_lock', '_stripe_locks', '_stripe_depth', '_index'):
+            state.pop(attribute, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._index = None
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._memory_lock = threading.Lock()
+        self._stripe_locks = [threading.RLock() for _ in range(self.LOCK_STRIPES)]
+        self._stripe_depth = [0] * self.LOCK_STRIPES
+
+    def _count(self, tier: str, outcome: str, count: int = 1):
+        with self._memory_lock:
+            self.stats[tier][outcome] = self.stats[tier].get(outcome, 0) + count
+        if self.namespace:
+            cache_metrics.record(f"{self.namespace}.{tier}", outcome, count)
+
+    def _remember(self, key: str, data: Any, size: int, created: float):
+        """Promote to L1, demoting least recently used entries past memory_max_bytes."""
+        with self._memory_lock:
+            if key in self._memory:
+                self._memory_bytes -= self._memory.pop(key)[1]
+            if size > self.memory_max_bytes:
+                return
+            self._memory[key] = (data, size, created)
+            self._memory_bytes += size
+            demoted = 0
+            while self._memory_bytes > self.memory_max_bytes:
+                _, (_, demoted_size, _) = self._memory.popitem(last=False)
+                self._memory_bytes -= demoted_size
+                demoted += 1
+        if demoted and self.namespace:
+            cache_metrics.record(f"{self.namespace}.memory", 'evictions', demoted)
+
+    def _forget(self, key: str):
+        with self._memory_lock:
+            if key in self._memory:
+                self._memory_bytes -= self._memory.pop(key)[1]
+
+    def clear(self):
+        """Drop every entry."""
+        for key in list(self.index.dados()):
+            self.remove(key)
+        self._publish_sizes()
+
+    def total_bytes(self) -> int:
+        return sum(entry['bytes'] for entry in self.index.dados().values())
+
+    def _enforce_limits(self):
+        """Remove expired entries, then the least recently used ones until within max_bytes."""
+        entries = self.index.dados()
+        now = time.time()
+        for key in [key for key, entry in entries.items() if self._expired(entry, now)]:
+            self.remove(key)
+            del entries[key]
+            self._count('disk', 'evictions')
+
+        total = sum(entry['bytes'] for entry in entries.values())
+        if self.max_bytes <= 0 or total <= self.max_bytes:
+            return
+        for key, entry in sorted(entries.items(), key=lambda item: item[1]['accessed']):
+            self.remove(key)
+            total -= entry['bytes']
+            self._count('disk', 'evictions')
+            logger.debug(f"Evicted cache entry {key}")
+            if total <= self.max_bytes:
+                break
+
+    def _adopt_existing_files(self):
+        """Register .pkl files written before the index existed (one-time scan; always pickle)."""
+        for cache_file in self.cache_dir.glob('*.pkl'):
+            info = cache_file.stat()
+            self._index.definir(cache_file.stem, {'bytes': info.st_size, 'created': info.st_mtime,
+                                                  'accessed': info.st_mtime})
+
+# Global cache instance
+data_cache = DataCache(namespace='data_cache')
+
+def _hash_argumento(digest, valor):
+    """Alimenta `digest` com o conteúdo de `valor`, estável entre processos (sem hash() salgado)."""
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        digest.update(type(valor).__name__.encode())
+        digest.update(pd.util.hash_pandas_object(valor).to_numpy().tobytes())
+        if isinstance(valor, pd.DataFrame):
+            digest.update(repr(list(valor.columns)).encode())
+    elif isinstance(valor, np.ndarray):
+        digest.update(f"{valor.dtype}{valor.shape}".encode())
+        digest.update(np.ascontiguousarray(valor).tobytes())
+    elif isinstance(valor, dict):
+        digest.update(b'{')
+        for chave in sorted(valor, key=repr):
+            _hash_argumento(digest, chave)
+            _hash_argumento(digest, valor[chave])
+        digest.update(b'}')
+    elif isinstance(valor, (list, tuple, set, frozenset)):
+        itens = sorted(valor, key=repr) if isinstance(valor, (set, frozenset)) else valor
+        digest.update(f"{type(valor).__name__}[".encode())
+        for item in itens:
+            _hash_argumento(digest, item)
+        digest.update(b']')
+    else:
+        digest.update(f"{type(valor).__name__}:{valor!r};".encode())
+
+def impressao_digital(caminho: Union[str, Path]) -> str:
+    """
+    Identifica o estado de um arquivo ou pasta sem ler o conteúdo: tamanho e
+    mtime de cada arquivo (pastas: os arquivos diretos). Para JSONs gravados por
+    ArquivoRegras o diário ao lado também conta.
+    """
+    caminho = Path(caminho)
+    if caminho.is_dir():
+        with os.scandir(caminho) as entradas:
+            arquivos = sorted((e.name, e.stat().st_size, e.stat().st_mtime_ns) for e in entradas if e.is_file())
+        return f"{caminho}:{arquivos}"
+    partes = []
+    for arquivo in (caminho, caminho.with_name(caminho.name + '.journal')):
+        try:
+            info = arquivo.stat()
+            partes.append(f"{arquivo.name}:{info.st_size}:{info.st_mtime_ns}")
+        except FileNotFoundError:
+            partes.append(f"{arquivo.name}:-")
+    return f"{caminho.parent}:{partes}"
+
+def cached_function(func=None, *, depende_de=None):
+    """
+    Decorator for caching function results in data_cache.
+
+    The key is a SHA-256 of the function's qualified name, its arguments (by
+    content) and the fingerprint of every path in `depende_de`, a callable
+    returning the files/folders the result is derived from. Keys are stable
+    across restarts, and editing an input changes the key instead of serving
+    a stale result.
+    """
+    if func is None:
+        return functools.partial(cached_function, depende_de=depende_de)
+    namespace = f"cached_function.{func.__name__}"
+
+    def cache_key(args, kwargs) -> str:
+        digest = hashlib.sha256(f"{func.__module__}.{func.__qualname__}".encode())
+        _hash_argumento(digest, args)
+        _hash_argumento(digest, kwargs)
+        for caminho in (depende_de() if depende_de else []):
+            digest.update(impressao_digital(caminho).encode())
+        return f"{func.__name__}_{digest.hexdigest()[:32]}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not config.CACHE_ENABLED:
+            return func(*args, **kwargs)
+
+        computed = False
+
+        def compute():
+            nonlocal computed
+            computed = True
+            cache_metrics.record(namespace, 'misses')
+            with cache_metrics.timer(namespace, 'compute'):
+                return func(*args, **kwargs)
+
+        # Concurrent misses (other sessions or processes) wait for a single computation
+        start = time.perf_counter()
+        result = data_cache.get_or_compute(cache_key(args, kwargs), compute)
+        if not computed:
+            cache_metrics.record(namespace, 'hits')
+            cache_metrics.observe(namespace, 'load', time.perf_counter() - start)
+        return result
+
+    def refresh(*args, **kwargs):
+        """
+        Recompute the result and overwrite the cached entry (e.g. after the inputs changed).
+        The key lock is not held while computing: a caller that serializes the work with its
+        own lock (the ingestion lock, for processar_faturas) would otherwise take the two
+        locks in the opposite order of get_or_compute. The write itself is atomic.
+        """
+        result = func(*args, **kwargs)
+        if config.CACHE_ENABLED:
+            data_cache.set(cache_key(args, kwargs), result)
+        return result
+
+    wrapper.refresh = refresh
+    wrapper.cache_key = cache_key
+    return wrapper
+
+def _resolver_workers(workers: Optional[int] = None) -> int:
+    """Número efetivo de processos para a ingestão (0 = todos os núcleos)."""
+    workers = config.INGESTAO_WORKERS if workers is None else workers
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    return max(1, workers)
+
+def _mapear_em_paralelo(funcao, tarefas: list, workers: Optional[int] = None) -> list:
+    """
+    Aplica `funcao` a cada tarefa, distribuindo entre processos quando configurado.
+    Os resultados voltam sempre na ordem das tarefas, independente de qual termina primeiro.
+    """
+    workers = min(_resolver_workers(workers), len(tarefas))
+    if workers <= 1:
+        return [funcao(tarefa) for tarefa in tarefas]
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(funcao, tarefas))
+    except (OSError, BrokenProcessPool) as e:
+        logger.warning(f"Ingestão paralela indisponível ({e}); processando sequencialmente")
+        return [funcao(tarefa) for tarefa in tarefas]
+
+# --- Leitura de CSV ---
+# Parâmetros de pd.read_csv que a leitura via pyarrow sabe reproduzir
+_ARGUMENTOS_PYARROW = {'sep', 'encoding', 'usecols', 'dtype', 'parse_dates', 'skipinitialspace'}
+_TIPOS_TEXTO = {str, 'str', 'string', object, 'object'}
+
+try:
+    _DTYPE_TEXTO_ARROW = pd.StringDtype('pyarrow', na_value=np.nan)
+except (TypeError, ImportError):  # pandas < 2.3 ou sem pyarrow: texto continua object
+    _DTYPE_TEXTO_ARROW = None
+
+def motor_csv() -> str:
+    """Motor efetivo de leitura: 'pyarrow' só quando configurado e instalado."""
+    return 'pyarrow' if config.CSV_ENGINE == 'pyarrow' and pa is not None else 'c'
+
+def ler_csv(caminho_arquivo, **kwargs):
+    """
+    pd.read_csv com o motor de CSV_ENGINE.
+
+    Com 'pyarrow' o arquivo é lido pelo leitor multi-thread do Arrow e entregue ao
+    pandas sem cópia para as colunas de texto (strings Arrow); datas ISO já chegam
+    como datetime64. Argumentos que o Arrow não cobre (chunksize, nrows, ...), a
+    falta do pyarrow ou qualquer erro na leitura caem no motor C, como antes.
+    """
+    if motor_csv() == 'pyarrow' and set(kwargs) <= _ARGUMENTOS_PYARROW:
+        try:
+            return _ler_csv_pyarrow(str(caminho_arquivo), **kwargs)
+        except Exception as e:
+            logger.debug(f"pyarrow CSV read failed for {caminho_arquivo}, using the C engine: {e}")
+    return pd.read_csv(caminho_arquivo, **kwargs)
+
+def _arrow_para_pandas(tabela) -> pd.DataFrame:
+    """Tabela Arrow -> DataFrame, com texto em strings Arrow (sem cópia) e datas em datetime64."""
+    mapa_tipos = {pa.string(): _DTYPE_TEXTO_ARROW, pa.large_string(): _DTYPE_TEXTO_ARROW}.get if _DTYPE_TEXTO_ARROW else None
+    return tabela.to_pandas(types_mapper=mapa_tipos, date_as_object=False)
+
+def _ler_csv_pyarrow(caminho_arquivo: str, sep: str = ',', encoding: str = 'utf-8', usecols=None,
+                     dtype=None, parse_dates=None, skipinitialspace: bool = False) -> pd.DataFrame:
+    """Leitura de ler_csv pelo pyarrow.csv; levanta erro para o que não souber tratar."""
+    dtype = dtype or {}
+    if not isinstance(dtype, dict) or any(tipo not in _TIPOS_TEXTO for tipo in dtype.values()):
+        raise ValueError("only text dtypes are mapped to Arrow")
+
+    tabela = pa_csv.read_csv(
+        caminho_arquivo,
+        read_options=pa_csv.ReadOptions(encoding='utf8' if encoding.lower().replace('-', '') in ('utf8', 'utf8sig') else encoding),
+        parse_options=pa_csv.ParseOptions(delimiter=sep),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=list(usecols) if usecols is not None else None,
+            column_types={coluna: pa.string() for coluna in dtype},
+            strings_can_be_null=True  # Campo vazio vira NaN, como no motor C
+        )
+    )
+    if skipinitialspace:
+        for i, campo in enumerate(tabela.schema):
+            if pa.types.is_string(campo.type):
+                tabela = tabela.set_column(i, campo, pc.utf8_ltrim_whitespace(tabela.column(i)))
+
+    df = _arrow_para_pandas(tabela)
+    for coluna in parse_dates or []:
+        if not pd.api.types.is_datetime64_any_dtype(df[coluna]):
+            df[coluna] = pd.to_datetime(df[coluna])
+    return df
+
+# --- Funções de Manipulação de JSON ---
+class ArquivoRegras:
+    """
+    Dicionário JSON (regras de contexto, orçamento, configurações) com cópia em
+    memória e diário de alterações.
+
+    `definir`/`remover` acrescentam uma linha ao diário `<arquivo>.journal` em vez
+    de regravar o JSON inteiro; a cada LIMITE_DIARIO alterações o diário é
+    consolidado em um novo JSON, escrito ao lado e trocado com os.replace.
+    Escritas tomam uma trava de arquivo (`<arquivo>.lock`), então várias sessões
+    ou processos não corrompem o arquivo nem perdem alterações umas das outras;
+    leituras só verificam (stat) se o JSON ou o diário mudaram.
+    """
+
+    LIMITE_DIARIO = 200
+
+    def __init__(self, caminho: Union[str, Path]):
+        self.caminho = Path(caminho)
+        self.diario = self.caminho.with_name(self.caminho.name + '.journal')
+        self._trava = self.caminho.with_name(self.caminho.name + '.lock')
+        self._lock = threading.RLock()
+        self._dados: dict = {}
+        self._identidade = None  # (inode, mtime_ns, tamanho) do JSON carregado
+        self._posicao = 0  # Bytes do diário já aplicados
+        self._alteracoes = 0  # Linhas no diário desde a última consolidação
+
+    def dados(self) -> dict:
+        """Cópia do conteúdo atual (JSON + diário)."""
+        with self._lock:
+            self._sincronizar()
+            return copy.deepcopy(self._dados)
+
+    def obter(self, chave: str, padrao=None):
+        with self._lock:
+            self._sincronizar()
+            return copy.deepcopy(self._dados.get(chave, padrao))
+
+    def definir(self, chave: str, valor):
+        """Grava um valor; custa uma linha no diário, não o arquivo inteiro."""
+        self._registrar({'k': chave, 'v': valor})
+
+    def atualizar(self, chave: str, campos: dict, padrao: Optional[dict] = None):
+        """Mescla `campos` no dicionário guardado em `chave` (criado a partir de `padrao`)."""
+        with self._travado():
+            valor = {**(self._dados[chave] if chave in self._dados else padrao or {}), **campos}
+            self._anexar({'k': chave, 'v': valor})
+
+    def remover(self, chave: str):
+        self._registrar({'k': chave, 'apagar': True})
+
+    def substituir(self, dados: dict):
+        """Troca o conteúdo inteiro (semântica de salvar_json) e zera o diário."""
+        with self._travado():
+            self._dados = copy.deepcopy(dados)
+            self._consolidar()
+
+    def _registrar(self, alteracao: dict):
+        with self._travado():
+            self._anexar(alteracao)
+
+    def _anexar(self, alteracao: dict):
+        linha = json.dumps(alteracao, ensure_ascii=False) + '\n'
+        with open(self.diario, 'a', encoding='utf-8') as f:
+            f.write(linha)
+        self._posicao += len(linha.encode('utf-8'))
+        self._alteracoes += 1
+        self._aplicar(alteracao)
+        if self._alteracoes >= self.LIMITE_DIARIO:
+            self._consolidar()
+
+    def _aplicar(self, alteracao: dict):
+        if alteracao.get('apagar'):
+            self._dados.pop(alteracao['k'], None)
+        else:
+            self._dados[alteracao['k']] = alteracao['v']
+
+    def _consolidar(self):
+        """Grava o JSON completo (indent=4, como sempre) e esvazia o diário; chamado com a trava."""
+        temporario = self.caminho.with_name(f".{self.caminho.name}.{os.getpid()}.tmp")
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(self._dados, f, indent=4, ensure_ascii=False)
+        os.replace(temporario, self.caminho)
+        if self.diario.exists():
+            open(self.diario, 'w').close()
+        self._identidade = self._estado(self.caminho)
+        self._posicao = self._alteracoes = 0
+
+    @staticmethod
+    def _estado(caminho: Path):
+        try:
+            info = caminho.stat()
+        except FileNotFoundError:
+            return None
+        return info.st_ino, info.st_mtime_ns, info.st_size
+
+    def _sincronizar(self):
+        """Relê o JSON se outro processo o trocou e aplica as linhas novas do diário."""
+        identidade = self._estado(self.caminho)
+        try:
+            tamanho_diario = self.diario.stat().st_size
+        except FileNotFoundError:
+            tamanho_diario = 0
+
+        if identidade != self._identidade or tamanho_diario < self._posicao:
+            self._dados = self._ler_json()
+            self._identidade = identidade
+            self._posicao = self._alteracoes = 0
+        if tamanho_diario > self._posicao:
+            with open(self.diario, 'rb') as f:
+                f.seek(self._posicao)
+                bloco = f.read()
+            completo = bloco[:bloco.rfind(b'\n') + 1]  # Linha pela metade fica para a próxima leitura
+            for linha in completo.decode('utf-8').splitlines():
+                try:
+                    self._aplicar(json.loads(linha))
+                except (json.JSONDecodeError, KeyError):
+                    logger.warning(f"Ignoring corrupt journal entry in {self.diario.name}")
+                self._alteracoes += 1
+            self._posicao += len(completo)
+
+    def _ler_json(self) -> dict:
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+            return dados if isinstance(dados, dict) else {}
+        except (json.JSONDecodeError, FileNotFoundError):
+            return {}
+
+    @contextmanager
+    def _travado(self):
+        """Trava entre threads e (com fcntl) entre processos, já sincronizado com o disco."""
+        with self._lock:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            with open(self._trava, 'a') as trava:
+                if fcntl is not None:
+                    fcntl.flock(trava, fcntl.LOCK_EX)
+                try:
+                    self._sincronizar()
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(trava, fcntl.LOCK_UN)
+
+_arquivos_regras: Dict[str, ArquivoRegras] = {}
+_arquivos_regras_lock = threading.Lock()
+
+def arquivo_regras(caminho_arquivo: Union[str, Path]) -> ArquivoRegras:
+    """ArquivoRegras do caminho, um por arquivo no processo."""
+    chave = os.path.abspath(caminho_arquivo)
+    with _arquivos_regras_lock:
+        if chave not in _arquivos_regras:
+            _arquivos_regras[chave] = ArquivoRegras(chave)
+        return _arquivos_regras[chave]
+
+def carregar_json(caminho_arquivo: str) -> dict:
+    return arquivo_regras(caminho_arquivo).dados()
+
+def salvar_json(caminho_arquivo: str, dados: dict):
+    arquivo_regras(caminho_arquivo).substituir(dados)
+
+def atualizar_contexto_pagador(estabelecimento: str, pagador: str):
+    arquivo_regras(config.ARQUIVO_CONTEXTO).atualizar(
+        estabelecimento, {"pagador": pagador}, padrao={"categoria": "Não Definida"}
+    )
+
+# --- Conversão de valores monetários ---
+_POTENCIAS_10 = 10 ** np.arange(19, dtype=np.int64)
+_BRL_MAX_DIGITOS_INTEIROS = 16  # Mantém reais * 100 dentro de int64
+_BRL_BLOCO_LINHAS = 65_536  # Limita a matriz de caracteres processada por vez
+
+# Classe de cada byte: 0 = inválido, 1 = dígito, 2 = vírgula, 3 = ponto, 4 = sinal, 5 = ruído ('R', '$', espaço)
+_BRL_CLASSES = np.zeros(256, dtype=np.uint8)
+_BRL_CLASSES[ord('0'):ord('9') + 1] = 1
+_BRL_CLASSES[ord(',')] = 2
+_BRL_CLASSES[ord('.')] = 3
+_BRL_CLASSES[[ord('-'), ord('+')]] = 4
+_BRL_CLASSES[[0, ord(' '), ord('\t'), 0xA0, ord('R'), ord('$')]] = 5
+
+def parse_brl_centavos(valores) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Converte valores em reais ('R$ 1.234,56', '-1.234,56', '+10,5') para centavos int64.
+
+    Os textos são vistos como uma matriz de bytes e analisados em uma única passada
+    vetorizada, sem as cópias intermediárias de .str.replace. Pontos só são aceitos
+    como separador de milhar (grupos de 3 dígitos) e a vírgula decimal admite no
+    máximo 2 casas. Colunas já numéricas são apenas escaladas.
+
+    Returns:
+        (centavos, posicoes_invalidas): linhas que não puderam ser convertidas ficam
+        com 0 em `centavos` e suas posições (0-based) vêm em `posicoes_invalidas`.
+    """
+    serie = valores if isinstance(valores, pd.Series) else pd.Series(valores)
+    n = len(serie)
+    centavos = np.zeros(n, dtype=np.int64)
+    invalidos = np.zeros(n, dtype=bool)
+
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        numeros = serie.to_numpy(dtype=float, na_value=np.nan)
+        invalidos = ~np.isfinite(numeros) | (np.abs(numeros) >= 1e16)
+        centavos[~invalidos] = np.rint(numeros[~invalidos] * 100).astype(np.int64)
+        return centavos, np.flatnonzero(invalidos)
+
+    textos = serie.to_numpy(dtype=object)
+    for inicio in range(0, n, _BRL_BLOCO_LINHAS):
+        fim = min(inicio + _BRL_BLOCO_LINHAS, n)
+        centavos[inicio:fim], invalidos[inicio:fim] = _parse_brl_bloco(textos[inicio:fim])
+
+    return centavos, np.flatnonzero(invalidos)
+
+def _matriz_de_bytes(textos: np.ndarray) -> np.ndarray:
+    """Matriz (linhas x largura) de bytes; caracteres fora de latin-1 viram 0xFF (inválido)."""
+    try:
+        dados = np.asarray(textos, dtype=bytes)  # NaN/None viram b'nan'/b'None' e são rejeitados
+        return dados.view(np.uint8).reshape(len(dados), dados.dtype.itemsize)
+    except UnicodeEncodeError:
+        dados = np.asarray(textos, dtype=str)
+        pontos = dados.view(np.uint32).reshape(len(dados), dados.dtype.itemsize // 4)
+        return np.minimum(pontos, 0xFF).astype(np.uint8)
+
+def _parse_brl_bloco(textos: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Analisa um bloco de textos de parse_brl_centavos; retorna (centavos, invalidos).
+
+    Percorre a matriz coluna a coluna (poucas dezenas de colunas, cada uma um vetor
+    do bloco inteiro), acumulando o valor no estilo de Horner e validando o formato
+    no mesmo passo.
+    """
+    bytes_ = np.ascontiguousarray(_matriz_de_bytes(textos).T)
+    classes = _BRL_CLASSES[bytes_]
+    largura, linhas = classes.shape
+
+    valor = np.zeros(linhas, dtype=np.int64)
+    digitos = np.zeros(linhas, dtype=np.int32)
+    casas = np.zeros(linhas, dtype=np.int32)
+    virgulas = np.zeros(linhas, dtype=np.int32)
+    sinais = np.zeros(linhas, dtype=np.int32)
+    negativo = np.zeros(linhas, dtype=bool)
+    desde_ponto = np.full(linhas, -1, dtype=np.int32)  # Dígitos desde o último ponto de milhar
+    ruido_apos_digito = np.zeros(linhas, dtype=bool)
+    invalidos = np.zeros(linhas, dtype=bool)
+
+    for j in range(largura):
+        classe = classes[j]
+        digito = classe == 1
+        virgula = classe == 2
+        ponto = classe == 3
+        ruido = classe >= 4
+        na_parte_inteira = virgulas == 0
+
+        # Sinal, espaço e 'R$' só fora do número
+        invalidos |= (classe == 0) | (digito & ruido_apos_digito)
+        ruido_apos_digito |= ruido & (digitos > 0)
+
+        # Pontos só como milhar: após algum dígito, antes da vírgula, em grupos de 3
+        fecha_grupo = (ponto | virgula) & (desde_ponto >= 0)
+        invalidos |= fecha_grupo & (desde_ponto != 3)
+        invalidos |= ponto & ((digitos == 0) | ~na_parte_inteira)
+        desde_ponto = np.where(ponto, 0, desde_ponto + (digito & na_parte_inteira & (desde_ponto >= 0)))
+
+        valor = np.where(digito, valor * 10 + (bytes_[j].astype(np.int64) - 48), valor)
+        digitos += digito
+        casas += digito & ~na_parte_inteira
+        virgulas += virgula
+        sinais += classe == 4
+        negativo |= bytes_[j] == ord('-')
+
+    invalidos |= (
+        (digitos == 0)
+        | (virgulas > 1)
+        | (sinais > 1)
+        | (casas > 2)
+        | (digitos - casas > _BRL_MAX_DIGITOS_INTEIROS)
+        | ((virgulas == 0) & (desde_ponto >= 0) & (desde_ponto != 3))
+    )
+
+    centavos = valor * _POTENCIAS_10[np.clip(2 - casas, 0, 2)]
+    centavos = np.where(negativo, -centavos, centavos)
+    centavos[invalidos] = 0
+    return centavos, invalidos
+
+def limpar_valores_monetarios(serie: pd.Series) -> pd.Series:
+    """Converte uma coluna de valores em reais para float, com NaN onde não foi possível."""
+    centavos, invalidos = parse_brl_centavos(serie)
+    valores = centavos / 100
+    valores[invalidos] = np.nan
+    if len(invalidos) > 0:
+        logger.warning(f"Could not convert {len(invalidos)} currency values (rows {invalidos[:10].tolist()})")
+    return pd.Series(valores, index=serie.index, name=serie.name)
+
+COLUNA_CENTAVOS = 'Valor_Centavos'
+
+def adicionar_coluna_centavos(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Acrescenta 'Valor_Centavos' (int64) derivada de 'Valor' quando VALOR_EM_CENTAVOS está ativo.
+
+    'Valor' continua em reais para exibição; como vem de centavos / 100, o
+    arredondamento de volta para centavos é exato. Linhas sem 'Valor' válido
+    ficam com <NA> (a coluna passa a ser Int64) e são deixadas fora das somas.
+    """
+    if not config.VALOR_EM_CENTAVOS or 'Valor' not in df.columns:
+        return df
+    centavos, invalidos = parse_brl_centavos(df['Valor'])
+    df = df.copy()
+    if len(invalidos) > 0:
+        logger.warning(f"{len(invalidos)} rows without a valid 'Valor' have no centavos (rows {invalidos[:10].tolist()})")
+        centavos = pd.array(centavos, dtype='Int64')
+        centavos[invalidos] = pd.NA
+    df[COLUNA_CENTAVOS] = centavos
+    return df
+
+def somar_valores(df: pd.DataFrame, por=None):
+    """
+    Soma 'Valor' em reais, total ou agrupada por `por` (colunas ou pd.Grouper);
+    em colunas categorical só aparecem os grupos presentes (observed=True) e
+    linhas com grupo nulo ficam de fora (dropna=True), como no BancoTransacoes.
+
+    Com 'Valor_Centavos' presente a soma é feita em int64 e convertida para reais
+    só no final, sem o acúmulo de erro de ponto flutuante.
+    """
+    coluna = COLUNA_CENTAVOS if COLUNA_CENTAVOS in df.columns else 'Valor'
+    soma = df[coluna].sum() if por is None else df.groupby(por, observed=True, dropna=True)[coluna].sum()
+    if coluna == COLUNA_CENTAVOS:
+        soma = (soma if por is None else soma.astype(np.int64)) / 100  # Int64 (com <NA>) volta a float64
+    return soma if por is None else soma.rename('Valor')
+
+def colunas_de_duplicidade(df: pd.DataFrame) -> List[str]:
+    """
+    Colunas para df.duplicated(): com centavos disponíveis, compara o inteiro em vez
+    do float; colunas derivadas do índice de transações não entram na comparação.
+    """
+    ignoradas = {'Id_Transacao', 'Possivel_Duplicata'}
+    if COLUNA_CENTAVOS in df.columns:
+        ignoradas.add('Valor')
+    return [col for col in df.columns if col not in ignoradas]
+
+# --- Conversão de datas ---
+# Formatos tentados na detecção, do mais comum nos extratos para o menos comum
+FORMATOS_DATA = [
+    '%d/%m/%Y', '%d/%m/%Y %H:%M', '%d/%m/%Y %H:%M:%S', '%d/%m/%y',
+    '%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%d-%m-%Y', '%d.%m.%Y'
+]
+_AMOSTRA_DATAS = 50
+
+def detectar_formato_data(amostra) -> Optional[str]:
+    """Retorna o primeiro formato de FORMATOS_DATA que converte toda a amostra, ou None."""
+    amostra = pd.Index(amostra)
+    for formato in FORMATOS_DATA:
+        if pd.to_datetime(amostra, format=formato, errors='coerce').notna().all():
+            return formato
+    return None
+
+def converter_datas(serie: pd.Series, cortar_em: Optional[str] = None) -> pd.Series:
+    """
+    Converte textos de data (dia primeiro) para datetime, com NaT onde não foi possível.
+
+    Extratos têm milhares de linhas mas poucas datas distintas: apenas os valores
+    únicos são convertidos, com o formato detectado em uma amostra, e o resultado
+    é mapeado de volta para as linhas. `cortar_em` descarta o sufixo de hora dos
+    extratos de débito ('01/01/2025 às 10:00'). Valores fora do formato detectado
+    caem na inferência do pandas, como antes.
+    """
+    codigos, unicos = pd.factorize(serie)
+    textos = pd.Index(unicos).astype(str).str.strip()
+    if cortar_em:
+        textos = textos.str.split(cortar_em).str[0]
+
+    amostra = textos[textos != ''][:_AMOSTRA_DATAS]
+    formato = detectar_formato_data(amostra) if len(amostra) else None
+    if formato:
+        datas = pd.Series(pd.to_datetime(textos, format=formato, errors='coerce'))
+        falhas = datas.isna().to_numpy() & (textos != '')
+        if falhas.any():
+            datas[falhas] = pd.to_datetime(textos[falhas], errors='coerce', dayfirst=True).to_numpy()
+    else:
+        datas = pd.to_datetime(textos, errors='coerce', dayfirst=True)
+
+    resultado = pd.DatetimeIndex(datas).take(codigos, allow_fill=True, fill_value=pd.NaT)
+    return pd.Series(resultado, index=serie.index, name=serie.name)
+
+# --- Formatos de extrato ---
+COLUNAS_PADRAO = ['Data', 'Estabelecimento', 'Valor', 'Tipo']
+
+@dataclass(frozen=True)
+class FormatoExtrato:
+    """
+    Descrição declarativa do CSV de extrato de um banco.
+
+    `colunas` liga cada coluna do arquivo à coluna padronizada (Data,
+    Estabelecimento, Valor); só essas colunas são lidas, com os tipos de
+    `dtypes`. Regra de sinal: 'despesa' torna todo valor negativo (fatura de
+    crédito); 'sinal' usa o sinal do valor para separar Receita de Despesa.
+    """
+    nome: str
+    tipo: str
+    colunas: Dict[str, str]
+    dtypes: Dict[str, Any]
+    regra_sinal: str
+    cortar_data_em: Optional[str] = None
+    descartar_incompletas: bool = False
+
+    @property
+    def usecols(self) -> List[str]:
+        return list(self.colunas)
+
+    def normalizar(self, df: pd.DataFrame, limpar_valores=None) -> pd.DataFrame:
+        """Renomeia, converte e tipa um frame lido com este formato (arquivo inteiro ou bloco)."""
+        df = df.rename(columns=lambda col: col.strip()).rename(columns=self.colunas)
+        df['Data'] = converter_datas(df['Data'], cortar_em=self.cortar_data_em)
+        df['Valor'] = (limpar_valores or limpar_valores_monetarios)(df['Valor'])
+
+        if self.regra_sinal == 'despesa':
+            df['Valor'] = -abs(df['Valor'])
+            df['Tipo'] = 'Despesa'
+        else:
+            df['Tipo'] = np.where(df['Valor'] >= 0, 'Receita', 'Despesa')
+
+        df = df[COLUNAS_PADRAO]
+        return df.dropna() if self.descartar_incompletas else df
+
+# Novos bancos entram aqui; o tipo indica a pasta de origem (crédito/débito)
+FORMATOS_EXTRATO: Dict[str, FormatoExtrato] = {
+    'credito_padrao': FormatoExtrato(
+        nome='credito_padrao',
+        tipo='credito',
+        colunas={
+            'Data movimento': 'Data',
+            'Nome do fornecedor/cliente': 'Estabelecimento',
+            'Valor (R$)': 'Valor'
+        },
+        dtypes={'Data movimento': str, 'Nome do fornecedor/cliente': str, 'Valor (R$)': str},
+        regra_sinal='despesa'
+    ),
+    'debito_padrao': FormatoExtrato(
+        nome='debito_padrao',
+        tipo='debito',
+        colunas={'Data': 'Data', 'Descricao': 'Estabelecimento', 'Valor': 'Valor'},
+        dtypes={'Data': str, 'Descricao': str, 'Valor': str},
+        regra_sinal='sinal',
+        cortar_data_em=' às',
+        descartar_incompletas=True
+    ),
+}
+
+@dataclass(frozen=True)
+class LeituraExtrato:
+    """Formato, encoding e separador detectados para um arquivo, mais os nomes reais das colunas."""
+    formato: FormatoExtrato
+    encoding: str
+    separador: str
+    colunas_arquivo: Dict[str, str]  # nome no arquivo (com espaços) -> nome declarado no formato
+
+    def ler(self, caminho_arquivo: str, chunksize: int = None):
+        """Lê só as colunas do formato, já tipadas; com `chunksize` devolve um iterador de blocos."""
+        blocos = {'chunksize': chunksize} if chunksize else {}
+        return ler_csv(
+            caminho_arquivo, sep=self.separador, encoding=self.encoding, skipinitialspace=True,
+            usecols=list(self.colunas_arquivo),
+            dtype={bruta: self.formato.dtypes[nome] for bruta, nome in self.colunas_arquivo.items()},
+            **blocos
+        )
+
+    def normalizar(self, df: pd.DataFrame, limpar_valores=None) -> pd.DataFrame:
+        return self.formato.normalizar(df, limpar_valores)
+
+_BYTES_AMOSTRA = 64 * 1024  # Bytes lidos do início do arquivo para detectar o formato
+_LEITURAS_EM_CACHE = 256  # Detecções lembradas (as menos usadas saem primeiro)
+
+def _decodificar_amostra(amostra: bytes, completa: bool) -> Tuple[str, str]:
+    """Decodifica a amostra com o primeiro encoding de SUPPORTED_ENCODINGS que servir."""
+    if not completa:
+        # Não decodificar um caractere multibyte cortado no fim da amostra
+        amostra = amostra[:amostra.rfind(b'\n') + 1] or amostra
+    for encoding in config.SUPPORTED_ENCODINGS:
+        try:
+            texto = amostra.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+        if encoding.replace('-', '').lower() == 'utf8' and texto.startswith('\ufeff'):
+            return texto[1:], 'utf-8-sig'
+        return texto, encoding
+    raise ValueError(f"None of the supported encodings could decode the file: {config.SUPPORTED_ENCODINGS}")
+
+def detectar_leitura(caminho_arquivo: str, tipo: str) -> LeituraExtrato:
+    """
+    Descobre encoding, separador e formato de um extrato a partir dos primeiros KB.
+
+    O encoding é o primeiro de SUPPORTED_ENCODINGS que decodifica a amostra; o
+    separador, o primeiro de SUPPORTED_SEPARATORS cujo cabeçalho contém todas as
+    colunas de um formato do `tipo` informado. O resultado fica em um cache LRU
+    limitado, com chave (caminho, tamanho, mtime_ns): um arquivo regravado no
+    mesmo caminho é detectado de novo, e a leitura completa roda uma vez, já com
+    os parâmetros certos.
+    """
+    stat = os.stat(caminho_arquivo)
+    return _detectar_leitura(tipo, os.path.abspath(caminho_arquivo), stat.st_size, stat.st_mtime_ns)
+
+@functools.lru_cache(maxsize=_LEITURAS_EM_CACHE)
+def _detectar_leitura(tipo: str, caminho_arquivo: str, tamanho: int, mtime_ns: int) -> LeituraExtrato:
+    """Detecção de detectar_leitura; tamanho e mtime_ns só entram na chave do cache."""
+    formatos = [formato for formato in FORMATOS_EXTRATO.values() if formato.tipo == tipo]
+    if not formatos:
+        raise ValueError(f"Unknown file type: {tipo}")
+
+    with open(caminho_arquivo, 'rb') as f:
+        amostra = f.read(_BYTES_AMOSTRA)
+    texto, encoding = _decodificar_amostra(amostra, completa=len(amostra) >= tamanho)
+    primeira_linha = texto.splitlines()[0] if texto else ''
+
+    for separador in config.SUPPORTED_SEPARATORS:
+        cabecalho = next(csv.reader([primeira_linha], delimiter=separador, skipinitialspace=True), [])
+        nomes = {coluna.strip(): coluna for coluna in cabecalho}
+        for formato in formatos:
+            if all(coluna in nomes for coluna in formato.usecols):
+                return LeituraExtrato(formato, encoding, separador, {nomes[col]: col for col in formato.usecols})
+
+    raise ValueError(f"Unrecognized {tipo} statement format: {caminho_arquivo}")
+
+# --- Armazenamento das transações consolidadas ---
+# Colunas de texto muito repetitivas, gravadas com codificação de dicionário
+COLUNAS_DICIONARIO = ['Estabelecimento', 'Tipo', 'Categoria', 'Pagador', 'Origem']
+
+class ArmazemTransacoes:
+    """
+    Transações consolidadas em Parquet, particionadas por ano/mês (layout hive).
+
+    Cada publicação grava uma versão completa em `v<id>/ano=AAAA/mes=M/` e só
+    então troca o ponteiro ATUAL com os.replace: leitores nunca veem uma versão
+    pela metade. `ler` recebe colunas e intervalo de datas e só abre as
+    partições e colunas necessárias.
+
+    Alterações pontuais não regravam a versão: `anexar` grava só as linhas
+    novas ou alteradas em `v<id>/_deltas/d<id>.parquet` (o prefixo '_' deixa a
+    pasta fora do dataset) e `ler` sobrepõe os deltas à base pelo Id_Transacao.
+    `compactar` incorpora os deltas em uma nova versão completa.
+
+    Ao lado de base e deltas fica um resumo por linha em `v<id>/_resumos/`
+    (Id_Transacao, um digest das demais colunas e as colunas do catálogo de
+    períodos), para que uma publicação descubra o que mudou sem materializar
+    o histórico.
+    """
+
+    PONTEIRO = 'ATUAL'
+    PASTA_DELTAS = '_deltas'
+    PASTA_RESUMOS = '_resumos'
+    COLUNAS_RESUMO = ['Data', 'Tipo', 'Valor', COLUNA_CENTAVOS]
+    METADADO_DIGEST = b'colunas_digest'  # Colunas cobertas pelo digest, em JSON
+    VERSOES_MANTIDAS = 2  # A anterior fica para quem ainda está lendo
+
+    def __init__(self, pasta: Union[str, Path] = None):
+        self._pasta = pasta
+        self._lock = threading.RLock()
+
+    @property
+    def pasta(self) -> Path:
+        return Path(self._pasta or config.PASTA_TRANSACOES)
+
+    @staticmethod
+    def disponivel() -> bool:
+        return pa is not None
+
+    def versao(self) -> Optional[str]:
+        """Versão publicada atual, ou None se nada foi publicado."""
+        try:
+            return (self.pasta / self.PONTEIRO).read_text(encoding='utf-8').strip() or None
+        except FileNotFoundError:
+            return None
+
+    def deltas(self, versao: Optional[str] = None) -> List[Path]:
+        """Segmentos de alterações da versão (atual por padrão), do mais antigo ao mais novo."""
+        versao = versao or self.versao()
+        if versao is None:
+            return []
+        pasta = self.pasta / versao / self.PASTA_DELTAS
+        if not pasta.is_dir():
+            return []
+        return sorted(pasta.glob('d*.parquet'), key=lambda p: int(p.stem[1:]))
+
+    def publicar(self, df: pd.DataFrame) -> str:
+        """Grava `df` como nova versão e a torna a atual."""
+        with self._lock:
+            return self._publicar(df)
+
+    def anexar(self, df: pd.DataFrame) -> Path:
+        """
+        Grava linhas novas ou alteradas (com 'Id_Transacao') como um segmento da versão atual.
+
+        Custa o tamanho das alterações, não do histórico. Exige uma versão publicada.
+        """
+        with self._lock:
+            versao = self.versao()
+            if versao is None:
+                raise ValueError("No published version to append to")
+            pasta = self.pasta / versao / self.PASTA_DELTAS
+            pasta.mkdir(exist_ok=True)
+            destino = pasta / f"d{time.time_ns()}.parquet"
+            temporario = pasta / f".{destino.name}.{os.getpid()}.tmp"
+            pq.write_table(self._para_arrow(df).drop(['ano', 'mes']), str(temporario))
+            os.replace(temporario, destino)
+            # Depois do delta: um resumo sem delta só faria a linha parecer alterada de novo
+            self._gravar_resumo(df, versao, destino.name)
+            return destino
+
+    @staticmethod
+    def digest_linhas(df: pd.DataFrame, colunas: List[str]) -> np.ndarray:
+        """Hash de 64 bits por linha sobre `colunas`, igual para o mesmo valor em qualquer dtype."""
+        normalizadas = {}
+        for coluna in colunas:
+            serie = df[coluna]
+            if pd.api.types.is_datetime64_any_dtype(serie):
+                serie = serie.dt.as_unit('ns')
+            elif pd.api.types.is_numeric_dtype(serie):
+                serie = pd.Series(serie.to_numpy(dtype='float64', na_value=np.nan), index=serie.index)
+            normalizadas[coluna] = serie
+        return pd.util.hash_pandas_object(pd.DataFrame(normalizadas, index=df.index), index=False).to_numpy()
+
+    def resumo(self, colunas: List[str], ids=None, versao: Optional[str] = None) -> Optional[Tuple[pd.DataFrame, List[str]]]:
+        """
+        (resumo, colunas do digest) da versão, com `colunas` do resumo e o
+        estado mais recente de cada Id_Transacao; `ids` restringe as linhas.
+        None se a versão não tem resumo (publicada sem ids ou antes dele).
+        """
+        versao = versao or self.versao()
+        if versao is None:
+            return None
+        pasta = self.pasta / versao / self.PASTA_RESUMOS
+        base = pasta / 'base.parquet'
+        if not base.exists():
+            return None
+        segmentos = [base] + sorted(pasta.glob('d*.parquet'), key=lambda p: int(p.stem[1:]))
+        filtro = None if ids is None else pa_ds.field('Id_Transacao').isin(pa.array(list(ids)))
+        tabelas = [pq.read_table(str(segmento), columns=colunas, filters=filtro) for segmento in segmentos]
+        digest = json.loads(pq.read_schema(str(base)).metadata[self.METADADO_DIGEST])
+        df = _arrow_para_pandas(pa.concat_tables(tabelas, promote_options='permissive'))
+        return df.drop_duplicates('Id_Transacao', keep='last').reset_index(drop=True), digest
+
+    def _gravar_resumo(self, df: pd.DataFrame, versao: str, nome: str):
+        if 'Id_Transacao' not in df.columns:
+            return
+        pasta = self.pasta / versao / self.PASTA_RESUMOS
+        pasta.mkdir(exist_ok=True)
+        df = df.assign(Data=pd.to_datetime(df['Data'])).reset_index(drop=True)
+        colunas = sorted(col for col in df.columns if col != 'Id_Transacao')
+        resumo = df[['Id_Transacao'] + [col for col in self.COLUNAS_RESUMO if col in df.columns]]
+        tabela = pa.Table.from_pandas(resumo.assign(Digest=self.digest_linhas(df, colunas)), preserve_index=False)
+        tabela = tabela.replace_schema_metadata({**(tabela.schema.metadata or {}),
+                                                 self.METADADO_DIGEST: json.dumps(colunas).encode()})
+        temporario = pasta / f".{nome}.{os.getpid()}.tmp"
+        pq.write_table(tabela, str(temporario))
+        os.replace(temporario, pasta / nome)
+
+    def compactar(self) -> Optional[str]:
+        """Incorpora os deltas em uma nova versão completa; None se não havia deltas."""
+        with self._lock:
+            if not self.deltas():
+                return None
+            return self._publicar(self.ler())
+
+    def _publicar(self, df: pd.DataFrame) -> str:
+        versao = f"v{time.time_ns()}"
+        destino = self.pasta / versao
+        destino.mkdir(parents=True, exist_ok=True)
+
+        tabela = self._para_arrow(df)
+        if tabela.num_rows:
+            dicionario = [col for col in COLUNAS_DICIONARIO if col in tabela.column_names]
+            pq.write_to_dataset(tabela, root_path=str(destino), partition_cols=['ano', 'mes'],
+                                use_dictionary=dicionario, existing_data_behavior='error')
+        else:
+            pq.write_table(tabela, str(destino / 'vazio.parquet'))
+        self._gravar_resumo(df, versao, 'base.parquet')
+
+        temporario = self.pasta / f".{self.PONTEIRO}.{os.getpid()}.tmp"
+        temporario.write_text(versao, encoding='utf-8')
+        os.replace(temporario, self.pasta / self.PONTEIRO)
+        self._remover_versoes_antigas()
+        return versao
+
+    def ler(self, colunas: Optional[List[str]] = None, inicio=None, fim=None) -> pd.DataFrame:
+        """
+        Lê a versão atual, ordenada por data (mais recente primeiro).
+
+        `colunas` ausentes no armazém são ignoradas; `inicio`/`fim` são inclusivos
+        e descartam partições inteiras fora do intervalo antes de abrir arquivos.
+        """
+        versao = self.versao()
+        if versao is None:
+            return pd.DataFrame()
+
+        dataset = pa_ds.dataset(str(self.pasta / versao), format='parquet', partitioning='hive')
+        nomes = [nome for nome in dataset.schema.names if nome not in ('ano', 'mes')]
+        if colunas is not None:
+            nomes = [nome for nome in colunas if nome in dataset.schema.names]
+
+        filtro = None
+        if inicio is not None:
+            inicio = pd.Timestamp(inicio)
+            filtro = ((pa_ds.field('ano') > inicio.year)
+                      | ((pa_ds.field('ano') == inicio.year) & (pa_ds.field('mes') >= inicio.month)))
+            filtro &= pa_ds.field('Data') >= inicio.to_pydatetime()
+        if fim is not None:
+            fim = pd.Timestamp(fim)
+            filtro_fim = ((pa_ds.field('ano') < fim.year)
+                          | ((pa_ds.field('ano') == fim.year) & (pa_ds.field('mes') <= fim.month)))
+            filtro_fim &= pa_ds.field('Data') <= fim.to_pydatetime()
+            filtro = filtro_fim if filtro is None else filtro & filtro_fim
+
+        deltas = self.deltas(versao)
+        if deltas and 'Id_Transacao' not in nomes:
+            df = _arrow_para_pandas(dataset.to_table(columns=nomes + ['Id_Transacao'], filter=filtro))
+            df = self._aplicar_deltas(df, deltas, inicio, fim).drop(columns='Id_Transacao')
+        else:
+            df = _arrow_para_pandas(dataset.to_table(columns=nomes, filter=filtro))
+            if deltas:
+                df = self._aplicar_deltas(df, deltas, inicio, fim)
+        if 'Data' in df.columns:
+            df = df.sort_values('Data', ascending=False, kind='stable').reset_index(drop=True)
+        return df
+
+    @staticmethod
+    def _aplicar_deltas(base: pd.DataFrame, deltas: List[Path], inicio=None, fim=None) -> pd.DataFrame:
+        """Substitui na base as linhas com Id_Transacao presente nos deltas (vale o mais recente)."""
+        alteradas = pd.concat([_arrow_para_pandas(pq.read_table(str(delta))) for delta in deltas], ignore_index=True)
+        alteradas = alteradas.drop_duplicates('Id_Transacao', keep='last')
+        base = base[~base['Id_Transacao'].isin(alteradas['Id_Transacao'])]
+        if inicio is not None:
+            alteradas = alteradas[alteradas['Data'] >= pd.Timestamp(inicio)]
+        if fim is not None:
+            alteradas = alteradas[alteradas['Data'] <= pd.Timestamp(fim)]
+        if alteradas.empty:
+            return base
+        alteradas = alteradas[[col for col in base.columns if col in alteradas.columns]]
+        return pd.concat([base, alteradas], ignore_index=True)
+
+    def exportar_csv(self, destino: Union[str, Path] = None) -> Path:
+        """Exporta a versão atual para o CSV ';' de sempre (compatibilidade)."""
+        destino = Path(destino or config.ARQUIVO_CONSOLIDADO)
+        _escrever_csv_atomico(self.ler(), destino)
+        return destino
+
+    @staticmethod
+    def _para_arrow(df: pd.DataFrame):
+        df = df.reset_index(drop=True)
+        datas = pd.to_datetime(df['Data'])
+        particoes = pd.DataFrame({
+            'ano': datas.dt.year.fillna(0).astype(np.int32),
+            'mes': datas.dt.month.fillna(0).astype(np.int32)
+        })
+        return pa.Table.from_pandas(pd.concat([df.assign(Data=datas), particoes], axis=1), preserve_index=False)
+
+    def _remover_versoes_antigas(self):
+        versoes = sorted((p for p in self.pasta.glob('v*') if p.is_dir()), key=lambda p: int(p.name[1:]))
+        for antiga in versoes[:-self.VERSOES_MANTIDAS]:
+            shutil.rmtree(antiga, ignore_errors=True)
+
+armazem_transacoes = ArmazemTransacoes()
+
+def _usar_armazem() -> bool:
+    return config.ARMAZENAMENTO_PARQUET and ArmazemTransacoes.disponivel()
+
+def _escrever_csv_atomico(df: pd.DataFrame, destino: Path):
+    """Escreve o CSV ao lado do destino e troca com os.replace: quem lê nunca vê meio arquivo."""
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporario = destino.with_name(f".{destino.name}.{os.getpid()}.tmp")
+    try:
+        df.to_csv(str(temporario), index=False, sep=';', encoding='utf-8')
+        os.replace(temporario, destino)
+    finally:
+        if temporario.exists():
+            temporario.unlink()
+
+def _linhas_alteradas(df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """
+    Linhas de `df` novas ou diferentes do consolidado publicado, pelo Id_Transacao.
+
+    Compara o digest de cada linha com o resumo gravado ao lado do armazém, sem
+    ler o histórico. Colunas publicadas que `df` não tem (ex.:
+    'Confianca_Categoria' vinda do assistente) mantêm o valor publicado; só
+    elas são lidas do armazém. None quando só uma publicação completa serve:
+    nada publicado (ou sem resumo), frame sem ids (ou com ids repetidos),
+    colunas novas, centavos ausentes ou transações removidas.
+    """
+    if 'Id_Transacao' not in df.columns or df['Id_Transacao'].duplicated().any():
+        return None
+    resumo = armazem_transacoes.resumo(['Id_Transacao', 'Digest'])
+    if resumo is None:
+        return None
+    publicado, colunas = resumo
+    faltantes = [col for col in colunas if col not in df.columns]
+    if COLUNA_CENTAVOS in faltantes or not set(df.columns) - {'Id_Transacao'} <= set(colunas):
+        return None
+    if not publicado['Id_Transacao'].isin(df['Id_Transacao']).all():
+        return None
+
+    if faltantes:
+        preenchidas = armazem_transacoes.ler(['Id_Transacao'] + faltantes).set_index('Id_Transacao')
+        preenchidas = preenchidas.reindex(df['Id_Transacao'])
+        df = df.assign(**{col: preenchidas[col].to_numpy() for col in faltantes})
+    posicoes = pd.Index(publicado['Id_Transacao']).get_indexer(df['Id_Transacao'])
+    anterior = publicado['Digest'].to_numpy()[posicoes]
+    digest = ArmazemTransacoes.digest_linhas(df.assign(Data=pd.to_datetime(df['Data'])), colunas)
+    return df[(posicoes < 0) | (anterior != digest)]
+
+def _publicar_alteracoes(df: pd.DataFrame, alteradas: pd.DataFrame):
+    """Anexa as alterações ao armazém (e ao banco) e compacta ao passar de COMPACTAR_APOS_DELTAS."""
+    if config.BANCO_SQL:
+        try:
+            try:
+                banco_transacoes.atualizar(alteradas)
+            except sqlite3.Error:
+                banco_transacoes.publicar(df)  # Banco ainda não criado ou com esquema antigo
+        except Exception as e:
+            logger.error(f"Failed to update the SQL backend: {e}")
+    armazem_transacoes.anexar(alteradas)
+    logger.info(f"Appended {len(alteradas)} new or changed transactions")
+
+    if len(armazem_transacoes.deltas()) >= config.COMPACTAR_APOS_DELTAS:
+        armazem_transacoes.compactar()
+        if config.EXPORTAR_CSV_CONSOLIDADO:
+            armazem_transacoes.exportar_csv()
+
+def salvar_dados_consolidados(df: pd.DataFrame):
+    """
+    Publica o consolidado, incluindo 'Valor_Centavos' no modo em centavos.
+
+    Com ARMAZENAMENTO_PARQUET (e pyarrow instalado) a publicação vai para o
+    armazém particionado e o CSV só é gerado se EXPORTAR_CSV_CONSOLIDADO estiver
+    ativo; sem isso o CSV continua sendo o armazenamento. Com BANCO_SQL o banco
+    de consultas é repopulado junto.
+
+    Quando já há versão publicada e o frame tem Id_Transacao, só as linhas novas
+    ou alteradas são gravadas (segmento de delta) e aplicadas ao banco; base e
+    CSV exportado só são regravados na compactação.
+    """
+    df = adicionar_coluna_centavos(df)
+    alteradas = _linhas_alteradas(df) if _usar_armazem() else None
+    if alteradas is None:
+        _publicar_completo(df)
+        atualizar_catalogo_periodos(df)
+        return
+    if alteradas.empty:
+        logger.info("Consolidated data unchanged; nothing to publish")
+        return
+    versao_anterior = versao_dados_consolidados()
+    colunas_resumo = ['Id_Transacao'] + [col for col in ArmazemTransacoes.COLUNAS_RESUMO if col in df.columns]
+    substituidas, _ = armazem_transacoes.resumo(colunas_resumo, ids=alteradas['Id_Transacao'])
+    _publicar_alteracoes(df, alteradas)
+    _atualizar_catalogo_alteracoes(df, versao_anterior, substituidas, alteradas)
+
+def _publicar_completo(df: pd.DataFrame):
+    if config.BANCO_SQL:
+        try:
+            banco_transacoes.publicar(df)
+        except Exception as e:
+            logger.error(f"Failed to populate the SQL backend: {e}")
+    if _usar_armazem():
+        armazem_transacoes.publicar(df)
+        if not config.EXPORTAR_CSV_CONSOLIDADO:
+            return
+    _escrever_csv_atomico(df, config.ARQUIVO_CONSOLIDADO)
+
+def versao_dados_consolidados() -> int:
+    """Token barato que muda a cada publicação do consolidado; 0 se nada foi publicado."""
+    if _usar_armazem():
+        versao = armazem_transacoes.versao()
+        if versao is not None:
+            deltas = armazem_transacoes.deltas(versao)
+            return int(deltas[-1].stem[1:] if deltas else versao[1:])
+    try:
+        return config.ARQUIVO_CONSOLIDADO.stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+def calcular_catalogo_periodos(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Uma entrada por (ano, mês) com quantidade de transações e totais de receitas e despesas."""
+    if df.empty or 'Data' not in df.columns:
+        return []
+    datas = pd.to_datetime(df['Data'], errors='coerce')
+    base = df.assign(ano=datas.dt.year, mes=datas.dt.month)[datas.notna()]
+    contagem = base.groupby(['ano', 'mes']).size()
+    totais = {}
+    for tipo in ('Receita', 'Despesa'):
+        recorte = base[base['Tipo'] == tipo] if 'Tipo' in base.columns else base.iloc[:0]
+        totais[tipo] = somar_valores(recorte, ['ano', 'mes'])
+    return [
+        {'ano': int(ano), 'mes': int(mes), 'transacoes': int(quantidade),
+         'receitas': round(float(totais['Receita'].get((ano, mes), 0.0)), 2),
+         'despesas': round(float(totais['Despesa'].get((ano, mes), 0.0)), 2)}
+        for (ano, mes), quantidade in contagem.items()
+    ]
+
+def atualizar_catalogo_periodos(df: pd.DataFrame):
+    """Grava o catálogo de períodos da versão publicada (ARQUIVO_CATALOGO_PERIODOS)."""
+    versao = versao_dados_consolidados()
+    if carregar_json(str(config.ARQUIVO_CATALOGO_PERIODOS)).get('versao') == versao:
+        return
+    salvar_json(str(config.ARQUIVO_CATALOGO_PERIODOS), {'versao': versao, 'periodos': calcular_catalogo_periodos(df)})
+
+def _atualizar_catalogo_alteracoes(df: pd.DataFrame, versao_anterior: int, substituidas: pd.DataFrame,
+                                   alteradas: pd.DataFrame):
+    """
+    Leva o catálogo à versão nova tirando as linhas substituídas e somando as
+    alteradas; se o catálogo não era o da versão anterior, refaz a partir de `df`.
+    """
+    catalogo = carregar_json(str(config.ARQUIVO_CATALOGO_PERIODOS))
+    if catalogo.get('versao') != versao_anterior:
+        atualizar_catalogo_periodos(df)
+        return
+    periodos = {(p['ano'], p['mes']): p for p in catalogo.get('periodos', [])}
+    for sinal, linhas in ((-1, substituidas), (1, alteradas)):
+        for parcial in calcular_catalogo_periodos(linhas):
+            periodo = periodos.setdefault((parcial['ano'], parcial['mes']), {
+                'ano': parcial['ano'], 'mes': parcial['mes'], 'transacoes': 0, 'receitas': 0.0, 'despesas': 0.0})
+            periodo['transacoes'] += sinal * parcial['transacoes']
+            for campo in ('receitas', 'despesas'):
+                periodo[campo] = round(periodo[campo] + sinal * parcial[campo], 2)
+    salvar_json(str(config.ARQUIVO_CATALOGO_PERIODOS), {
+        'versao': versao_dados_consolidados(),
+        'periodos': [periodo for _, periodo in sorted(periodos.items()) if periodo['transacoes'] > 0]
+    })
+
+def catalogo_periodos() -> List[Dict[str, Any]]:
+    """
+    Catálogo de períodos do consolidado, lido do arquivo ao lado em O(meses).
+
+    Se o catálogo não corresponde à versão publicada (instalação anterior a ele
+    ou publicação concorrente), é refeito a partir do provedor e regravado.
+    """
+    catalogo = carregar_json(str(config.ARQUIVO_CATALOGO_PERIODOS))
+    if catalogo.get('versao') == versao_dados_consolidados():
+        return catalogo.get('periodos', [])
+    df = obter_dados_consolidados(['Data', 'Tipo', 'Valor', COLUNA_CENTAVOS])
+    if df.empty:
+        return []
+    atualizar_catalogo_periodos(df)
+    return calcular_catalogo_periodos(df)
+
+def dados_consolidados_disponiveis() -> bool:
+    return (_usar_armazem() and armazem_transacoes.versao() is not None) or config.ARQUIVO_CONSOLIDADO.exists()
+
+def intervalo_do_mes(ano: int, mes: int) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """(início, fim) inclusivos de um mês, para carregar_dados_consolidados."""
+    inicio = pd.Timestamp(year=ano, month=mes, day=1)
+    return inicio, inicio + pd.DateOffset(months=1) - pd.Timedelta(microseconds=1)
+
+def carregar_dados_consolidados(colunas: Optional[List[str]] = None, inicio=None, fim=None) -> pd.DataFrame:
+    """
+    Lê o consolidado com 'Data' já em datetime, opcionalmente só algumas colunas e um intervalo de datas.
+
+    Usa o armazém Parquet quando há versão publicada; senão (instalação antiga ou
+    sem pyarrow) lê o CSV e aplica o mesmo recorte em memória.
+    """
+    if _usar_armazem() and armazem_transacoes.versao() is not None:
+        return armazem_transacoes.ler(colunas, inicio, fim)
+    if not config.ARQUIVO_CONSOLIDADO.exists():
+        return pd.DataFrame()
+
+    df = ler_csv(config.ARQUIVO_CONSOLIDADO, sep=';', parse_dates=['Data'])
+    if inicio is not None:
+        df = df[df['Data'] >= pd.Timestamp(inicio)]
+    if fim is not None:
+        df = df[df['Data'] <= pd.Timestamp(fim)]
+    if colunas is not None:
+        df = df[[col for col in colunas if col in df.columns]]
+    return df.reset_index(drop=True)
+
+# --- Provedor do consolidado ---
+# Colunas de texto repetidas em quase todas as linhas: em memória viram categorical
+COLUNAS_CATEGORICAS = ['Estabelecimento', 'Categoria', 'Pagador', 'Tipo']
+_CARDINALIDADE_MAXIMA = 0.5  # Acima de distintos/linhas a categoria gasta mais do que economiza
+
+def compactar_categoricas(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Converte (in-place) as COLUNAS_CATEGORICAS de baixa cardinalidade para 'category'.
+
+    Retorna {coluna: dtype original} das colunas convertidas, usado pelo
+    relatório de memória. Agrupamentos sobre elas devem usar observed=True.
+    """
+    convertidas = {}
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna not in df.columns or isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            continue
+        serie = df[coluna]
+        if serie.nunique() <= _CARDINALIDADE_MAXIMA * len(serie):
+            convertidas[coluna] = serie.dtype
+            df[coluna] = serie.astype('category')
+    return convertidas
+
+class InstantaneoArrow:
+    """
+    Consolidado de cada versão em um arquivo Arrow IPC, mapeado em memória.
+
+    O primeiro processo que carrega uma versão grava o frame já normalizado
+    (categóricas viram colunas de dicionário) em `consolidado_<versao>.arrow`;
+    os demais só mapeiam o arquivo. Colunas numéricas, datas e texto (strings
+    Arrow) apontam direto para as páginas mapeadas, compartilhadas pelo sistema
+    operacional entre todas as réplicas, e ficam somente leitura.
+    """
+
+    VERSOES_MANTIDAS = 2
+
+    def __init__(self, pasta: Union[str, Path] = None):
+        self._pasta = pasta
+
+    @property
+    def pasta(self) -> Path:
+        return Path(self._pasta or config.PASTA_INSTANTANEOS)
+
+    def caminho(self, versao: int) -> Path:
+        return self.pasta / f"consolidado_{versao}.arrow"
+
+    def publicar(self, df: pd.DataFrame, versao: int, tipos_originais: Dict[str, Any]):
+        """Grava a versão (escreve ao lado e troca com os.replace) e remove as antigas."""
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+        metadados = {**(tabela.schema.metadata or {}),
+                     b'tipos_originais': json.dumps({col: str(tipo) for col, tipo in tipos_originais.items()}).encode()}
+        tabela = tabela.replace_schema_metadata(metadados)
+
+        destino = self.caminho(versao)
+        temporario = destino.with_name(f".{destino.name}.{os.getpid()}.tmp")
+        with pa.OSFile(str(temporario), 'wb') as arquivo:
+            with pa.ipc.new_file(arquivo, tabela.schema) as escritor:
+                escritor.write_table(tabela)
+        os.replace(temporario, destino)
+        self._remover_antigos()
+
+    def mapear(self, versao: int) -> Optional[Tuple[pd.DataFrame, Dict[str, Any]]]:
+        """(frame sobre o arquivo mapeado, dtypes originais), ou None se a versão não foi gravada."""
+        try:
+            tabela = pa.ipc.open_file(pa.memory_map(str(self.caminho(versao)), 'r')).read_all()
+        except FileNotFoundError:
+            return None
+        mapa_tipos = {pa.string(): _DTYPE_TEXTO_ARROW, pa.large_string(): _DTYPE_TEXTO_ARROW}.get if _DTYPE_TEXTO_ARROW else None
+        df = tabela.to_pandas(types_mapper=mapa_tipos, split_blocks=True, date_as_object=False)
+        tipos = json.loads((tabela.schema.metadata or {}).get(b'tipos_originais', b'{}'))
+        return df, tipos
+
+    def _remover_antigos(self):
+        # Processos que ainda mapeiam uma versão removida continuam lendo (unlink não desfaz o mmap)
+        arquivos = sorted(self.pasta.glob('consolidado_*.arrow'), key=lambda p: int(p.stem.split('_')[1]))
+        for antigo in arquivos[:-self.VERSOES_MANTIDAS]:
+            try:
+                antigo.unlink()
+            except OSError:
+                pass
+
+instantaneo_arrow = InstantaneoArrow()
+
+def _usar_instantaneo() -> bool:
+    return config.INSTANTANEO_ARROW and pa is not None
+
+class ProvedorDados:
+    """
+    Consolidado carregado uma vez por processo e compartilhado por todas as páginas.
+
+    A cada pedido compara versao_dados_consolidados() com a versão carregada e
+    só relê (e normaliza os tipos, com COLUNAS_CATEGORICAS em 'category') quando
+    ela muda; troca de página e rerun do Streamlit não fazem mais parse do arquivo. Cada chamada recebe uma cópia
+    rasa: atribuir colunas nela não afeta o frame compartilhado e, com
+    copy-on-write (padrão no pandas 3), nem escritas in-place o alcançam.
+
+    Com um InstantaneoArrow (INSTANTANEO_ARROW ativo) cada versão é carregada
+    uma única vez entre todos os processos e mapeada pelos demais, sem cópia.
+    """
+
+    def __init__(self, carregar=None, instantaneo: Optional[InstantaneoArrow] = None):
+        self._carregar = carregar or carregar_dados_consolidados
+        self._instantaneo = instantaneo
+        self._lock = threading.Lock()
+        self._versao: Optional[int] = None
+        self._df: Optional[pd.DataFrame] = None
+        self._tipos_originais: Dict[str, Any] = {}
+
+    @property
+    def versao(self) -> Optional[int]:
+        """Versão atualmente em memória (None antes da primeira carga)."""
+        return self._versao
+
+    def obter(self, colunas: Optional[List[str]] = None, inicio=None, fim=None) -> pd.DataFrame:
+        """Mesmo contrato de carregar_dados_consolidados, servido da cópia em memória."""
+        df = self._atual()
+        if df.empty:
+            return df.copy(deep=False)
+        if inicio is not None or fim is not None:
+            mascara = pd.Series(True, index=df.index)
+            if inicio is not None:
+                mascara &= df['Data'] >= pd.Timestamp(inicio)
+            if fim is not None:
+                mascara &= df['Data'] <= pd.Timestamp(fim)
+            df = df[mascara].reset_index(drop=True)
+        if colunas is not None:
+            df = df[[col for col in colunas if col in df.columns]]
+        return df.copy(deep=False)
+
+    def invalidar(self):
+        """Descarta a cópia em memória; a próxima chamada relê o consolidado."""
+        with self._lock:
+            self._versao, self._df = None, None
+
+    def relatorio_memoria(self) -> pd.DataFrame:
+        """Bytes por coluna antes e depois da compactação em categorical (índice: coluna)."""
+        df = self._atual()
+        depois = df.memory_usage(deep=True, index=False)
+        antes = pd.Series({
+            coluna: (df[coluna].astype(self._tipos_originais[coluna]).memory_usage(deep=True, index=False)
+                     if coluna in self._tipos_originais else depois[coluna])
+            for coluna in df.columns
+        }, dtype='int64')
+        return pd.DataFrame({
+            'Tipo': df.dtypes.astype(str),
+            'Antes': antes,
+            'Depois': depois,
+        }).rename_axis('Coluna')
+
+    def _atual(self) -> pd.DataFrame:
+        versao = versao_dados_consolidados()
+        with self._lock:
+            if self._df is None or versao != self._versao:
+                self._df, self._tipos_originais = self._carregar_versao(versao)
+                self._versao = versao
+                logger.info(f"Consolidated data loaded: {len(self._df)} rows (version {versao})")
+            return self._df
+
+    def _carregar_versao(self, versao: int) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        instantaneo = self._instantaneo if self._instantaneo is not None and versao and _usar_instantaneo() else None
+        if instantaneo is not None:
+            mapeado = instantaneo.mapear(versao)
+            if mapeado is not None:
+                return mapeado
+
+        df = self._normalizar_tipos(self._carregar())
+        tipos_originais = compactar_categoricas(df)
+        if instantaneo is not None and not df.empty:
+            try:
+                instantaneo.publicar(df, versao, tipos_originais)
+                return instantaneo.mapear(versao) or (df, tipos_originais)
+            except Exception as e:
+                logger.warning(f"Failed to publish the Arrow snapshot: {e}")
+        return df, tipos_originais
+
+    @staticmethod
+    def _normalizar_tipos(df: pd.DataFrame) -> pd.DataFrame:
+        """Coerções feitas antes em cada página: Data em datetime, Valor e confiança numéricos."""
+        if df.empty:
+            return df
+        if 'Data' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['Data']):
+            df['Data'] = pd.to_datetime(df['Data'], errors='coerce')
+        for coluna in ('Valor', 'Confianca_Categoria'):
+            if coluna in df.columns and not pd.api.types.is_numeric_dtype(df[coluna]):
+                df[coluna] = pd.to_numeric(df[coluna], errors='coerce')
+        return df
+
+provedor_dados = ProvedorDados(instantaneo=instantaneo_arrow)
+
+def obter_dados_consolidados(colunas: Optional[List[str]] = None, inicio=None, fim=None) -> pd.DataFrame:
+    """Consolidado do provedor do processo; recarrega só quando uma nova versão é publicada."""
+    return provedor_dados.obter(colunas, inicio, fim)
+
+# --- Consultas SQL (backend opcional) ---
+class BancoTransacoes:
+    """
+    Cópia do consolidado em SQLite, indexada em Data, Categoria, Pagador e Estabelecimento.
+
+    Populado a cada publicação (BANCO_SQL ativo) para que totais e agrupamentos
+    filtrados rodem no banco, sem carregar o histórico inteiro no pandas. Valores
+    ficam também em centavos inteiros, então as somas são exatas. Cada thread
+    mantém uma conexão aberta (sqlite3 não compartilha conexões entre threads),
+    reaberta se o arquivo do banco for substituído.
+    """
+
+    COLUNAS = {
+        'Data': 'TEXT NOT NULL',  # ISO 'AAAA-MM-DD HH:MM:SS': compara como texto
+        'Estabelecimento': 'TEXT',
+        'Valor': 'REAL',
+        'Valor_Centavos': 'INTEGER',  # NULL quando 'Valor' é inválido; fica fora do SUM
+        'Tipo': 'TEXT',
+        'Categoria': 'TEXT',
+        'Pagador': 'TEXT',
+        'Origem': 'TEXT',
+        'Id_Transacao': 'INTEGER',
+    }
+    INDICES = ['Data', 'Categoria', 'Pagador', 'Estabelecimento', 'Id_Transacao']
+    # Agrupamentos aceitos por somar(): nome -> expressão SQL (nada vindo do usuário entra no SQL)
+    AGRUPAMENTOS = {
+        'Categoria': 'Categoria', 'Pagador': 'Pagador', 'Estabelecimento': 'Estabelecimento',
+        'Tipo': 'Tipo', 'Origem': 'Origem',
+        'Ano': 'CAST(substr(Data, 1, 4) AS INTEGER)', 'Mes': 'substr(Data, 1, 7)',
+    }
+
+    def __init__(self, caminho: Union[str, Path] = None):
+        self._caminho = caminho
+        self._local = threading.local()
 
-# Global rate limiter
-rate_limiter = RateLimiter()
+    @property
+    def caminho(self) -> Path:
+        return Path(self._caminho or config.ARQUIVO_BANCO)
 
-# --- Performance Optimizations ---
-class DataCache:
-    """Simple caching system for processed data."""
+    def _conectar(self) -> sqlite3.Connection:
+        """Conexão desta thread com o banco atual (PRAGMAs só na abertura)."""
+        caminho = self.caminho
+        aberta = getattr(self._local, 'conexao', None)
+        try:
+            identidade = (str(caminho), os.stat(caminho).st_ino)
+        except FileNotFoundError:
+            identidade = None
+        if aberta is not None and aberta[0] == identidade:
+            return aberta[1]
+        if aberta is not None:
+            aberta[1].close()
 
-    def __init__(self, cache_dir: str = None):
-        self.cache_dir = cache_dir or config.PASTA_CACHE
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        conexao = sqlite3.connect(str(caminho), isolation_level=None)
+        conexao.execute('PRAGMA journal_mode=WAL')
+        self._local.conexao = ((str(caminho), os.stat(caminho).st_ino), conexao)
+        return conexao
 
-    def _get_cache_key(self, data: Any) -> str:
-        """Generate cache key from data."""
-        if isinstance(data, str):
-            return hashlib.md5(data.encode()).hexdigest()
-        return hashlib.md5(str(data).encode()).hexdigest()
+    def fechar(self):
+        """Fecha a conexão desta thread (as das outras threads fecham com elas)."""
+        aberta = getattr(self._local, 'conexao', None)
+        if aberta is not None:
+            aberta[1].close()
+            self._local.conexao = None
 
-    def get(self, key: str) -> Optional[Any]:
-        """Get cached data."""
-        if not config.CACHE_ENABLED:
-            return None
+    def populado(self) -> bool:
+        if not self.caminho.exists():
+            return False
+        conexao = self._conectar()
+        return conexao.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transacoes'"
+        ).fetchone() is not None
 
-        cache_file = self.cache_dir / f"{key}.pkl"
-        if cache_file.exists():
-            try:
-                with open(cache_file, 'rb') as f:
-                    return pickle.load(f)
-            except Exception as e:
-                logger.warning(f"Failed to load cache {key}: {e}")
-        return None
+    def _linhas(self, df: pd.DataFrame) -> Iterator[tuple]:
+        """Linhas de `df` no formato de COLUNAS (datas ISO, centavos, None nos nulos)."""
+        centavos, invalidos = parse_brl_centavos(df['Valor'])
+        centavos = pd.array(centavos, dtype='Int64')
+        centavos[invalidos] = pd.NA  # NULL: fora do SUM, como o NaN no pandas, em vez de um 0 fantasma
+        tabela = pd.DataFrame({
+            'Data': pd.to_datetime(df['Data']).dt.strftime('%Y-%m-%d %H:%M:%S'),
+            'Valor_Centavos': centavos,
+        })
+        for coluna in self.COLUNAS:
+            if coluna not in tabela.columns:
+                tabela[coluna] = df[coluna].to_numpy() if coluna in df.columns else None
+        tabela = tabela[list(self.COLUNAS)].dropna(subset=['Data'])
+        return tabela.astype(object).where(tabela.notna(), None).itertuples(index=False, name=None)
 
-    def set(self, key: str, data: Any):
-        """Set cached data."""
-        if not config.CACHE_ENABLED:
-            return
+    def _inserir(self, conexao: sqlite3.Connection, tabela: str, df: pd.DataFrame):
+        conexao.executemany(
+            f"INSERT INTO {tabela} ({', '.join(self.COLUNAS)}) VALUES ({', '.join('?' * len(self.COLUNAS))})",
+            self._linhas(df)
+        )
 
-        cache_file = self.cache_dir / f"{key}.pkl"
+    def publicar(self, df: pd.DataFrame):
+        """Substitui o conteúdo em uma única transação: leitores veem a versão antiga ou a nova."""
+        conexao = self._conectar()
+        conexao.execute('BEGIN')
         try:
-            with open(cache_file, 'wb') as f:
-                pickle.dump(data, f)
-        except Exception as e:
-            logger.warning(f"Failed to save cache {key}: {e}")
+            conexao.execute('DROP TABLE IF EXISTS transacoes_nova')
+            conexao.execute(f"CREATE TABLE transacoes_nova ({', '.join(f'{c} {t}' for c, t in self.COLUNAS.items())})")
+            self._inserir(conexao, 'transacoes_nova', df)
+            conexao.execute('DROP TABLE IF EXISTS transacoes')
+            conexao.execute('ALTER TABLE transacoes_nova RENAME TO transacoes')
+            for coluna in self.INDICES:
+                conexao.execute(f"CREATE INDEX idx_transacoes_{coluna.lower()} ON transacoes ({coluna})")
+            conexao.execute('COMMIT')
+        except Exception:
+            conexao.execute('ROLLBACK')
+            raise
 
-# Global cache instance
-data_cache = DataCache()
+    def atualizar(self, df: pd.DataFrame):
+        """Substitui (ou insere) só as transações de `df`, pelo Id_Transacao, em uma transação."""
+        ids = [(int(id_transacao),) for id_transacao in df['Id_Transacao']]
+        conexao = self._conectar()
+        conexao.execute('BEGIN')
+        try:
+            conexao.executemany('DELETE FROM transacoes WHERE Id_Transacao = ?', ids)
+            self._inserir(conexao, 'transacoes', df)
+            conexao.execute('COMMIT')
+        except Exception:
+            conexao.execute('ROLLBACK')
+            raise
 
-def cached_function(func):
-    """Decorator for caching function results."""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        if not config.CACHE_ENABLED:
-            return func(*args, **kwargs)
+    @staticmethod
+    def _filtro(inicio=None, fim=None, tipo: Optional[str] = None) -> Tuple[str, list]:
+        condicoes, parametros = [], []
+        if inicio is not None:
+            condicoes.append('Data >= ?')
+            parametros.append(pd.Timestamp(inicio).strftime('%Y-%m-%d %H:%M:%S'))
+        if fim is not None:
+            condicoes.append('Data <= ?')
+            parametros.append(pd.Timestamp(fim).strftime('%Y-%m-%d %H:%M:%S'))
+        if tipo is not None:
+            condicoes.append('Tipo = ?')
+            parametros.append(tipo)
+        return (f"WHERE {' AND '.join(condicoes)}" if condicoes else ''), parametros
 
-        # Create cache key from function name and arguments
-        cache_key = f"{func.__name__}_{hash(str(args) + str(sorted(kwargs.items())))}"
+    def periodos(self) -> Dict[int, List[int]]:
+        """{ano: [meses]} com transações, lido só do índice de Data."""
+        conexao = self._conectar()
+        linhas = conexao.execute(
+            'SELECT DISTINCT CAST(substr(Data, 1, 4) AS INTEGER), CAST(substr(Data, 6, 2) AS INTEGER) '
+            'FROM transacoes ORDER BY 1, 2'
+        ).fetchall()
+        periodos: Dict[int, List[int]] = {}
+        for ano, mes in linhas:
+            periodos.setdefault(ano, []).append(mes)
+        return periodos
 
-        # Try to get from cache
-        cached_result = data_cache.get(cache_key)
-        if cached_result is not None:
-            return cached_result
+    def contar(self, inicio=None, fim=None, tipo: Optional[str] = None) -> int:
+        where, parametros = self._filtro(inicio, fim, tipo)
+        conexao = self._conectar()
+        return conexao.execute(f'SELECT COUNT(*) FROM transacoes {where}', parametros).fetchone()[0]
 
-        # Execute function and cache result
-        result = func(*args, **kwargs)
-        data_cache.set(cache_key, result)
-        return result
-    return wrapper
+    def somar(self, por=None, inicio=None, fim=None, tipo: Optional[str] = None):
+        """Soma de Valor em reais, total (float) ou por uma ou mais colunas de AGRUPAMENTOS (Series 'Valor')."""
+        where, parametros = self._filtro(inicio, fim, tipo)
+        if por is None:
+            conexao = self._conectar()
+            total = conexao.execute(f'SELECT SUM(Valor_Centavos) FROM transacoes {where}', parametros).fetchone()[0]
+            return (total or 0) / 100
 
-# --- Funções de Manipulação de JSON ---
-def carregar_json(caminho_arquivo: str) -> dict:
-    if not os.path.exists(caminho_arquivo): return {}
-    try:
-        with open(caminho_arquivo, 'r', encoding='utf-8') as f: return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError): return {}
+        por = [por] if isinstance(por, str) else list(por)
+        invalidas = [coluna for coluna in por if coluna not in self.AGRUPAMENTOS]
+        if invalidas:
+            raise ValueError(f"Unsupported grouping columns: {invalidas}")
+        expressoes = ', '.join(self.AGRUPAMENTOS[coluna] for coluna in por)
+        # Grupos nulos ficam de fora, como no groupby do pandas (somar_valores)
+        nao_nulos = ' AND '.join(f'{self.AGRUPAMENTOS[coluna]} IS NOT NULL' for coluna in por)
+        where = f'{where} AND {nao_nulos}' if where else f'WHERE {nao_nulos}'
+        conexao = self._conectar()
+        df = pd.read_sql_query(
+            f'SELECT {expressoes}, SUM(Valor_Centavos) FROM transacoes {where} GROUP BY {expressoes}',
+            conexao, params=parametros
+        )
+        df.columns = por + ['Valor']
+        return (df.set_index(por)['Valor'] / 100).rename('Valor')
 
-def salvar_json(caminho_arquivo: str, dados: dict):
-    os.makedirs(os.path.dirname(caminho_arquivo), exist_ok=True)
-    with open(caminho_arquivo, 'w', encoding='utf-8') as f: json.dump(dados, f, indent=4, ensure_ascii=False)
+banco_transacoes = BancoTransacoes()
 
-def atualizar_contexto_pagador(estabelecimento: str, pagador: str):
-    contexto = carregar_json(str(config.ARQUIVO_CONTEXTO))
-    if estabelecimento in contexto: contexto[estabelecimento]['pagador'] = pagador
-    else: contexto[estabelecimento] = {"pagador": pagador, "categoria": "Não Definida"}
-    salvar_json(str(config.ARQUIVO_CONTEXTO), contexto)
+def _usar_banco() -> bool:
+    return config.BANCO_SQL and banco_transacoes.populado()
+
+def consultar_periodos() -> Dict[int, List[int]]:
+    """{ano: [meses]} com transações publicadas."""
+    if _usar_banco():
+        return banco_transacoes.periodos()
+    df = obter_dados_consolidados(['Data'])
+    if df.empty:
+        return {}
+    datas = df['Data'].dropna()
+    pares = pd.DataFrame({'ano': datas.dt.year, 'mes': datas.dt.month}).drop_duplicates().sort_values(['ano', 'mes'])
+    return {int(ano): grupo['mes'].astype(int).tolist() for ano, grupo in pares.groupby('ano')}
+
+def _recorte_para_consulta(por, inicio, fim, tipo) -> pd.DataFrame:
+    """Frame mínimo para as consultas sem banco: só as colunas e o período necessários, do provedor."""
+    colunas = ['Data', 'Tipo', 'Valor', COLUNA_CENTAVOS] + [c for c in por if c not in ('Ano', 'Mes')]
+    df = obter_dados_consolidados(colunas, inicio, fim)
+    if tipo is not None and not df.empty:
+        df = df[df['Tipo'] == tipo]
+    if 'Ano' in por:
+        df = df.assign(Ano=df['Data'].dt.year)
+    if 'Mes' in por:
+        df = df.assign(Mes=df['Data'].dt.strftime('%Y-%m'))
+    return df
+
+def contar_transacoes(inicio=None, fim=None, tipo: Optional[str] = None) -> int:
+    """Quantidade de transações no período (e tipo) informado."""
+    if _usar_banco():
+        return banco_transacoes.contar(inicio, fim, tipo)
+    return len(_recorte_para_consulta([], inicio, fim, tipo))
+
+def somar_por(por=None, inicio=None, fim=None, tipo: Optional[str] = None):
+    """
+    Total de Valor (reais) no período, ou agrupado por `por` ('Categoria', 'Pagador',
+    'Estabelecimento', 'Tipo', 'Origem', 'Ano', 'Mes').
+
+    Com BANCO_SQL roda no SQLite; sem ele, recorta colunas e período do
+    consolidado em memória (provedor_dados) e agrega com somar_valores.
+    """
+    if _usar_banco():
+        return banco_transacoes.somar(por, inicio, fim, tipo)
+    lista = [] if por is None else ([por] if isinstance(por, str) else list(por))
+    df = _recorte_para_consulta(lista, inicio, fim, tipo)
+    if df.empty:
+        return 0.0 if por is None else pd.Series(dtype=float, name='Valor')
+    return somar_valores(df, por if por is None or isinstance(por, str) else lista)
 
 # --- Funções de processamento específicas para cada tipo de extrato ---
+def _processar_extrato(caminho_arquivo: str, tipo: str) -> pd.DataFrame:
+    """Valida o caminho e o tamanho, detecta o formato e lê o extrato já padronizado."""
+    if not SecurityConfig.validate_file_path(caminho_arquivo):
+        raise ValueError("Invalid file path")
+        
+    # Check file size
+    file_size = os.path.getsize(caminho_arquivo)
+    if file_size > config.MAX_FILE_SIZE:
+        raise ValueError(f"File too large: {file_size} bytes (max: {config.MAX_FILE_SIZE})")
+    
+    leitura = detectar_leitura(caminho_arquivo, tipo)
+    return leitura.normalizar(leitura.ler(caminho_arquivo))
+
 def processar_extrato_credito(caminho_arquivo: str) -> pd.DataFrame:
     """Lê e padroniza um arquivo de extrato de CRÉDITO."""
     try:
-        if not SecurityConfig.validate_file_path(caminho_arquivo):
-            raise ValueError("Invalid file path")
-            
-        # Check file size
-        file_size = os.path.getsize(caminho_arquivo)
-        if file_size > config.MAX_FILE_SIZE:
-            raise ValueError(f"File too large: {file_size} bytes (max: {config.MAX_FILE_SIZE})")
-            
-        df = pd.read_csv(caminho_arquivo, sep=';', encoding='utf-8', dayfirst=True, skipinitialspace=True)
-        df = df.rename(columns=lambda col: col.strip())
-        
-        mapeamento = {
-            'Data movimento': 'Data',
-            'Nome do fornecedor/cliente': 'Estabelecimento',
-            'Valor (R$)': 'Valor'
-        }
-        df = df.rename(columns=mapeamento)
-
-        if 'Valor' in df.columns:
-            df['Valor'] = (df['Valor'].astype(str)
-                           .str.replace('R$', '', regex=False).str.replace('.', '', regex=False)
-                           .str.strip().str.replace(',', '.', regex=False))
-            
-            # Better error handling for numeric conversion
-            df['Valor'] = pd.to_numeric(df['Valor'], errors='coerce')
-            invalid_values = df['Valor'].isna().sum()
-            if invalid_values > 0:
-                logger.warning(f"Found {invalid_values} invalid values in 'Valor' column")
-            
-            # --- LÓGICA PARA CRÉDITO ---
-            # No crédito, todas as transações são despesas e vêm com valor positivo.
-            # Convertemos para negativo para padronizar.
-            df['Valor'] = -abs(df['Valor'])
-        
-        df['Tipo'] = 'Despesa'
-        df['Data'] = pd.to_datetime(df['Data'], errors='coerce', dayfirst=True)
-            
-        # Validate required columns
-        required_cols = ['Data', 'Estabelecimento', 'Valor', 'Tipo']
-        missing_cols = [col for col in required_cols if col not in df.columns]
-        if missing_cols:
-            raise ValueError(f"Missing required columns: {missing_cols}")
-            
-        return df[required_cols]
-        
+        # No crédito, todas as transações são despesas (regra de sinal 'despesa' do formato)
+        return _processar_extrato(caminho_arquivo, 'credito')
     except Exception as e:
         logger.error(f"Error processing credit file {caminho_arquivo}: {str(e)}")
         raise
@@ -229,82 +2225,47 @@ def processar_extrato_credito(caminho_arquivo: str) -> pd.DataFrame:
 def processar_extrato_debito(caminho_arquivo: str) -> pd.DataFrame:
     """Lê e padroniza um arquivo de extrato de DÉBITO."""
     try:
-        if not SecurityConfig.validate_file_path(caminho_arquivo):
-            raise ValueError("Invalid file path")
-            
-        # Check file size
-        file_size = os.path.getsize(caminho_arquivo)
-        if file_size > config.MAX_FILE_SIZE:
-            raise ValueError(f"File too large: {file_size} bytes (max: {config.MAX_FILE_SIZE})")
-            
-        df = pd.read_csv(caminho_arquivo, sep=';', encoding='utf-8', dayfirst=True, skipinitialspace=True)
-        df = df.rename(columns=lambda col: col.strip())
-        
-        mapeamento = {
-            'Data': 'Data',
-            'Descricao': 'Estabelecimento',
-            'Valor': 'Valor' 
-        }
-        df = df.rename(columns=mapeamento)
-
-        if 'Data' in df.columns:
-            df['Data'] = df['Data'].astype(str).str.split(' às').str[0]
-            df['Data'] = pd.to_datetime(df['Data'], errors='coerce', dayfirst=True)
-
-        if 'Valor' in df.columns:
-            df['Valor'] = (df['Valor'].astype(str)
-                           .str.replace('R$', '', regex=False).str.replace('.', '', regex=False)
-                           .str.strip().str.replace(',', '.', regex=False))
-            df['Valor'] = pd.to_numeric(df['Valor'], errors='coerce')
-
-        # --- LÓGICA PARA DÉBITO ---
-        # No débito, o sinal do valor já indica se é entrada ou saída.
-        # Criamos a coluna 'Tipo' com base nesse sinal.
-        df['Tipo'] = np.where(df['Valor'] >= 0, 'Receita', 'Despesa')
-
-        required_cols = ['Data', 'Estabelecimento', 'Valor', 'Tipo']
-        missing_cols = [col for col in required_cols if col not in df.columns]
-        if missing_cols:
-            raise ValueError(f"Missing required columns: {missing_cols}")
-            
-        return df[required_cols].dropna()
-        
+        # No débito, o sinal do valor indica se é entrada ou saída (regra de sinal 'sinal')
+        return _processar_extrato(caminho_arquivo, 'debito')
     except Exception as e:
         logger.error(f"Error processing debit file {caminho_arquivo}: {str(e)}")
         raise
 
+def _carregar_extrato_bruto(tarefa: Tuple[str, str]) -> Optional[pd.DataFrame]:
+    """Lê um extrato para carregar_dados_brutos; executado também em processos filhos."""
+    arquivo, tipo = tarefa
+    try:
+        logger.info(f"Processando {'crédito' if tipo == 'credito' else 'débito'}: {os.path.basename(arquivo)}")
+        if tipo == 'credito':
+            df = processar_extrato_credito(arquivo)
+        else:
+            df = processar_extrato_debito(arquivo)
+        return identificar_transacoes(df, tipo) if not df.empty else df
+    except Exception as e:
+        logger.error(f"Erro ao processar '{os.path.basename(arquivo)}': {e}")
+        return None
+
 def carregar_dados_brutos() -> pd.DataFrame | None:
     """Carrega e consolida dados de múltiplas fontes (crédito e débito)."""
-    lista_dataframes = []
-    
     try:
         config.PASTA_CREDITO.mkdir(parents=True, exist_ok=True)
-        for arquivo in glob.glob(str(config.PASTA_CREDITO / "*.csv")):
-            try:
-                logger.info(f"Processando crédito: {os.path.basename(arquivo)}")
-                df_credito = processar_extrato_credito(arquivo)
-                if not df_credito.empty:
-                    lista_dataframes.append(df_credito)
-            except Exception as e:
-                logger.error(f"Erro ao processar '{os.path.basename(arquivo)}': {e}")
-                continue
-
         config.PASTA_DEBITO.mkdir(parents=True, exist_ok=True)
-        for arquivo in glob.glob(str(config.PASTA_DEBITO / "*.csv")):
-            try:
-                logger.info(f"Processando débito: {os.path.basename(arquivo)}")
-                df_debito = processar_extrato_debito(arquivo)
-                if not df_debito.empty:
-                    lista_dataframes.append(df_debito)
-            except Exception as e:
-                logger.error(f"Erro ao processar '{os.path.basename(arquivo)}': {e}")
-                continue
+        tarefas = [(arquivo, 'credito') for arquivo in sorted(glob.glob(str(config.PASTA_CREDITO / "*.csv")))]
+        tarefas += [(arquivo, 'debito') for arquivo in sorted(glob.glob(str(config.PASTA_DEBITO / "*.csv")))]
+
+        lista_dataframes = [
+            df for df in _mapear_em_paralelo(_carregar_extrato_bruto, tarefas)
+            if df is not None and not df.empty
+        ]
 
         if not lista_dataframes:
             logger.warning("No valid data files found")
             return None
 
         df_completo = pd.concat(lista_dataframes, ignore_index=True).dropna(subset=['Data', 'Valor'])
+        # Mesmos ids e marcação de duplicatas da ingestão, para que o assistente publique só o que mudou
+        df_completo = df_completo[~df_completo['Id_Transacao'].duplicated()]
+        df_completo = df_completo.assign(Possivel_Duplicata=marcar_possiveis_duplicatas(df_completo))
         
         estabelecimentos_a_ignorar = ['pagamento de fatura', 'pagamentos validos normais']
         if 'Estabelecimento' in df_completo.columns:
@@ -442,9 +2403,17 @@ def aplicar_regras_contexto(df: pd.DataFrame, contexto: dict) -> pd.DataFrame:
     
     return df_copy
 
-@cached_function
+@cached_function(depende_de=lambda: [
+    config.PASTA_CREDITO, config.PASTA_DEBITO,
+    config.ARQUIVO_CONTEXTO, config.ARQUIVO_CATEGORIAS_CUSTOMIZADAS
+])
 def processar_faturas() -> pd.DataFrame:
     """Processa todas as faturas usando o sistema avançado de processamento."""
+    # Ingestão e publicação sob a trava do manifesto: o monitor de pastas e as páginas não se sobrepõem
+    with data_processor.manifest.locked():
+        return _processar_faturas()
+
+def _processar_faturas() -> pd.DataFrame:
     try:
         # Use the new data processor
         df_completo, validation_results = data_processor.process_all_files()
@@ -472,8 +2441,7 @@ def processar_faturas() -> pd.DataFrame:
         df_completo = aplicar_regras_contexto(df_completo, contexto)
         
         # Salvar dados consolidados
-        config.PASTA_PROCESSADOS.mkdir(parents=True, exist_ok=True)
-        df_completo.to_csv(str(config.ARQUIVO_CONSOLIDADO), index=False, sep=';', encoding='utf-8')
+        salvar_dados_consolidados(df_completo)
         
         return df_completo
         
@@ -483,34 +2451,22 @@ def processar_faturas() -> pd.DataFrame:
 
 def obter_periodos_disponiveis() -> dict:
     """
-    Obtém os períodos disponíveis nos dados processados.
-    Retorna um dicionário com anos e meses disponíveis.
+    Obtém os períodos disponíveis nos dados processados, a partir do catálogo de períodos.
+    Retorna um dicionário com anos e meses disponíveis e o resumo de cada (ano, mês).
     """
     try:
-        if config.ARQUIVO_CONSOLIDADO.exists():
-            df = pd.read_csv(config.ARQUIVO_CONSOLIDADO, sep=';', parse_dates=['Data'])
-            if df.empty:
-                return {"anos": [], "meses_por_ano": {}}
-            
-            # Obter anos únicos
-            anos = sorted(df['Data'].dt.year.unique())
-            
-            # Obter meses por ano
-            meses_por_ano = {}
-            for ano in anos:
-                dados_ano = df[df['Data'].dt.year == ano]
-                meses = sorted(dados_ano['Data'].dt.month.unique())
-                meses_por_ano[ano] = meses
-            
-            return {
-                "anos": anos,
-                "meses_por_ano": meses_por_ano
-            }
-        else:
-            return {"anos": [], "meses_por_ano": {}}
+        periodos = catalogo_periodos()
+        meses_por_ano: Dict[int, List[int]] = {}
+        for periodo in periodos:
+            meses_por_ano.setdefault(periodo['ano'], []).append(periodo['mes'])
+        return {
+            "anos": sorted(meses_por_ano),
+            "meses_por_ano": {ano: sorted(meses) for ano, meses in meses_por_ano.items()},
+            "resumo": {(periodo['ano'], periodo['mes']): periodo for periodo in periodos}
+        }
     except Exception as e:
         logger.error(f"Erro ao obter períodos disponíveis: {e}")
-        return {"anos": [], "meses_por_ano": {}}
+        return {"anos": [], "meses_por_ano": {}, "resumo": {}}
 
 def criar_graficos(df: pd.DataFrame):
     if df.empty: return go.Figure(), go.Figure()
@@ -519,12 +2475,12 @@ def criar_graficos(df: pd.DataFrame):
     
     if df_despesas.empty: return go.Figure(), go.Figure()
 
-    gastos_categoria = df_despesas.groupby('Categoria')['Valor'].sum().abs().sort_values(ascending=False).reset_index()
+    gastos_categoria = somar_valores(df_despesas, 'Categoria').abs().sort_values(ascending=False).reset_index()
     fig_coluna = px.bar(gastos_categoria, x='Categoria', y='Valor', title='Gastos por Categoria', labels={'Valor': 'Total Gasto (R$)', 'Categoria': 'Categoria'}, text_auto='.2s')
     fig_coluna.update_layout(title_x=0.5, xaxis_title=None)
     
     df_despesas['Mes'] = df_despesas['Data'].dt.to_period('M').astype(str)
-    gastos_mensais = df_despesas.groupby('Mes')['Valor'].sum().abs().reset_index()
+    gastos_mensais = somar_valores(df_despesas, 'Mes').abs().reset_index()
     fig_linha = px.line(gastos_mensais, x='Mes', y='Valor', title='Evolução dos Gastos Mensais', labels={'Valor': 'Total Gasto (R$)', 'Mes': 'Mês'}, markers=True)
     fig_linha.update_layout(title_x=0.5, xaxis_title=None)
     
@@ -553,7 +2509,10 @@ def criar_agente(dfs: list):
     
     # Return cached agent if available
     if cache_key in _agent_cache:
+        cache_metrics.record('agent_cache', 'hits')
         return _agent_cache[cache_key]
+    cache_metrics.record('agent_cache', 'misses')
+    inicio_criacao = time.perf_counter()
     
     load_dotenv(config.PROJECT_ROOT / ".env")
     
@@ -630,6 +2589,8 @@ def criar_agente(dfs: list):
     
     # Cache the agent
     _agent_cache[cache_key] = agent
+    cache_metrics.observe('agent_cache', 'compute', time.perf_counter() - inicio_criacao)
+    cache_metrics.set_gauge('agent_cache', 'entries', len(_agent_cache))
     return agent
 
 def chatbot_financeiro(dfs: list, user_input: str):
@@ -662,19 +2623,30 @@ class PDF(FPDF):
     def header(self): self.set_font('DejaVu', 'B', 12); self.cell(0, 10, f'Relatório Financeiro, {self.periodo}', 0, 1, 'C'); self.ln(5)
     def footer(self): self.set_y(-20); self.set_font('DejaVu', 'I', 8); self.cell(0, 10, 'Provenzano, Analista Financeiro EPR', 0, 0, 'C'); self.set_y(-15); self.set_font('DejaVu', 'I', 8); self.cell(0, 10, f'Página {self.page_no()}', 0, 0, 'C')
 
-def gerar_relatorio_pdf(df_completo: pd.DataFrame, ano: int, mes: int) -> str:
+def gerar_relatorio_pdf(df_completo: Optional[pd.DataFrame], ano: int, mes: int) -> str:
+    """Gera o relatório do mês; com df_completo=None os totais vêm da camada de consultas (somar_por)."""
     data_relatorio = datetime(ano, mes, 1)
-    df_mes_atual = df_completo[(df_completo['Data'].dt.year == ano) & (df_completo['Data'].dt.month == mes)].copy()
-    if df_mes_atual.empty: return None
+    if df_completo is None:
+        inicio, fim = intervalo_do_mes(ano, mes)
+        if contar_transacoes(inicio, fim) == 0: return None
+        
+        gasto_total = somar_por(None, inicio, fim, tipo='Despesa')
+        receita_total = somar_por(None, inicio, fim, tipo='Receita')
+        
+        top_5_categorias = somar_por('Categoria', inicio, fim, tipo='Despesa').sort_values().head(5)
+        gastos_por_pagador = somar_por('Pagador', inicio, fim, tipo='Despesa').sort_values()
+    else:
+        df_mes_atual = df_completo[(df_completo['Data'].dt.year == ano) & (df_completo['Data'].dt.month == mes)].copy()
+        if df_mes_atual.empty: return None
 
-    df_despesas_mes = df_mes_atual[df_mes_atual['Tipo'] == 'Despesa']
-    df_receitas_mes = df_mes_atual[df_mes_atual['Tipo'] == 'Receita']
-    
-    gasto_total = df_despesas_mes['Valor'].sum()
-    receita_total = df_receitas_mes['Valor'].sum()
-    
-    top_5_categorias = df_despesas_mes.groupby('Categoria')['Valor'].sum().sort_values().head(5)
-    gastos_por_pagador = df_despesas_mes.groupby('Pagador')['Valor'].sum().sort_values()
+        df_despesas_mes = df_mes_atual[df_mes_atual['Tipo'] == 'Despesa']
+        df_receitas_mes = df_mes_atual[df_mes_atual['Tipo'] == 'Receita']
+        
+        gasto_total = somar_valores(df_despesas_mes)
+        receita_total = somar_valores(df_receitas_mes)
+        
+        top_5_categorias = somar_valores(df_despesas_mes, 'Categoria').sort_values().head(5)
+        gastos_por_pagador = somar_valores(df_despesas_mes, 'Pagador').sort_values()
 
     nome_arquivo_pizza, nome_arquivo_pagador = None, None
     if not top_5_categorias.empty:
@@ -749,7 +2721,7 @@ def prever_gastos(df_historico: pd.DataFrame, meses_a_frente: int = 6):
 
     # Preparar dados com tratamento robusto de outliers
     df['Data'] = pd.to_datetime(df['Data'])
-    gastos_mensais = df.set_index('Data').resample('M')['Valor'].sum().abs().reset_index()
+    gastos_mensais = somar_valores(df, pd.Grouper(key='Data', freq='M')).abs().reset_index()
     gastos_mensais = gastos_mensais.rename(columns={'Data': 'Mes', 'Valor': 'Gasto_Total'})
     
     if len(gastos_mensais) < 4:
@@ -1038,7 +3010,7 @@ def analisar_padroes_avancados(df_historico: pd.DataFrame) -> dict:
         return {}
     
     df['Data'] = pd.to_datetime(df['Data'])
-    gastos_mensais = df.set_index('Data').resample('M')['Valor'].sum().abs().reset_index()
+    gastos_mensais = somar_valores(df, pd.Grouper(key='Data', freq='M')).abs().reset_index()
     
     # Padrões temporais
     padroes = {
@@ -1121,7 +3093,7 @@ def analisar_padroes_avancados(df_historico: pd.DataFrame) -> dict:
     
     # Análise por categorias
     if 'Categoria' in df.columns:
-        gastos_categoria = df.groupby('Categoria')['Valor'].sum().abs()
+        gastos_categoria = somar_valores(df, 'Categoria').abs()
         categorias_principais = gastos_categoria.nlargest(5)
         
         padroes['categorias'] = {
@@ -1144,6 +3116,17 @@ class DataValidationResult:
     processed_rows: int
     invalid_rows: int
 
+    @classmethod
+    def combine(cls, results: List['DataValidationResult']) -> 'DataValidationResult':
+        """Merge per-chunk results of the same file into one."""
+        return cls(
+            is_valid=all(r.is_valid for r in results),
+            errors=[e for r in results for e in r.errors],
+            warnings=[w for r in results for w in r.warnings],
+            processed_rows=sum(r.processed_rows for r in results),
+            invalid_rows=sum(r.invalid_rows for r in results)
+        )
+
 class DataValidator:
     """Advanced data validation system."""
     
@@ -1154,8 +3137,12 @@ class DataValidator:
         self.min_date = datetime(2020, 1, 1)
         self.max_date = datetime.now() + timedelta(days=30)
     
-    def validate_dataframe(self, df: pd.DataFrame, source: str) -> DataValidationResult:
-        """Comprehensive dataframe validation."""
+    def validate_dataframe(self, df: pd.DataFrame, source: str, seen_rows: Optional[set] = None) -> DataValidationResult:
+        """Comprehensive dataframe validation.
+
+        When validating a file chunk by chunk, pass the same `seen_rows` set for
+        every chunk: duplicates are then counted against the earlier chunks too.
+        """
         errors = []
         warnings = []
         processed_rows = len(df)
@@ -1195,7 +3182,7 @@ class DataValidator:
                 errors.append(f"Invalid types found: {invalid_types['Tipo'].unique().tolist()}")
         
         # Check for duplicates
-        duplicates = df.duplicated().sum()
+        duplicates = self._count_duplicates(df, seen_rows)
         if duplicates > 0:
             warnings.append(f"{duplicates} duplicate rows found")
         
@@ -1212,6 +3199,18 @@ class DataValidator:
             invalid_rows=invalid_rows
         )
     
+    @staticmethod
+    def _count_duplicates(df: pd.DataFrame, seen_rows: Optional[set] = None) -> int:
+        subset = colunas_de_duplicidade(df)
+        if seen_rows is None:
+            return int(df.duplicated(subset=subset).sum())
+        # Row hashes of the earlier chunks; 8 bytes per row instead of the rows themselves
+        hashes = pd.util.hash_pandas_object(df[subset], index=False).to_numpy().tolist()
+        seen_before = np.fromiter((h in seen_rows for h in hashes), dtype=bool, count=len(hashes))
+        repeated = seen_before | pd.Series(hashes).duplicated().to_numpy()
+        seen_rows.update(hashes)
+        return int(repeated.sum())
+
     def _detect_suspicious_patterns(self, df: pd.DataFrame) -> List[str]:
         """Detect suspicious patterns in data."""
         patterns = []
@@ -1405,6 +3404,265 @@ class AdvancedCategorizer:
         
         return sorted(suggestions, key=lambda x: x[1], reverse=True)
 
+# --- Identidade de transações ---
+def _normalizar_estabelecimentos(serie: pd.Series) -> pd.Series:
+    """Caixa e espaços não distinguem estabelecimentos ('PADARIA  X' == 'padaria x')."""
+    return serie.astype(str).str.casefold().str.split().str.join(' ')
+
+def chaves_de_transacao(df: pd.DataFrame, origem: str) -> np.ndarray:
+    """
+    Hash (uint64) de (data, estabelecimento normalizado, centavos, origem) de cada linha.
+
+    A origem é a conta do extrato (crédito/débito): o mesmo valor no mesmo dia e
+    estabelecimento em contas diferentes são transações diferentes.
+    """
+    centavos = df[COLUNA_CENTAVOS] if COLUNA_CENTAVOS in df.columns else parse_brl_centavos(df['Valor'])[0]
+    normalizado = pd.DataFrame({
+        'data': pd.to_datetime(df['Data']).dt.normalize().to_numpy(),
+        'estabelecimento': _normalizar_estabelecimentos(df['Estabelecimento']).to_numpy(),
+        'centavos': pd.Series(centavos).fillna(0).to_numpy(dtype=np.int64),
+        'origem': origem
+    })
+    return pd.util.hash_pandas_object(normalizado, index=False).to_numpy()
+
+def identificar_transacoes(df: pd.DataFrame, origem: str) -> pd.DataFrame:
+    """
+    Acrescenta 'Origem' e 'Id_Transacao' a um extrato.
+
+    O id combina a chave da transação com a ordem da sua ocorrência no arquivo:
+    duas compras iguais no mesmo dia de um mesmo extrato são a 1ª e a 2ª
+    ocorrência, e um segundo extrato que repete esse período gera os mesmos ids.
+    """
+    chaves = pd.Series(chaves_de_transacao(df, origem))
+    ocorrencia = chaves.groupby(chaves, sort=False).cumcount().to_numpy(dtype=np.uint64)
+    ids = pd.util.hash_pandas_object(pd.DataFrame({'chave': chaves.to_numpy(), 'ocorrencia': ocorrencia}), index=False)
+    return df.assign(Origem=origem, Id_Transacao=ids.to_numpy().view(np.int64))
+
+def marcar_possiveis_duplicatas(df: pd.DataFrame, tolerancia_dias: int = 1) -> pd.Series:
+    """
+    Sinaliza transações de ids diferentes com mesmo estabelecimento, valor e origem
+    a no máximo `tolerancia_dias` de distância, para revisão manual.
+    """
+    if df.empty:
+        return pd.Series(False, index=df.index)
+    centavos = df[COLUNA_CENTAVOS].fillna(0) if COLUNA_CENTAVOS in df.columns else pd.Series(parse_brl_centavos(df['Valor'])[0], index=df.index)
+    grupo = pd.DataFrame({
+        'estabelecimento': _normalizar_estabelecimentos(df['Estabelecimento']),
+        'centavos': centavos,
+        'origem': df['Origem'] if 'Origem' in df.columns else '',
+        'data': pd.to_datetime(df['Data']).dt.normalize()
+    }).sort_values(['estabelecimento', 'centavos', 'origem', 'data'])
+
+    mesmo_grupo = grupo[['estabelecimento', 'centavos', 'origem']].eq(grupo[['estabelecimento', 'centavos', 'origem']].shift()).all(axis=1)
+    perto = mesmo_grupo & (grupo['data'].diff() <= pd.Timedelta(days=tolerancia_dias))
+    marcadas = perto | perto.shift(-1, fill_value=False)
+    return marcadas.reindex(df.index)
+
+class IngestionManifest:
+    """Persisted record of already ingested statement files.
+
+    Entries are keyed by path and carry the file's size, mtime and content
+    hash plus the parsed, validated and categorized frame (an Arrow IPC file
+    beside the index), so unchanged files are merged back without being
+    processed again. Without pyarrow no frames are kept and every file is
+    processed.
+
+    Reading and updating the entries happens under `locked()`, which
+    serializes ingestion runs between threads (the folder watcher and the
+    pages) and, with fcntl, between processes.
+    """
+
+    # Bump whenever the per-file pipeline output changes shape or meaning
+    VERSION = 4
+
+    def __init__(self, manifest_dir: Path = None):
+        self.manifest_dir = Path(manifest_dir or config.PASTA_MANIFESTO)
+        self.index_file = self.manifest_dir / "manifesto.json"
+        self.lock_file = self.manifest_dir / "manifesto.lock"
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._load_index()
+
+    def __getstate__(self):
+        # Pool workers only read entries; the lock stays with the parent process
+        state = self.__dict__.copy()
+        del state['_lock']
+        state['_lock_depth'] = 0
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def locked(self):
+        """
+        Exclusive access to the manifest, reloaded from disk on entry.
+        Reentrant within a thread: only the outermost level takes the file lock.
+        """
+        with self._lock:
+            if self._lock_depth:
+                self._lock_depth += 1
+                try:
+                    yield self
+                finally:
+                    self._lock_depth -= 1
+                return
+            self.manifest_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_file, 'a') as handle:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_EX)
+                self._lock_depth = 1
+                try:
+                    self._load_index()  # Another process may have saved since we last read it
+                    yield self
+                finally:
+                    self._lock_depth = 0
+                    if fcntl is not None:
+                        fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _load_index(self):
+        """Load the manifest index, discarding it if unreadable or outdated."""
+        data = carregar_json(str(self.index_file))
+        self.entries = data.get('files', {}) if data.get('version') == self.VERSION else {}
+        self._dirty = False
+
+    @staticmethod
+    def _key(file_path: str) -> str:
+        return str(Path(file_path).resolve())
+
+    @staticmethod
+    def file_hash(file_path: str) -> str:
+        """SHA-256 of the file contents, read in 1MB blocks."""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def lookup(self, file_path: str, file_type: str) -> Optional[Tuple[pd.DataFrame, DataValidationResult]]:
+        """Return the stored result for an unchanged file, or None."""
+        entry = self.entries.get(self._key(file_path))
+        if not entry or entry['file_type'] != file_type:
+            return None
+
+        stat = os.stat(file_path)
+        if entry['size'] != stat.st_size:
+            return None
+        if entry['mtime'] != stat.st_mtime_ns:
+            # Touched but possibly identical (e.g. re-downloaded): confirm by content
+            if self.file_hash(file_path) != entry['sha256']:
+                return None
+            entry['mtime'] = stat.st_mtime_ns
+            self._dirty = True
+
+        if pa is None:
+            return None
+        try:
+            with pa.memory_map(str(self.manifest_dir / entry['frame']), 'r') as source:
+                df = pa.ipc.open_file(source).read_all().to_pandas()
+        except Exception as e:
+            logger.warning(f"Failed to load manifest frame for {file_path}: {e}")
+            return None
+
+        return df, DataValidationResult(**entry['validation'])
+
+    def record(self, file_path: str, file_type: str, df: pd.DataFrame, validation: DataValidationResult):
+        """Store the processing result of a file."""
+        if pa is None:
+            return
+        stat = os.stat(file_path)
+        sha256 = self.file_hash(file_path)
+        frame_name = f"{sha256[:32]}_{file_type}.arrow"
+
+        frame_file = self.manifest_dir / frame_name
+        temporary = frame_file.with_name(f".{frame_name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self.manifest_dir.mkdir(parents=True, exist_ok=True)
+            table = pa.Table.from_pandas(df, preserve_index=True)
+            with pa.OSFile(str(temporary), 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(temporary, frame_file)
+        except Exception as e:
+            temporary.unlink(missing_ok=True)
+            logger.warning(f"Failed to store manifest frame for {file_path}: {e}")
+            return
+
+        validation_data = asdict(validation)
+        validation_data['processed_rows'] = int(validation.processed_rows)
+        validation_data['invalid_rows'] = int(validation.invalid_rows)
+
+        key = self._key(file_path)
+        previous = self.entries.get(key)
+        self.entries[key] = {
+            'file_type': file_type,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'sha256': sha256,
+            'frame': frame_name,
+            'validation': validation_data
+        }
+        if previous and previous['frame'] != frame_name:
+            self._remove_frame(previous['frame'])
+        self._dirty = True
+
+    def prune(self, existing_paths: List[str]):
+        """Forget files that are no longer present in the data folders."""
+        keep = {self._key(p) for p in existing_paths}
+        for key in [k for k in self.entries if k not in keep]:
+            self._remove_frame(self.entries.pop(key)['frame'])
+            self._dirty = True
+
+    def _remove_frame(self, frame_name: str):
+        if any(e['frame'] == frame_name for e in self.entries.values()):
+            return
+        try:
+            (self.manifest_dir / frame_name).unlink()
+        except FileNotFoundError:
+            pass
+
+    def save(self):
+        """Persist the index if anything changed."""
+        if not self._dirty:
+            return
+        self.manifest_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.index_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'files': self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_file, self.index_file)
+        self._dirty = False
+
+class _ParquetSpool:
+    """Append-only Parquet file for processed chunks; the first chunk fixes the schema."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.rows = 0
+        self._writer = None
+        self._schema = None
+
+    def append(self, df: pd.DataFrame):
+        if self._writer is None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            # A column that is all null in the first chunk may hold text in the next ones
+            fields = [pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f for f in table.schema]
+            self._schema = pa.schema(fields, metadata=table.schema.metadata)
+            self._writer = pq.ParquetWriter(str(self.path), self._schema)
+        self._writer.write_table(pa.Table.from_pandas(df, schema=self._schema, preserve_index=False))
+        self.rows += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def read(self) -> pd.DataFrame:
+        if self._schema is None:
+            return pd.DataFrame()
+        return pq.read_table(str(self.path), memory_map=True).to_pandas()
+
 class DataProcessor:
     """Advanced data processing pipeline."""
     
@@ -1412,6 +3670,7 @@ class DataProcessor:
         self.validator = DataValidator()
         self.categorizer = AdvancedCategorizer()
         self.cache = DataCache()
+        self.manifest = IngestionManifest()
     
     def process_file(self, file_path: str, file_type: str) -> Tuple[pd.DataFrame, DataValidationResult]:
         """Process a single file with comprehensive validation."""
@@ -1425,13 +3684,12 @@ class DataProcessor:
             if file_size > config.MAX_FILE_SIZE:
                 raise ValueError(f"File too large: {file_size} bytes")
             
-            # Load data based on file type
-            if file_type == 'credito':
-                df = self._load_credit_file(file_path)
-            elif file_type == 'debito':
-                df = self._load_debit_file(file_path)
-            else:
-                raise ValueError(f"Unknown file type: {file_type}")
+            # Large statements are streamed in chunks to bound peak memory
+            if file_size > config.INGESTAO_STREAMING_BYTES:
+                return self._process_large_file(file_path, file_type)
+            
+            # Load data with the registered format for this file type
+            df = self._load_statement(file_path, file_type)
             
             # Validate data
             validation_result = self.validator.validate_dataframe(df, file_type)
@@ -1453,78 +3711,104 @@ class DataProcessor:
             logger.error(f"Error processing {file_path}: {str(e)}")
             return pd.DataFrame(), DataValidationResult(False, [str(e)], [], 0, 0)
     
+    def _read_statement(self, file_path: str, file_type: str, chunksize: int = None) -> Tuple[LeituraExtrato, Any]:
+        """Detect the statement format and read only its columns, optionally as an iterator of chunks."""
+        leitura = detectar_leitura(file_path, file_type)
+        return leitura, leitura.ler(file_path, chunksize=chunksize)
+    
+    def _load_statement(self, file_path: str, file_type: str) -> pd.DataFrame:
+        """Load and normalize a whole statement file."""
+        leitura, df = self._read_statement(file_path, file_type)
+        return leitura.normalizar(df, self._clean_currency_values)
+    
     def _load_credit_file(self, file_path: str) -> pd.DataFrame:
         """Load and process credit file."""
-        df = pd.read_csv(file_path, sep=';', encoding='utf-8', dayfirst=True, skipinitialspace=True)
-        df = df.rename(columns=lambda col: col.strip())
-        
-        # Column mapping
-        mapping = {
-            'Data movimento': 'Data',
-            'Nome do fornecedor/cliente': 'Estabelecimento',
-            'Valor (R$)': 'Valor'
-        }
-        df = df.rename(columns=mapping)
-        
-        # Process values
-        if 'Valor' in df.columns:
-            df['Valor'] = self._clean_currency_values(df['Valor'])
-            df['Valor'] = -abs(df['Valor'])  # Credit transactions are expenses
-        
-        df['Tipo'] = 'Despesa'
-        df['Data'] = pd.to_datetime(df['Data'], errors='coerce', dayfirst=True)
-        
-        return df[['Data', 'Estabelecimento', 'Valor', 'Tipo']]
+        return self._load_statement(file_path, 'credito')
     
     def _load_debit_file(self, file_path: str) -> pd.DataFrame:
         """Load and process debit file."""
-        df = pd.read_csv(file_path, sep=';', encoding='utf-8', dayfirst=True, skipinitialspace=True)
-        df = df.rename(columns=lambda col: col.strip())
-        
-        # Column mapping
-        mapping = {
-            'Data': 'Data',
-            'Descricao': 'Estabelecimento',
-            'Valor': 'Valor'
-        }
-        df = df.rename(columns=mapping)
-        
-        # Process dates
-        if 'Data' in df.columns:
-            df['Data'] = df['Data'].astype(str).str.split(' às').str[0]
-            df['Data'] = pd.to_datetime(df['Data'], errors='coerce', dayfirst=True)
+        return self._load_statement(file_path, 'debito')
+    
+    def iter_file_chunks(self, file_path: str, file_type: str, chunk_rows: int = None) -> Iterator[Tuple[pd.DataFrame, DataValidationResult]]:
+        """
+        Stream a statement in fixed-size chunks.
+
+        Each chunk is cleaned, validated and (when valid) categorized before the
+        next one is read, so peak memory follows the chunk size, not the file size.
+        Duplicates are counted across the whole file (a set of row hashes is kept
+        between chunks); the suspicious pattern checks only see one chunk at a time.
+        """
+        leitura, reader = self._read_statement(file_path, file_type, chunksize=chunk_rows or config.INGESTAO_CHUNK_LINHAS)
+        seen_rows: set = set()
+        with reader:
+            for chunk in reader:
+                df = leitura.normalizar(chunk, self._clean_currency_values)
+                if df.empty:
+                    # Rows dropped by cleaning; not a reason to reject the whole file
+                    yield df, DataValidationResult(True, [], [], 0, 0)
+                    continue
+                validation = self.validator.validate_dataframe(df, file_type, seen_rows=seen_rows)
+                if validation.is_valid:
+                    df = self._apply_categorization(df)
+                yield df, validation
+    
+    def process_file_streaming(self, file_path: str, file_type: str, sink, chunk_rows: int = None) -> DataValidationResult:
+        """
+        Process a file chunk by chunk, handing each processed chunk to `sink` (a
+        callable) as soon as it is ready; nothing is accumulated here. Returns the
+        combined validation. On the first invalid chunk it stops, and what the sink
+        already received must be discarded by the caller.
+        """
+        results = []
         
-        # Process values
-        if 'Valor' in df.columns:
-            df['Valor'] = self._clean_currency_values(df['Valor'])
+        for df, validation in self.iter_file_chunks(file_path, file_type, chunk_rows):
+            results.append(validation)
+            if not validation.is_valid:
+                logger.error(f"Validation failed for {file_path} (chunk {len(results)}): {validation.errors}")
+                return DataValidationResult.combine(results)
+            if not df.empty:
+                sink(df)
         
-        # Determine transaction type
-        df['Tipo'] = np.where(df['Valor'] >= 0, 'Receita', 'Despesa')
+        validation_result = DataValidationResult.combine(results)
+        if validation_result.processed_rows == 0:
+            return DataValidationResult(False, ["DataFrame is empty"], [], 0, 0)
+        if validation_result.warnings:
+            logger.warning(f"Warnings for {file_path}: {validation_result.warnings}")
+        return validation_result
+    
+    def _process_large_file(self, file_path: str, file_type: str) -> Tuple[pd.DataFrame, DataValidationResult]:
+        """
+        Stream a large statement into a Parquet spool next to the manifest and load
+        the result once, instead of holding every chunk plus their concatenation.
+        Without pyarrow the chunks are kept in memory and concatenated.
+        """
+        if pa is None:
+            chunks = []
+            validation = self.process_file_streaming(file_path, file_type, chunks.append)
+            if not validation.is_valid:
+                return pd.DataFrame(), validation
+            return pd.concat(chunks, ignore_index=True), validation
         
-        return df[['Data', 'Estabelecimento', 'Valor', 'Tipo']].dropna()
+        self.manifest.manifest_dir.mkdir(parents=True, exist_ok=True)
+        spool = _ParquetSpool(self.manifest.manifest_dir / f".spool_{os.getpid()}_{threading.get_ident()}.parquet")
+        try:
+            try:
+                validation = self.process_file_streaming(file_path, file_type, spool.append)
+            finally:
+                spool.close()
+            if not validation.is_valid:
+                return pd.DataFrame(), validation
+            return spool.read(), validation
+        finally:
+            spool.path.unlink(missing_ok=True)
     
     def _clean_currency_values(self, series: pd.Series) -> pd.Series:
         """Clean currency values with better error handling."""
         try:
-            cleaned = (series.astype(str)
-                       .str.replace('R$', '', regex=False)
-                       .str.replace('.', '', regex=False)
-                       .str.strip()
-                       .str.replace(',', '.', regex=False))
-            
-            # Convert to numeric with coerce
-            numeric_values = pd.to_numeric(cleaned, errors='coerce')
-            
-            # Log conversion issues
-            invalid_count = numeric_values.isna().sum()
-            if invalid_count > 0:
-                logger.warning(f"Could not convert {invalid_count} currency values")
-            
-            return numeric_values
-            
+            return limpar_valores_monetarios(series)
         except Exception as e:
             logger.error(f"Error cleaning currency values: {e}")
-            return pd.Series([np.nan] * len(series))
+            return pd.Series([np.nan] * len(series), index=series.index)
     
     def _apply_categorization(self, df: pd.DataFrame) -> pd.DataFrame:
         """Apply intelligent categorization to dataframe."""
@@ -1550,33 +3834,79 @@ class DataProcessor:
         
         return df
     
-    def process_all_files(self) -> Tuple[pd.DataFrame, List[DataValidationResult]]:
-        """Process all files in the data directories."""
-        all_dataframes = []
-        validation_results = []
-        
-        # Process credit files
+    def _list_source_files(self) -> List[Tuple[str, str]]:
+        """List (path, file_type) for every statement, in a stable order."""
         config.PASTA_CREDITO.mkdir(parents=True, exist_ok=True)
-        for file_path in glob.glob(str(config.PASTA_CREDITO / "*.csv")):
-            df, validation = self.process_file(file_path, 'credito')
-            if not df.empty:
-                all_dataframes.append(df)
-            validation_results.append(validation)
-        
-        # Process debit files
         config.PASTA_DEBITO.mkdir(parents=True, exist_ok=True)
-        for file_path in glob.glob(str(config.PASTA_DEBITO / "*.csv")):
-            df, validation = self.process_file(file_path, 'debito')
-            if not df.empty:
-                all_dataframes.append(df)
-            validation_results.append(validation)
-        
+        files = [(f, 'credito') for f in sorted(glob.glob(str(config.PASTA_CREDITO / "*.csv")))]
+        files += [(f, 'debito') for f in sorted(glob.glob(str(config.PASTA_DEBITO / "*.csv")))]
+        return files
+
+    def _process_task(self, task: Tuple[str, str]) -> Tuple[pd.DataFrame, DataValidationResult]:
+        """Picklable wrapper around process_file for pool workers."""
+        return self.process_file(*task)
+
+    def process_all_files(self, incremental: bool = None, workers: int = None) -> Tuple[pd.DataFrame, List[DataValidationResult]]:
+        """Process all files in the data directories.
+
+        With incremental ingestion (default from config), files unchanged since
+        the last run are merged from the ingestion manifest instead of being
+        processed again. The remaining files are fanned out over a process pool
+        when more than one worker is configured (INGESTAO_WORKERS); results keep
+        the file order either way.
+        """
+        if incremental is None:
+            incremental = config.INGESTAO_INCREMENTAL
+
+        # One run at a time: the watcher thread and the pages share this processor and its manifest
+        with self.manifest.locked():
+            return self._process_all_files(incremental, workers)
+
+    def _process_all_files(self, incremental: bool, workers: Optional[int]) -> Tuple[pd.DataFrame, List[DataValidationResult]]:
+        source_files = self._list_source_files()
+        results: List[Optional[Tuple[pd.DataFrame, DataValidationResult]]] = [None] * len(source_files)
+        pending = []
+
+        for i, (file_path, file_type) in enumerate(source_files):
+            cached = self.manifest.lookup(file_path, file_type) if incremental else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append(i)
+
+        processed = _mapear_em_paralelo(self._process_task, [source_files[i] for i in pending], workers)
+        for i, (df, validation) in zip(pending, processed):
+            results[i] = (df, validation)
+            if incremental and validation.is_valid:
+                file_path, file_type = source_files[i]
+                self.manifest.record(file_path, file_type, df, validation)
+
+        if incremental:
+            self.manifest.prune([file_path for file_path, _ in source_files])
+            try:
+                self.manifest.save()
+            except Exception as e:
+                logger.warning(f"Failed to save ingestion manifest: {e}")
+            logger.info(f"Ingestion: {len(source_files) - len(pending)} file(s) reused from manifest, "
+                        f"{len(pending)} processed")
+
+        all_dataframes = [
+            identificar_transacoes(df, file_type)
+            for (df, _), (_, file_type) in zip(results, source_files) if not df.empty
+        ]
+        validation_results = [validation for _, validation in results]
+
         if not all_dataframes:
             logger.warning("No valid data files found")
             return pd.DataFrame(), validation_results
         
-        # Combine all dataframes
+        # Combine all dataframes; overlapping exports share transaction ids
         combined_df = pd.concat(all_dataframes, ignore_index=True)
+        duplicated = combined_df['Id_Transacao'].duplicated()
+        if duplicated.any():
+            logger.info(f"Removed {int(duplicated.sum())} transactions repeated across statements")
+            combined_df = combined_df[~duplicated].reset_index(drop=True)
+        combined_df['Possivel_Duplicata'] = marcar_possiveis_duplicatas(combined_df)
         
         # Final cleaning and validation
         combined_df = self._final_cleaning(combined_df)
@@ -1602,11 +3932,101 @@ class DataProcessor:
         # Sort by date
         df = df.sort_values(by='Data', ascending=False).reset_index(drop=True)
         
-        return df
+        return adicionar_coluna_centavos(df)
 
 # Global data processor instance
 data_processor = DataProcessor()
 
+# --- Monitoramento de pastas ---
+class MonitorPastas:
+    """
+    Observa PASTA_CREDITO/PASTA_DEBITO em uma thread e reingere quando há extratos novos ou alterados.
+
+    Cada varredura faz apenas stat dos CSVs. Uma mudança só dispara a ingestão
+    (incremental, via processar_faturas) depois de ficar estável por `debounce`
+    segundos, para não pegar um arquivo ainda sendo copiado. O consolidado é
+    publicado de forma atômica, então as páginas passam a ver a nova versão sem
+    ninguém abrir a página de Processamento.
+    """
+
+    def __init__(self, intervalo: float = None, debounce: float = None):
+        self.intervalo = config.MONITOR_INTERVALO if intervalo is None else intervalo
+        self.debounce = config.MONITOR_DEBOUNCE if debounce is None else debounce
+        self._publicado = self.varrer()
+        self._pendente: Optional[Tuple[Dict[str, Tuple[int, int]], float]] = None
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def varrer() -> Dict[str, Tuple[int, int]]:
+        """(tamanho, mtime) de cada CSV das pastas de extratos, só com stat."""
+        estado = {}
+        for pasta in (config.PASTA_CREDITO, config.PASTA_DEBITO):
+            try:
+                with os.scandir(pasta) as entradas:
+                    for entrada in entradas:
+                        if entrada.name.endswith('.csv') and entrada.is_file():
+                            stat = entrada.stat()
+                            estado[entrada.path] = (stat.st_size, stat.st_mtime_ns)
+            except FileNotFoundError:
+                continue
+        return estado
+
+    def verificar(self, agora: float = None) -> bool:
+        """Uma varredura; retorna True se reingeriu."""
+        agora = time.monotonic() if agora is None else agora
+        atual = self.varrer()
+
+        if atual == self._publicado:
+            self._pendente = None
+            return False
+        if self._pendente is None or self._pendente[0] != atual:
+            self._pendente = (atual, agora)
+            return False
+        if agora - self._pendente[1] < self.debounce:
+            return False
+
+        self._pendente = None
+        try:
+            # Mesma trava da ingestão manual (reentrante: processar_faturas a toma de novo)
+            with data_processor.manifest.locked():
+                df = processar_faturas.refresh()
+            logger.info(f"Folder watcher: statements changed, published {len(df)} rows")
+        except Exception as e:
+            logger.error(f"Folder watcher ingestion failed: {e}")
+        self._publicado = atual
+        return True
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            self.verificar()
+
+    def iniciar(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name="monitor-pastas", daemon=True)
+            self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+_monitor_pastas: Optional[MonitorPastas] = None
+_monitor_lock = threading.Lock()
+
+def iniciar_monitor_pastas() -> Optional[MonitorPastas]:
+    """Inicia (uma vez por processo) o monitor de pastas, se MONITOR_PASTAS estiver ativo."""
+    global _monitor_pastas
+    if not config.MONITOR_PASTAS:
+        return None
+    with _monitor_lock:
+        if _monitor_pastas is None:
+            _monitor_pastas = MonitorPastas()
+        _monitor_pastas.iniciar()
+    return _monitor_pastas
+
 # --- Data Quality Monitoring System ---
 class DataQualityMonitor:
     """Advanced data quality monitoring system."""
@@ -1680,12 +4100,14 @@ class DataQualityMonitor:
         metrics['missing_data'] = missing_data
         
         # Duplicate analysis
-        duplicates = df.duplicated().sum()
+        duplicates = df.duplicated(subset=colunas_de_duplicidade(df)).sum()
         duplicate_rate = (duplicates / total_rows) * 100 if total_rows > 0 else 0
         metrics['duplicates'] = {
             'count': duplicates,
             'rate': duplicate_rate
         }
+        if 'Possivel_Duplicata' in df.columns:
+            metrics['duplicates']['possible'] = int(df['Possivel_Duplicata'].fillna(False).astype(bool).sum())
         
         # Value distribution analysis
         if 'Valor' in df.columns:
@@ -1893,7 +4315,7 @@ def debug_dados_previsao(df_historico: pd.DataFrame) -> dict:
         # Verificar gastos mensais
         df_despesas = df_historico[df_historico['Tipo'] == 'Despesa'].copy()
         if not df_despesas.empty:
-            gastos_mensais = df_despesas.set_index('Data').resample('M')['Valor'].sum().abs().reset_index()
+            gastos_mensais = somar_valores(df_despesas, pd.Grouper(key='Data', freq='M')).abs().reset_index()
             debug_info['gastos_mensais_info'] = {
                 'total_meses': len(gastos_mensais),
                 'meses_com_dados': len(gastos_mensais[gastos_mensais['Valor'] > 0]),
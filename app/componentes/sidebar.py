@@ -3,9 +3,8 @@
 import streamlit as st
 import os
 import pandas as pd
-from datetime import datetime
 from app.backend import (
-    salvar_json, gerar_relatorio_pdf, ARQUIVO_CONTEXTO, ARQUIVO_ORCAMENTO
+    salvar_json, gerar_relatorio_pdf, obter_periodos_disponiveis, ARQUIVO_CONTEXTO, ARQUIVO_ORCAMENTO
 )
 
 def render_sidebar():
@@ -47,13 +46,20 @@ def _gerenciar_orcamentos():
 def _gerar_relatorio_mensal():
     st.subheader("Gerar Relatório Mensal")
     mes_map_inv = {i+1: v for i, v in enumerate(['Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho', 'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'])}
-    ano_selecionado = st.number_input("Ano", min_value=2020, max_value=2030, value=datetime.now().year)
-    default_month_index = datetime.now().month - 1
-    mes_selecionado = st.selectbox("Mês", options=list(mes_map_inv.keys()), format_func=lambda x: mes_map_inv[x], index=default_month_index)
+    # Só anos e meses com transações, direto do catálogo de períodos
+    periodos = obter_periodos_disponiveis()
+    if not periodos["anos"]:
+        st.caption("Nenhum período disponível.")
+        return
+    ano_selecionado = st.selectbox("Ano", options=periodos["anos"], index=len(periodos["anos"]) - 1)
+    meses_disponiveis = periodos["meses_por_ano"][ano_selecionado]
+    mes_selecionado = st.selectbox("Mês", options=meses_disponiveis, format_func=lambda x: mes_map_inv[x], index=len(meses_disponiveis) - 1)
+    resumo = periodos["resumo"][(ano_selecionado, mes_selecionado)]
+    st.caption(f"{resumo['transacoes']} transações no mês")
     
     if st.button("Gerar Relatório em PDF"):
         with st.spinner(f"Gerando relatório para {mes_map_inv[mes_selecionado]}/{ano_selecionado}..."):
-            caminho_pdf = gerar_relatorio_pdf(st.session_state.df_completo, ano_selecionado, mes_selecionado)
+            caminho_pdf = gerar_relatorio_pdf(None, ano_selecionado, mes_selecionado)
             if caminho_pdf:
                 st.session_state.ultimo_relatorio_gerado = caminho_pdf
                 st.success(f"Relatório '{os.path.basename(caminho_pdf)}' gerado com sucesso!")
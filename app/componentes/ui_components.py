@@ -365,7 +365,7 @@ def create_timeline_chart(data: pd.DataFrame, date_col: str, value_col: str, cat
 
 def create_heatmap_chart(data: pd.DataFrame, x_col: str, y_col: str, value_col: str, title: str = "Heatmap"):
     """Create a heatmap chart."""
-    pivot_data = data.pivot_table(values=value_col, index=y_col, columns=x_col, aggfunc='sum')
+    pivot_data = data.pivot_table(values=value_col, index=y_col, columns=x_col, aggfunc='sum', observed=True)
     
     fig = px.imshow(
         pivot_data,
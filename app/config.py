@@ -20,11 +20,17 @@ class AppConfig:
     PASTA_RELATORIOS: Path = PROJECT_ROOT / "data" / "relatorios"
     PASTA_FONTES: Path = PROJECT_ROOT / "fonts"
     PASTA_CACHE: Path = PASTA_PROCESSADOS / "cache"
+    PASTA_MANIFESTO: Path = PASTA_PROCESSADOS / "manifesto"
+    PASTA_TRANSACOES: Path = PASTA_PROCESSADOS / "transacoes"  # Parquet particionado por ano/mês
+    PASTA_INSTANTANEOS: Path = PASTA_PROCESSADOS / "instantaneos"  # Arrow IPC mapeado em memória por versão
     
     # Files
     ARQUIVO_CONTEXTO: Path = PASTA_PROCESSADOS / "contexto_financeiro.json"
     ARQUIVO_ORCAMENTO: Path = PASTA_PROCESSADOS / "orcamento.json"
     ARQUIVO_CONSOLIDADO: Path = PASTA_PROCESSADOS / "dados_consolidados.csv"
+    ARQUIVO_BANCO: Path = PASTA_PROCESSADOS / "transacoes.sqlite"
+    ARQUIVO_CATALOGO_PERIODOS: Path = PASTA_PROCESSADOS / "catalogo_periodos.json"
+    ARQUIVO_CATEGORIAS_CUSTOMIZADAS: Path = PASTA_PROCESSADOS / "categorias_customizadas.json"
     
     # AI Configuration
     OPENAI_MODEL: str = "gpt-4.1-nano"  # Modelo padrão: GPT-4.1 Nano
@@ -46,11 +52,28 @@ class AppConfig:
     # Caching
     CACHE_ENABLED: bool = True
     CACHE_TTL: int = 3600  # 1 hour
+    CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # Disk budget for DataCache (LRU eviction above it)
+    CACHE_MEMORIA_MAX_BYTES: int = 64 * 1024 * 1024  # In-process (L1) budget for DataCache
+    CACHE_PICKLE_FALLBACK: bool = True  # Pickle values with no Arrow/JSON format; False never writes or loads pickles
     
     # Data Processing
     MAX_FILE_SIZE: int = 50 * 1024 * 1024  # 50MB
     SUPPORTED_ENCODINGS: List[str] = field(default_factory=lambda: ['utf-8', 'latin-1', 'cp1252'])
     SUPPORTED_SEPARATORS: List[str] = field(default_factory=lambda: [';', ',', '\t'])
+    CSV_ENGINE: str = "pyarrow"  # "pyarrow" (leitor multi-thread, cai para "c" se não instalado) ou "c"
+    INGESTAO_INCREMENTAL: bool = True  # Reaproveita arquivos já processados (manifesto)
+    INGESTAO_STREAMING_BYTES: int = 10 * 1024 * 1024  # Acima disso o arquivo é lido em blocos
+    INGESTAO_CHUNK_LINHAS: int = 50_000  # Linhas por bloco na leitura em streaming
+    INGESTAO_WORKERS: int = 1  # Processos paralelos na ingestão (1 = sequencial, 0 = todos os núcleos)
+    MONITOR_PASTAS: bool = False  # Thread que reingere ao detectar extratos novos ou alterados
+    MONITOR_INTERVALO: float = 5.0  # Segundos entre varreduras das pastas
+    MONITOR_DEBOUNCE: float = 2.0  # Segundos sem mudanças antes de reingerir
+    ARMAZENAMENTO_PARQUET: bool = True  # Consolidado em Parquet (requer pyarrow; senão fica no CSV)
+    EXPORTAR_CSV_CONSOLIDADO: bool = True  # Mantém dados_consolidados.csv atualizado para compatibilidade
+    COMPACTAR_APOS_DELTAS: int = 20  # Segmentos de alterações acumulados antes de regravar a base
+    BANCO_SQL: bool = False  # Mantém uma cópia indexada em SQLite para consultas agregadas
+    INSTANTANEO_ARROW: bool = True  # Processos mapeiam o consolidado de um arquivo Arrow em vez de cada um ter sua cópia
+    VALOR_EM_CENTAVOS: bool = False  # Grava 'Valor_Centavos' (int64) e agrega valores em centavos exatos
     
     # UI Configuration
     PAGE_TITLE: str = "FinBot - Seu Assistente Financeiro"
@@ -84,6 +107,48 @@ class AppConfig:
         if os.getenv('CACHE_ENABLED'):
             config.CACHE_ENABLED = os.getenv('CACHE_ENABLED').lower() == 'true'
         
+        if os.getenv('CACHE_TTL'):
+            config.CACHE_TTL = int(os.getenv('CACHE_TTL'))
+        
+        if os.getenv('CACHE_MAX_BYTES'):
+            config.CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES'))
+        
+        if os.getenv('CACHE_MEMORIA_MAX_BYTES'):
+            config.CACHE_MEMORIA_MAX_BYTES = int(os.getenv('CACHE_MEMORIA_MAX_BYTES'))
+        
+        if os.getenv('CACHE_PICKLE_FALLBACK'):
+            config.CACHE_PICKLE_FALLBACK = os.getenv('CACHE_PICKLE_FALLBACK').lower() == 'true'
+        
+        if os.getenv('CSV_ENGINE'):
+            config.CSV_ENGINE = os.getenv('CSV_ENGINE').lower()
+        
+        if os.getenv('INGESTAO_INCREMENTAL'):
+            config.INGESTAO_INCREMENTAL = os.getenv('INGESTAO_INCREMENTAL').lower() == 'true'
+        
+        if os.getenv('INGESTAO_WORKERS'):
+            config.INGESTAO_WORKERS = int(os.getenv('INGESTAO_WORKERS'))
+        
+        if os.getenv('MONITOR_PASTAS'):
+            config.MONITOR_PASTAS = os.getenv('MONITOR_PASTAS').lower() == 'true'
+        
+        if os.getenv('ARMAZENAMENTO_PARQUET'):
+            config.ARMAZENAMENTO_PARQUET = os.getenv('ARMAZENAMENTO_PARQUET').lower() == 'true'
+        
+        if os.getenv('EXPORTAR_CSV_CONSOLIDADO'):
+            config.EXPORTAR_CSV_CONSOLIDADO = os.getenv('EXPORTAR_CSV_CONSOLIDADO').lower() == 'true'
+        
+        if os.getenv('COMPACTAR_APOS_DELTAS'):
+            config.COMPACTAR_APOS_DELTAS = int(os.getenv('COMPACTAR_APOS_DELTAS'))
+        
+        if os.getenv('BANCO_SQL'):
+            config.BANCO_SQL = os.getenv('BANCO_SQL').lower() == 'true'
+        
+        if os.getenv('INSTANTANEO_ARROW'):
+            config.INSTANTANEO_ARROW = os.getenv('INSTANTANEO_ARROW').lower() == 'true'
+        
+        if os.getenv('VALOR_EM_CENTAVOS'):
+            config.VALOR_EM_CENTAVOS = os.getenv('VALOR_EM_CENTAVOS').lower() == 'true'
+        
         if os.getenv('LOG_LEVEL'):
             config.LOG_LEVEL = os.getenv('LOG_LEVEL')
         
@@ -100,7 +165,10 @@ class AppConfig:
             self.PASTA_PROCESSADOS,
             self.PASTA_RELATORIOS,
             self.PASTA_FONTES,
-            self.PASTA_CACHE
+            self.PASTA_CACHE,
+            self.PASTA_MANIFESTO,
+            self.PASTA_TRANSACOES,
+            self.PASTA_INSTANTANEOS
         ]
         
         for directory in directories:
@@ -123,6 +191,27 @@ class AppConfig:
         if self.MAX_API_CALLS < 1:
             errors.append("MAX_API_CALLS must be at least 1")
         
+        if self.CSV_ENGINE not in ('pyarrow', 'c'):
+            errors.append("CSV_ENGINE must be 'pyarrow' or 'c'")
+        
+        if self.INGESTAO_CHUNK_LINHAS < 1:
+            errors.append("INGESTAO_CHUNK_LINHAS must be at least 1")
+        
+        if self.INGESTAO_WORKERS < 0:
+            errors.append("INGESTAO_WORKERS must be 0 (all cores) or a positive number")
+        
+        if self.MONITOR_INTERVALO <= 0 or self.MONITOR_DEBOUNCE < 0:
+            errors.append("MONITOR_INTERVALO must be positive and MONITOR_DEBOUNCE non-negative")
+        
+        if self.CACHE_TTL < 0 or self.CACHE_MAX_BYTES < 0:
+            errors.append("CACHE_TTL and CACHE_MAX_BYTES must be non-negative (0 disables the limit)")
+        
+        if self.CACHE_MEMORIA_MAX_BYTES < 0:
+            errors.append("CACHE_MEMORIA_MAX_BYTES must be non-negative (0 disables the memory tier)")
+        
+        if self.COMPACTAR_APOS_DELTAS < 1:
+            errors.append("COMPACTAR_APOS_DELTAS must be at least 1")
+        
         if self.MAX_INPUT_LENGTH < 10:
             errors.append("MAX_INPUT_LENGTH must be at least 10")
         
@@ -11,22 +11,19 @@ import os
 from pathlib import Path
 
 # --- CORREÇÃO INICIADA ---
-# As importações foram separadas. Funções vêm do backend,
-# e o objeto de configuração vem de config.py.
-from backend import carregar_json, salvar_json
-from config import config
+# As importações foram separadas. Funções e o acesso aos dados consolidados vêm do backend.
+from backend import carregar_json, salvar_json, dados_consolidados_disponiveis, obter_dados_consolidados
 # --- CORREÇÃO FINALIZADA ---
 
 def carregar_dados_analytics():
     """Carrega dados para análise avançada."""
     try:
         # --- CORREÇÃO INICIADA ---
-        # Acessando a variável através do objeto 'config'
-        if not config.ARQUIVO_CONSOLIDADO.exists():
+        # Os dados vêm do provedor compartilhado (armazém Parquet ou CSV consolidado)
+        if not dados_consolidados_disponiveis():
             return pd.DataFrame()
-        df = pd.read_csv(str(config.ARQUIVO_CONSOLIDADO), sep=';')
+        df = obter_dados_consolidados()
         # --- CORREÇÃO FINALIZADA ---
-        df['Data'] = pd.to_datetime(df['Data'])
         return df
     except FileNotFoundError:
         return pd.DataFrame()
@@ -49,11 +46,11 @@ def calcular_metricas_financeiras(df):
     taxa_poupanca = (saldo_total / receitas * 100) if receitas > 0 else 0
     
     # Análise por categoria
-    gastos_por_categoria = df[df['Tipo'] == 'Despesa'].groupby('Categoria')['Valor'].sum().abs()
+    gastos_por_categoria = df[df['Tipo'] == 'Despesa'].groupby('Categoria', observed=True)['Valor'].sum().abs()
     
     # Análise temporal
     df['Mes'] = df['Data'].dt.to_period('M')
-    gastos_mensais = df[df['Tipo'] == 'Despesa'].groupby('Mes')['Valor'].sum().abs()
+    gastos_mensais = df[df['Tipo'] == 'Despesa'].groupby('Mes', observed=True)['Valor'].sum().abs()
     
     # Tendências
     if len(gastos_mensais) > 1:
@@ -63,7 +60,7 @@ def calcular_metricas_financeiras(df):
         tendencia_texto = "Insuficiente"
     
     # Anomalias (outliers)
-    gastos_por_estabelecimento = df[df['Tipo'] == 'Despesa'].groupby('Estabelecimento')['Valor'].sum().abs()
+    gastos_por_estabelecimento = df[df['Tipo'] == 'Despesa'].groupby('Estabelecimento', observed=True)['Valor'].sum().abs()
     q1 = gastos_por_estabelecimento.quantile(0.25)
     q3 = gastos_por_estabelecimento.quantile(0.75)
     iqr = q3 - q1
@@ -129,7 +126,7 @@ def criar_grafico_categoria_tempo(df):
     df_temp = df[df['Tipo'] == 'Despesa'].copy()
     df_temp['Mes'] = df_temp['Data'].dt.to_period('M')
     
-    gastos_categoria_tempo = df_temp.groupby(['Mes', 'Categoria'])['Valor'].sum().abs().reset_index()
+    gastos_categoria_tempo = df_temp.groupby(['Mes', 'Categoria'], observed=True)['Valor'].sum().abs().reset_index()
     
     # Pivot para formato adequado ao gráfico
     pivot_data = gastos_categoria_tempo.pivot(index='Mes', columns='Categoria', values='Valor').fillna(0)
@@ -321,7 +318,7 @@ def layout():
         if 'Pagador' in df.columns:
             st.subheader("Análise por Pagador")
             
-            gastos_por_pagador = df[df['Tipo'] == 'Despesa'].groupby('Pagador')['Valor'].sum().abs()
+            gastos_por_pagador = df[df['Tipo'] == 'Despesa'].groupby('Pagador', observed=True)['Valor'].sum().abs()
             
             if not gastos_por_pagador.empty:
                 fig_pagador = px.bar(
@@ -9,7 +9,7 @@ from datetime import datetime
 # e variáveis de configuração vêm do objeto 'config'.
 from backend import (
     carregar_dados_brutos, aplicar_regras_contexto,
-    carregar_json, atualizar_contexto_pagador
+    carregar_json, atualizar_contexto_pagador, salvar_dados_consolidados
 )
 from config import config
 # --- CORREÇÃO FINALIZADA ---
@@ -48,10 +48,10 @@ def layout():
         st.success("Nenhuma transação nova precisa de atribuição!")
         if st.button("Concluir e Ir para o Dashboard"):
             df_final = st.session_state.df_em_processo.copy()
-            df_final['Pagador'].fillna('Não Aplicável', inplace=True)
+            df_final['Pagador'] = df_final['Pagador'].fillna('Não Aplicável')
             # --- CORREÇÃO INICIADA ---
             # Acessando a variável através do objeto 'config'
-            df_final.to_csv(config.ARQUIVO_CONSOLIDADO, index=False, sep=';', encoding='utf-8')
+            salvar_dados_consolidados(df_final)
             # --- CORREÇÃO FINALIZADA ---
             st.session_state.categorizacao_concluida = True
             st.rerun()
@@ -115,10 +115,10 @@ def layout():
         if st.button("Concluir e Salvar Dados", type="primary"):
             with st.spinner("Salvando dados consolidados..."):
                 df_final = st.session_state.df_em_processo.copy()
-                df_final['Pagador'].fillna('Não Aplicável', inplace=True)
+                df_final['Pagador'] = df_final['Pagador'].fillna('Não Aplicável')
                 # --- CORREÇÃO INICIADA ---
                 # Acessando a variável através do objeto 'config'
-                df_final.to_csv(config.ARQUIVO_CONSOLIDADO, index=False, sep=';', encoding='utf-8')
+                salvar_dados_consolidados(df_final)
                 # --- CORREÇÃO FINALIZADA ---
                 st.session_state.categorizacao_concluida = True
                 st.rerun()
@@ -6,10 +6,8 @@ import re
 import logging
 
 # --- CORREÇÃO INICIADA ---
-# A importação foi dividida. 'chatbot_financeiro' vem do backend,
-# mas as configurações como 'ARQUIVO_CONSOLIDADO' vêm do objeto 'config'.
-from backend import chatbot_financeiro
-from config import config
+# A importação foi dividida. 'chatbot_financeiro' e o acesso aos dados consolidados vêm do backend.
+from backend import chatbot_financeiro, dados_consolidados_disponiveis, obter_dados_consolidados
 # --- CORREÇÃO FINALIZADA ---
 
 logger = logging.getLogger(__name__)
@@ -38,17 +36,17 @@ def layout():
     # Prepara os dataframes para o agente de IA
     try:
         # --- CORREÇÃO INICIADA ---
-        # A variável agora é acessada através do objeto 'config'
-        if not config.ARQUIVO_CONSOLIDADO.exists():
-             st.error("O arquivo de dados consolidados (dados_consolidados.csv) não foi encontrado. Por favor, processe as faturas primeiro na página 'Processamento'.")
+        # Os dados vêm do provedor compartilhado (armazém Parquet ou CSV consolidado)
+        if not dados_consolidados_disponiveis():
+             st.error("Os dados consolidados não foram encontrados. Por favor, processe as faturas primeiro na página 'Processamento'.")
              return
         
-        df1 = pd.read_csv(config.ARQUIVO_CONSOLIDADO, sep=';')
+        df1 = obter_dados_consolidados()
         # --- CORREÇÃO FINALIZADA ---
         
         # Validação de dados
         if df1.empty:
-            st.error("O arquivo de dados consolidados está vazio. Por favor, processe as faturas primeiro.")
+            st.error("Os dados consolidados estão vazios. Por favor, processe as faturas primeiro.")
             return
         
         required_columns = ['Data', 'Estabelecimento', 'Valor', 'Tipo']
@@ -57,17 +55,13 @@ def layout():
             st.error(f"Colunas obrigatórias ausentes no arquivo de dados: {missing_columns}")
             return
         
-        # Garante que a coluna 'Data' esteja no formato datetime antes de passar para o agente.
-        df1['Data'] = pd.to_datetime(df1['Data'], errors='coerce')
-        
-        # Remove linhas com datas inválidas
+        # 'Data' e 'Valor' já vêm tipados do provedor; o que não converteu está como NaT/NaN
         invalid_dates = df1['Data'].isna().sum()
         if invalid_dates > 0:
             st.warning(f"Encontradas {invalid_dates} linhas com datas inválidas. Estas serão ignoradas.")
             df1 = df1.dropna(subset=['Data'])
         
         # Valida valores numéricos
-        df1['Valor'] = pd.to_numeric(df1['Valor'], errors='coerce')
         invalid_values = df1['Valor'].isna().sum()
         if invalid_values > 0:
             st.warning(f"Encontrados {invalid_values} valores inválidos na coluna 'Valor'. Estes serão ignorados.")
@@ -77,18 +71,18 @@ def layout():
             st.error("Após a limpeza, não restaram dados válidos para análise.")
             return
 
-        df2 = df1.groupby('Estabelecimento')['Valor'].sum().reset_index()
+        df2 = df1.groupby('Estabelecimento', observed=True)['Valor'].sum().reset_index()
         df_temp_mes = df1.copy()
         df_temp_mes['Mes'] = df_temp_mes['Data'].dt.to_period('M').astype(str)
-        df3 = df_temp_mes.groupby(['Mes', 'Categoria', 'Pagador'])['Valor'].sum().reset_index()
+        df3 = df_temp_mes.groupby(['Mes', 'Categoria', 'Pagador'], observed=True)['Valor'].sum().reset_index()
         
         dfs_para_agente = [df1, df2, df3]
 
     except FileNotFoundError:
-        st.error("O arquivo de dados consolidados (dados_consolidados.csv) não foi encontrado. Por favor, processe as faturas primeiro.")
+        st.error("Os dados consolidados não foram encontrados. Por favor, processe as faturas primeiro.")
         return
     except pd.errors.EmptyDataError:
-        st.error("O arquivo de dados consolidados está vazio. Por favor, processe as faturas primeiro.")
+        st.error("Os dados consolidados estão vazios. Por favor, processe as faturas primeiro.")
         return
     except pd.errors.ParserError as e:
         st.error(f"Erro ao ler o arquivo de dados: {e}. Verifique se o formato está correto.")
@@ -11,7 +11,10 @@ import pandas as pd
 # Se 'app.py' está na raiz de 'app', os imports precisam ser ajustados
 # dependendo de como você executa o Streamlit.
 # Por enquanto, vamos manter como está.
-from backend import config, carregar_json, salvar_json, salvar_configuracao_modelo, carregar_configuracao_modelo
+from backend import (
+    config, carregar_json, salvar_json, salvar_configuracao_modelo, carregar_configuracao_modelo,
+    dados_consolidados_disponiveis, provedor_dados, data_cache, cache_metrics
+)
 from componentes.ui_components import (
     apply_custom_css, create_header, create_info_card, create_metric_card,
     create_interactive_button, create_progress_bar, create_status_indicator,
@@ -20,7 +23,7 @@ from componentes.ui_components import (
 
 # File paths for settings
 SETTINGS_FILE = config.PASTA_PROCESSADOS / "configuracoes.json"
-CATEGORIAS_FILE = config.PASTA_PROCESSADOS / "categorias_customizadas.json"
+CATEGORIAS_FILE = config.ARQUIVO_CATEGORIAS_CUSTOMIZADAS
 
 def carregar_configuracoes():
     """Carrega configurações salvas."""
@@ -58,7 +61,7 @@ def verificar_sistema():
     status['data_files'] = len(credit_files) > 0 or len(debit_files) > 0
     
     # Verificar dados processados
-    status['processed_data'] = config.ARQUIVO_CONSOLIDADO.exists()
+    status['processed_data'] = dados_consolidados_disponiveis()
     
     # Verificar cache
     status['cache'] = config.PASTA_CACHE.exists()
@@ -98,11 +101,9 @@ def calcular_estatisticas_sistema():
             config.ARQUIVO_CONSOLIDADO.stat().st_mtime
         )
     
-    # Calcular tamanho do cache
+    # Tamanho do cache vem do índice do DataCache (sem percorrer a pasta)
     if config.PASTA_CACHE.exists():
-        for file in config.PASTA_CACHE.rglob("*"):
-            if file.is_file():
-                stats['cache_size'] += file.stat().st_size
+        stats['cache_size'] = data_cache.total_bytes()
     
     # Contar relatórios gerados
     if config.PASTA_RELATORIOS.exists():
@@ -463,6 +464,54 @@ def layout():
                 f"• Relatórios: {len(list(config.PASTA_RELATORIOS.glob('*.pdf')))} arquivos",
                 "info"
             )
+        
+        # Memória ocupada pelo consolidado compartilhado entre as páginas
+        if status['processed_data']:
+            st.subheader("Memória do Consolidado")
+            memoria = provedor_dados.relatorio_memoria()
+            
+            if not memoria.empty:
+                antes, depois = memoria['Antes'].sum(), memoria['Depois'].sum()
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    create_metric_card("Sem Compactação", f"{antes / (1024*1024):.1f} MB", "texto como string")
+                with col2:
+                    create_metric_card("Em Uso", f"{depois / (1024*1024):.1f} MB", "com colunas categóricas")
+                with col3:
+                    create_metric_card("Economia", f"{(1 - depois / antes) * 100:.0f}%" if antes else "0%", "de memória")
+                
+                tabela = memoria.reset_index()
+                tabela['Antes (KB)'] = (tabela.pop('Antes') / 1024).round(1)
+                tabela['Depois (KB)'] = (tabela.pop('Depois') / 1024).round(1)
+                st.dataframe(tabela, use_container_width=True, hide_index=True)
+        
+        # Acertos, tamanho e latência de cada cache (contadores deste processo)
+        st.subheader("Métricas de Cache")
+        metricas = cache_metrics.report()
+        
+        if metricas.empty:
+            st.info("Nenhum cache foi consultado ainda nesta sessão do servidor.")
+        else:
+            acertos, falhas = metricas['hits'].sum(), metricas['misses'].sum()
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                create_metric_card("Taxa de Acerto", f"{acertos / (acertos + falhas) * 100:.0f}%" if acertos + falhas else "-",
+                                   f"{acertos} acertos · {falhas} falhas")
+            with col2:
+                create_metric_card("Remoções", f"{metricas['evictions'].sum()}", "por TTL ou limite de bytes")
+            with col3:
+                create_metric_card("TTL / Limites", f"{config.CACHE_TTL // 60} min",
+                                   f"disco {config.CACHE_MAX_BYTES / (1024*1024):.0f} MB · "
+                                   f"memória {config.CACHE_MEMORIA_MAX_BYTES / (1024*1024):.0f} MB")
+            
+            tabela = metricas.reset_index().rename(columns={
+                'namespace': 'Cache', 'hits': 'Acertos', 'misses': 'Falhas', 'evictions': 'Remoções',
+                'entries': 'Entradas', 'load_ms': 'Leitura (ms)', 'load_max_ms': 'Leitura Máx (ms)',
+                'compute_ms': 'Cálculo (ms)', 'compute_max_ms': 'Cálculo Máx (ms)'
+            })
+            tabela['Taxa de Acerto (%)'] = (tabela.pop('hit_rate') * 100).round(1)
+            tabela['Tamanho (KB)'] = (tabela.pop('bytes') / 1024).round(1)
+            st.dataframe(tabela.round(2), use_container_width=True, hide_index=True)
     
     with tab5:
         st.subheader("Ferramentas de Manutenção")
@@ -474,9 +523,7 @@ def layout():
             
             if st.button("🧹 Limpar Cache", key="limpar_cache"):
                 if config.PASTA_CACHE.exists():
-                    for file in config.PASTA_CACHE.rglob("*"):
-                        if file.is_file():
-                            file.unlink()
+                    data_cache.clear()
                     st.success("Cache limpo com sucesso!")
                 else:
                     st.info("Cache já está vazio.")
@@ -9,10 +9,11 @@ import numpy as np
 from typing import Dict, List, Tuple
 
 # --- CORREÇÃO INICIADA ---
-# As importações foram separadas. Funções vêm do backend,
-# e o objeto de configuração vem de config.py.
-from backend import processar_faturas
-from config import config
+# As importações foram separadas. Funções e o acesso aos dados consolidados vêm do backend.
+from backend import (
+    processar_faturas,
+    dados_consolidados_disponiveis, obter_dados_consolidados
+)
 from componentes.ui_components import (
     apply_custom_css, create_header, create_metric_card, create_info_card,
     create_progress_bar, create_gauge_chart, create_waterfall_chart,
@@ -22,17 +23,15 @@ from componentes.ui_components import (
 )
 # --- CORREÇÃO FINALIZADA ---
 
-@st.cache_data
 def carregar_dados():
-    """Carrega dados financeiros."""
+    """Carrega dados financeiros do provedor compartilhado (relido só quando há nova publicação)."""
     try:
         # --- CORREÇÃO INICIADA ---
-        # Acessando a variável através do objeto 'config'
-        if not config.ARQUIVO_CONSOLIDADO.exists():
+        # Os dados vêm do provedor compartilhado (armazém Parquet ou CSV consolidado)
+        if not dados_consolidados_disponiveis():
             return pd.DataFrame()
-        df = pd.read_csv(str(config.ARQUIVO_CONSOLIDADO), sep=';')
+        df = obter_dados_consolidados()
         # --- CORREÇÃO FINALIZADA ---
-        df['Data'] = pd.to_datetime(df['Data'])
         return df
     except FileNotFoundError:
         return pd.DataFrame()
@@ -103,7 +102,7 @@ def criar_grafico_evolucao_mensal(df: pd.DataFrame) -> go.Figure:
         return go.Figure()
     
     df['Mes'] = df['Data'].dt.to_period('M').astype(str)
-    df_mensal = df.groupby(['Mes', 'Tipo'])['Valor'].sum().reset_index()
+    df_mensal = df.groupby(['Mes', 'Tipo'], observed=True)['Valor'].sum().reset_index()
     
     # Separar receitas e despesas
     receitas = df_mensal[df_mensal['Tipo'] == 'Receita']
@@ -153,7 +152,7 @@ def criar_grafico_categorias_donut(df: pd.DataFrame) -> go.Figure:
         return go.Figure()
     
     # Agrupar por categoria
-    categorias = df_despesas.groupby('Categoria')['Valor'].sum().abs()
+    categorias = df_despesas.groupby('Categoria', observed=True)['Valor'].sum().abs()
     
     # Criar donut chart
     fig = create_donut_chart(
@@ -180,7 +179,7 @@ def criar_grafico_top_estabelecimentos(df: pd.DataFrame) -> go.Figure:
         return go.Figure()
     
     # Top 10 estabelecimentos
-    top_estabelecimentos = df_despesas.groupby('Estabelecimento')['Valor'].sum().abs().nlargest(10)
+    top_estabelecimentos = df_despesas.groupby('Estabelecimento', observed=True)['Valor'].sum().abs().nlargest(10)
     
     fig = px.bar(
         x=top_estabelecimentos.values,
@@ -214,7 +213,7 @@ def criar_heatmap_diario(df: pd.DataFrame) -> go.Figure:
     df_despesas['Mes'] = df_despesas['Data'].dt.month_name()
     
     # Agrupar por dia da semana e mês
-    heatmap_data = df_despesas.groupby(['DiaSemana', 'Mes'])['Valor'].sum().abs().reset_index()
+    heatmap_data = df_despesas.groupby(['DiaSemana', 'Mes'], observed=True)['Valor'].sum().abs().reset_index()
     
     # Pivotar para formato de heatmap
     heatmap_pivot = heatmap_data.pivot(index='DiaSemana', columns='Mes', values='Valor')
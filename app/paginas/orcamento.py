@@ -12,7 +12,10 @@ from pathlib import Path
 # --- CORREÇÃO INICIADA ---
 # As importações foram separadas. Funções vêm do backend,
 # e o objeto de configuração vem de config.py.
-from backend import carregar_json, salvar_json
+from backend import (
+    carregar_json, salvar_json, somar_valores,
+    dados_consolidados_disponiveis, obter_dados_consolidados, COLUNA_CENTAVOS
+)
 from config import config
 # --- CORREÇÃO FINALIZADA ---
 
@@ -49,7 +52,7 @@ def calcular_gastos_reais(df, mes_atual=None):
     else:
         df_filtrado = df[df['Tipo'] == 'Despesa']
     
-    return df_filtrado.groupby('Categoria')['Valor'].sum().abs()
+    return somar_valores(df_filtrado, 'Categoria').abs()
 
 def calcular_progresso_orcamento(orcamento, gastos_reais):
     """Calcula progresso do orçamento."""
@@ -170,11 +173,11 @@ def layout():
     try:
         # --- CORREÇÃO INICIADA ---
         # Acessando a variável através do objeto 'config'
-        if not config.ARQUIVO_CONSOLIDADO.exists():
+        if not dados_consolidados_disponiveis():
             df = pd.DataFrame()
         else:
-            df = pd.read_csv(str(config.ARQUIVO_CONSOLIDADO), sep=';')
-            df['Data'] = pd.to_datetime(df['Data'])
+            # O orçamento só precisa das despesas por categoria e data
+            df = obter_dados_consolidados(['Data', 'Tipo', 'Categoria', 'Valor', COLUNA_CENTAVOS])
         # --- CORREÇÃO FINALIZADA ---
     except FileNotFoundError:
         df = pd.DataFrame()
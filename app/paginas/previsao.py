@@ -1,16 +1,13 @@
 # finbot_project/app/paginas/previsao.py
 
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
 # --- CORREÇÃO INICIADA ---
-# A importação foi dividida. A função vem do 'backend' e a
-# configuração de arquivo vem do objeto 'config'.
-from backend import prever_gastos, debug_dados_previsao
-from config import config
+# A importação foi dividida. As funções e o acesso aos dados consolidados vêm do 'backend'.
+from backend import prever_gastos, debug_dados_previsao, dados_consolidados_disponiveis, obter_dados_consolidados
 # --- CORREÇÃO FINALIZADA ---
 
 def layout():
@@ -22,11 +19,11 @@ def layout():
 
     try:
         # --- CORREÇÃO INICIADA ---
-        # Acessando a variável através do objeto 'config'
-        if not config.ARQUIVO_CONSOLIDADO.exists():
+        # Os dados vêm do provedor compartilhado (armazém Parquet ou CSV consolidado)
+        if not dados_consolidados_disponiveis():
             st.error("Arquivo de dados consolidados não encontrado. Processe suas faturas primeiro na página 'Processamento'.")
             return
-        df_historico = pd.read_csv(config.ARQUIVO_CONSOLIDADO, sep=';')
+        df_historico = obter_dados_consolidados()
         # --- CORREÇÃO FINALIZADA ---
     except FileNotFoundError:
         st.error("Arquivo de dados consolidados não encontrado. Processe suas faturas primeiro.")
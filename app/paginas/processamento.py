@@ -13,7 +13,8 @@ from pathlib import Path
 # e o objeto de configuração vem de config.py.
 from backend import (
     data_processor, carregar_json,
-    DataValidationResult, quality_monitor
+    DataValidationResult, quality_monitor,
+    dados_consolidados_disponiveis, obter_dados_consolidados
 )
 from config import config
 # --- CORREÇÃO FINALIZADA ---
@@ -23,11 +24,10 @@ def carregar_dados_processados():
     try:
         # --- CORREÇÃO INICIADA ---
         # Acessando a variável através do objeto 'config'
-        if not config.ARQUIVO_CONSOLIDADO.exists():
+        if not dados_consolidados_disponiveis():
             return pd.DataFrame()
-        df = pd.read_csv(str(config.ARQUIVO_CONSOLIDADO), sep=';')
+        df = obter_dados_consolidados()
         # --- CORREÇÃO FINALIZADA ---
-        df['Data'] = pd.to_datetime(df['Data'])
         return df
     except FileNotFoundError:
         return pd.DataFrame()
@@ -291,7 +291,7 @@ def layout():
             
             # Monthly transaction volume
             df['Mes'] = df['Data'].dt.to_period('M')
-            monthly_volume = df.groupby('Mes').size().reset_index(name='Transacoes')
+            monthly_volume = df.groupby('Mes', observed=True).size().reset_index(name='Transacoes')
             monthly_volume['Mes'] = monthly_volume['Mes'].astype(str)
             
             fig_monthly = px.line(
@@ -404,6 +404,8 @@ def layout():
             if 'duplicates' in metrics:
                 st.write("**Duplicatas:**")
                 st.write(f"- Total: {metrics['duplicates']['count']} ({metrics['duplicates']['rate']:.1f}%)")
+                if 'possible' in metrics['duplicates']:
+                    st.write(f"- Possíveis duplicatas para revisão: {metrics['duplicates']['possible']}")
             
             # Value range
             if 'value_range' in metrics:
@@ -3,13 +3,15 @@
 import streamlit as st
 import base64
 import os
-import pandas as pd
 from datetime import datetime
 
 # --- CORREÇÃO INICIADA ---
 # A importação foi dividida. A função vem do 'backend' e as
 # configurações de pastas vêm do objeto 'config'.
-from backend import gerar_relatorio_pdf, obter_periodos_disponiveis
+from backend import (
+    gerar_relatorio_pdf, obter_periodos_disponiveis,
+    dados_consolidados_disponiveis, contar_transacoes, intervalo_do_mes
+)
 from config import config
 # --- CORREÇÃO FINALIZADA ---
 
@@ -60,21 +62,21 @@ def layout():
             format_func=lambda mes: datetime(ano_selecionado, mes, 1).strftime("%B"),
             index=len(meses_disponiveis) - 1  # Seleciona o mês mais recente por padrão
         )
+    
+    resumo = periodos["resumo"].get((ano_selecionado, mes_selecionado))
+    if resumo:
+        st.caption(f"{resumo['transacoes']} transações · Receitas R$ {resumo['receitas']:,.2f} · "
+                   f"Despesas R$ {abs(resumo['despesas']):,.2f}")
 
     if st.button("Gerar Relatório PDF", key="gerar_relatorio_btn"):
         with st.spinner(f"Gerando relatório para {mes_selecionado:02d}/{ano_selecionado}..."):
             try:
-                # Carregar dados para o período selecionado
-                if config.ARQUIVO_CONSOLIDADO.exists():
-                    df = pd.read_csv(config.ARQUIVO_CONSOLIDADO, sep=';', parse_dates=['Data'])
-                    # Filtrar dados para o período selecionado
-                    df_periodo = df[
-                        (df['Data'].dt.year == ano_selecionado) & 
-                        (df['Data'].dt.month == mes_selecionado)
-                    ]
+                # Os totais do mês vêm da camada de consultas (SQL ou só o período no armazém)
+                if dados_consolidados_disponiveis():
+                    inicio, fim = intervalo_do_mes(ano_selecionado, mes_selecionado)
                     
-                    if not df_periodo.empty:
-                        caminho_pdf = gerar_relatorio_pdf(df, ano_selecionado, mes_selecionado)
+                    if contar_transacoes(inicio, fim) > 0:
+                        caminho_pdf = gerar_relatorio_pdf(None, ano_selecionado, mes_selecionado)
                         if caminho_pdf:
                             st.success(f"Relatório gerado com sucesso! '{os.path.basename(caminho_pdf)}'")
                             st.balloons()
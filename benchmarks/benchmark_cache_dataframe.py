@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos formatos do DataCache para DataFrames.
+Compara Arrow IPC, Parquet e pickle: tempo de escrita, tempo de leitura
+(a partir do disco, sem a camada em memória) e tamanho do arquivo.
+
+Uso: python benchmarks/benchmark_cache_dataframe.py [linhas ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app')
+sys.path.insert(0, APP_DIR)
+
+from backend import DataCache, pa  # noqa: E402
+from benchmark_leitura_csv import gerar_consolidado  # noqa: E402
+
+TAMANHOS_PADRAO = [500_000]
+FORMATOS = ('arrow', 'parquet', 'pickle')
+REPETICOES = 3
+
+def medir_formato(formato: str, df: pd.DataFrame, pasta: str) -> tuple:
+    """(melhor escrita, melhor leitura, tamanho em MB) de um formato."""
+    cache = DataCache(os.path.join(pasta, formato), ttl=0, max_bytes=0, memory_max_bytes=0,
+                      formats=(formato,))
+    escritas, leituras = [], []
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        cache.set('transacoes', df)
+        escritas.append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        lido = cache.get('transacoes')
+        leituras.append(time.perf_counter() - inicio)
+    pd.testing.assert_frame_equal(lido, df)
+    return min(escritas), min(leituras), cache.total_bytes() / 1024 ** 2
+
+def main():
+    tamanhos = [int(arg) for arg in sys.argv[1:]] or TAMANHOS_PADRAO
+    formatos = FORMATOS if pa is not None else ('pickle',)
+    print(f"pandas {pd.__version__} / numpy {np.__version__} / pyarrow {pa.__version__ if pa else 'ausente'}")
+    print(f"{'linhas':>10} {'formato':>8} {'escrita':>9} {'leitura':>9} {'arquivo':>10}")
+
+    for linhas in tamanhos:
+        df = gerar_consolidado(linhas)
+        with tempfile.TemporaryDirectory() as pasta:
+            for formato in formatos:
+                escrita, leitura, tamanho = medir_formato(formato, df, pasta)
+                print(f"{linhas:>10,} {formato:>8} {escrita:>8.3f}s {leitura:>8.3f}s {tamanho:>7.1f} MB")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark da leitura do CSV consolidado.
+Compara ler_csv com o motor C do pandas e com o pyarrow (tempo de parse e memória).
+
+Cada medição roda em um processo novo, para que o pico de memória residente
+(RSS) de um motor não contamine o outro.
+
+Uso: python benchmarks/benchmark_leitura_csv.py [linhas ...]
+"""
+
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app')
+sys.path.insert(0, APP_DIR)
+
+TAMANHOS_PADRAO = [100_000, 500_000]
+REPETICOES = 3
+
+def gerar_consolidado(linhas: int) -> pd.DataFrame:
+    """Gera um frame com as colunas de dados_consolidados.csv."""
+    rng = np.random.default_rng(42)
+    estabelecimentos = np.array([f"Estabelecimento {i}" for i in range(2_000)])
+    categorias = np.array(['Alimentação', 'Transporte', 'Saúde', 'Lazer', 'Moradia', 'Outros'])
+    valores = rng.integers(-500_000, 50_000, linhas) / 100
+    return pd.DataFrame({
+        'Data': pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 5 * 365, linhas), unit='D'),
+        'Estabelecimento': rng.choice(estabelecimentos, linhas),
+        'Valor': valores,
+        'Tipo': np.where(valores >= 0, 'Receita', 'Despesa'),
+        'Categoria': rng.choice(categorias, linhas),
+        'Confianca_Categoria': rng.random(linhas).round(2),
+        'Pagador': rng.choice(['Ana', 'Bruno', 'Não Aplicável'], linhas),
+    })
+
+def medir_motor(motor: str, caminho: str) -> tuple:
+    """Executado no processo filho: (melhor tempo, memória do DataFrame, pico de RSS em MB)."""
+    sys.path.insert(0, APP_DIR)
+    from backend import config, ler_csv, motor_csv
+
+    config.CSV_ENGINE = motor
+    if motor_csv() != motor:
+        return None
+
+    tempos = []
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        df = ler_csv(caminho, sep=';')
+        tempos.append(time.perf_counter() - inicio)
+    memoria = df.memory_usage(deep=True).sum() / 1024 ** 2
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB no Linux
+    return min(tempos), memoria, rss
+
+def main():
+    tamanhos = [int(arg) for arg in sys.argv[1:]] or TAMANHOS_PADRAO
+    contexto = multiprocessing.get_context('spawn')
+    print(f"pandas {pd.__version__} / numpy {np.__version__}")
+    print(f"{'linhas':>10} {'motor':>8} {'tempo':>9} {'DataFrame':>11} {'pico RSS':>10}")
+
+    for linhas in tamanhos:
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, 'dados_consolidados.csv')
+            gerar_consolidado(linhas).to_csv(caminho, index=False, sep=';', encoding='utf-8')
+
+            for motor in ('c', 'pyarrow'):
+                with contexto.Pool(1) as pool:
+                    resultado = pool.apply(medir_motor, (motor, caminho))
+                if resultado is None:
+                    print(f"{linhas:>10,} {motor:>8}   (pyarrow não instalado)")
+                    continue
+                tempo, memoria, rss = resultado
+                print(f"{linhas:>10,} {motor:>8} {tempo:>8.3f}s {memoria:>8.1f} MB {rss:>7.0f} MB")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark do parser de valores em reais.
+Compara parse_brl_centavos com a cadeia antiga de .str.replace + to_numeric.
+
+Uso: python benchmarks/benchmark_parser_moeda.py [linhas ...]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+
+from backend import parse_brl_centavos  # noqa: E402
+
+TAMANHOS_PADRAO = [100_000, 1_000_000]
+REPETICOES = 3
+
+def gerar_valores(linhas: int) -> pd.Series:
+    """Gera valores no formato dos extratos ('R$ -1.234,56', '89,90')."""
+    rng = np.random.default_rng(42)
+    centavos = rng.integers(-1_000_000, 10_000_000, linhas)
+    texto = [f"{abs(c) / 100:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.') for c in centavos]
+    prefixo = np.where(rng.random(linhas) < 0.5, 'R$ ', '')
+    sinal = np.where(centavos < 0, '-', '')
+    return pd.Series([p + s + t for p, s, t in zip(prefixo, sinal, texto)], dtype=object)
+
+def cadeia_antiga(serie: pd.Series) -> pd.Series:
+    """Limpeza usada antes do parser (cinco cópias da coluna)."""
+    limpo = (serie.astype(str)
+             .str.replace('R$', '', regex=False)
+             .str.replace('.', '', regex=False)
+             .str.strip()
+             .str.replace(',', '.', regex=False))
+    return pd.to_numeric(limpo, errors='coerce')
+
+def medir(funcao, serie: pd.Series) -> float:
+    """Melhor tempo de REPETICOES execuções, em segundos."""
+    tempos = []
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        funcao(serie)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+def main():
+    tamanhos = [int(arg) for arg in sys.argv[1:]] or TAMANHOS_PADRAO
+    print(f"pandas {pd.__version__} / numpy {np.__version__}")
+    print(f"{'linhas':>10} {'cadeia antiga':>15} {'parser':>10} {'ganho':>8}")
+
+    for linhas in tamanhos:
+        serie = gerar_valores(linhas)
+        centavos, invalidos = parse_brl_centavos(serie)
+        esperado = np.rint(cadeia_antiga(serie).to_numpy() * 100).astype(np.int64)
+        assert len(invalidos) == 0 and np.array_equal(centavos, esperado), "Resultados divergentes!"
+
+        t_antiga = medir(cadeia_antiga, serie)
+        t_parser = medir(parse_brl_centavos, serie)
+        print(f"{linhas:>10,} {t_antiga:>14.3f}s {t_parser:>9.3f}s {t_antiga / t_parser:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,15 @@
 # tests/test_backend.py
 
+import functools
 import unittest
 import pandas as pd
 import tempfile
 import os
 import json
+import shutil
 import sys
 from datetime import datetime
+from pathlib import Path
 from unittest.mock import patch, MagicMock
 
 # Add the app directory to the Python path
@@ -20,8 +23,44 @@ from backend import (
     SecurityConfig, RateLimiter, DataCache,
     carregar_json, salvar_json, atualizar_contexto_pagador,
     processar_extrato_credito, processar_extrato_debito,
-    aplicar_regras_contexto, criar_graficos
+    aplicar_regras_contexto, criar_graficos,
+    IngestionManifest, DataProcessor, config,
+    parse_brl_centavos, adicionar_coluna_centavos, somar_valores,
+    converter_datas, detectar_formato_data, detectar_leitura,
+    MonitorPastas, salvar_dados_consolidados, versao_dados_consolidados,
+    identificar_transacoes, marcar_possiveis_duplicatas, ler_csv,
+    ArmazemTransacoes, BancoTransacoes, ProvedorDados, ArquivoRegras, InstantaneoArrow, cached_function,
+    CacheMetrics
 )
+import backend
+
+class TemporaryFolderTestCase(unittest.TestCase):
+    """Base for tests working in a temporary folder that is removed after each test."""
+    
+    def setUp(self):
+        """Create the temporary folder."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+    
+    def start_patch(self, patcher):
+        """Start a patcher and stop it when the test ends (before the folder is removed)."""
+        started = patcher.start()
+        self.addCleanup(patcher.stop)
+        return started
+    
+    def patch_config(self, **values):
+        """Override config attributes, e.g. data paths inside temp_dir, for the test."""
+        for name, value in values.items():
+            self.start_patch(patch.object(config, name, value))
+
+def consolidated_paths(temp_dir: str) -> dict:
+    """Config paths of the published consolidated data, moved inside `temp_dir`."""
+    return {
+        'ARQUIVO_CONSOLIDADO': Path(temp_dir) / 'dados_consolidados.csv',
+        'PASTA_TRANSACOES': Path(temp_dir) / 'transacoes',
+        'PASTA_INSTANTANEOS': Path(temp_dir) / 'instantaneos',
+        'ARQUIVO_CATALOGO_PERIODOS': Path(temp_dir) / 'catalogo_periodos.json',
+    }
 
 class TestSecurityConfig(unittest.TestCase):
     """Test security configuration functions."""
@@ -85,19 +124,14 @@ class TestRateLimiter(unittest.TestCase):
             mock_time.return_value = 100  # Advance time
             self.assertTrue(self.rate_limiter.can_call())
 
-class TestDataCache(unittest.TestCase):
+class TestDataCache(TemporaryFolderTestCase):
     """Test data caching functionality."""
     
     def setUp(self):
         """Set up test cache."""
-        self.temp_dir = tempfile.mkdtemp()
+        super().setUp()
         self.cache = DataCache(self.temp_dir)
     
-    def tearDown(self):
-        """Clean up test cache."""
-        import shutil
-        shutil.rmtree(self.temp_dir)
-    
     def test_set_and_get(self):
         """Test setting and getting cache data."""
         test_data = {"test": "data"}
@@ -108,6 +142,233 @@ class TestDataCache(unittest.TestCase):
     def test_get_nonexistent(self):
         """Test getting nonexistent cache data."""
         self.assertIsNone(self.cache.get("nonexistent_key"))
+    
+    def test_entries_expire_after_ttl(self):
+        """Test entries older than the TTL are dropped."""
+        cache = DataCache(self.temp_dir, ttl=60)
+        with patch('time.time', return_value=1000.0):
+            cache.set("antigo", [1, 2, 3])
+        with patch('time.time', return_value=1030.0):
+            self.assertEqual(cache.get("antigo"), [1, 2, 3])
+        with patch('time.time', return_value=1061.0):
+            self.assertIsNone(cache.get("antigo"))
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir, "antigo.pkl")))
+    
+    def test_lru_eviction_within_budget(self):
+        """Test the least recently used entries are evicted past the byte budget."""
+        cache = DataCache(self.temp_dir, ttl=0, max_bytes=3500)
+        for i, chave in enumerate(["a", "b", "c"]):
+            with patch('time.time', return_value=1000.0 + i * 100):
+                cache.set(chave, b"x" * 1000)
+        with patch('time.time', return_value=1400.0):
+            cache.get("a")
+            cache.set("d", b"x" * 1000)
+        
+        self.assertEqual(sorted(cache.index.dados()), ["a", "c", "d"])
+        self.assertLessEqual(cache.total_bytes(), 3500)
+        self.assertIsNone(cache.get("b"))
+    
+    def test_memory_tier_serves_hot_entries(self):
+        """Test repeated reads come from memory and return the cached object itself."""
+        dados = {"valores": list(range(100))}
+        self.cache.set("quente", dados)
+        
+        self.assertIs(self.cache.get("quente"), dados)
+        self.assertIs(self.cache.get("quente"), dados)
+        self.assertEqual(self.cache.stats['memory']['hits'], 2)
+        self.assertEqual(self.cache.stats['disk'], {'hits': 0, 'misses': 0})
+    
+    def test_memory_overflow_is_demoted_to_disk(self):
+        """Test entries pushed out of memory are still read from disk and promoted back."""
+        cache = DataCache(self.temp_dir, memory_max_bytes=1500)
+        cache.set("a", b"x" * 1000)
+        cache.set("b", b"y" * 1000)
+        
+        self.assertEqual(list(cache._memory), ["b"])
+        self.assertEqual(cache.get("a"), b"x" * 1000)
+        self.assertEqual(cache.stats['disk']['hits'], 1)
+        self.assertEqual(list(cache._memory), ["a"])
+        
+        # Another process replacing the entry on disk invalidates the copy in memory
+        DataCache(self.temp_dir).set("a", b"z")
+        self.assertEqual(cache.get("a"), b"z")
+        self.assertEqual(cache.stats['disk']['hits'], 2)
+
+    def test_values_use_type_aware_formats(self):
+        """Test frames and series are stored as Arrow and plain dicts as JSON."""
+        df = pd.DataFrame({
+            'Data': pd.to_datetime(['2025-01-05', '2025-01-06']),
+            'Descricao': ['Salario', 'Mercado Extra'],
+            'Valor': [5000.0, -250.4],
+            'Categoria': pd.Categorical(['Receita', 'Alimentação'])
+        })
+        serie = df.set_index('Descricao')['Valor']
+        self.cache.set("df", df)
+        self.cache.set("serie", serie)
+        self.cache.set("resumo", {"total": 4749.6, "meses": ["2025-01"]})
+        
+        for chave, extensao in [("df", ".arrow"), ("serie", ".arrow"), ("resumo", ".json")]:
+            self.assertTrue(os.path.exists(os.path.join(self.temp_dir, chave + extensao)))
+        
+        cache = DataCache(self.temp_dir)  # Empty memory tier: everything comes from disk
+        pd.testing.assert_frame_equal(cache.get("df"), df)
+        pd.testing.assert_series_equal(cache.get("serie"), serie)
+        self.assertEqual(cache.get("resumo"), {"total": 4749.6, "meses": ["2025-01"]})
+    
+    def test_pickle_only_as_explicit_fallback(self):
+        """Test values without a safe format are skipped, and pickles never loaded, without the fallback."""
+        self.cache.set("tupla", (1, 2))
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir, "tupla.pkl")))
+        
+        cache = DataCache(self.temp_dir, formats=('arrow', 'json'))
+        self.assertIsNone(cache.get("tupla"))
+        cache.set("conjunto", {1, 2})
+        self.assertIsNone(cache.index.obter("conjunto"))
+        with self.assertRaises(ValueError):
+            DataCache(self.temp_dir, formats=('yaml',))
+
+class TestCacheSingleFlight(TemporaryFolderTestCase):
+    """Test concurrent misses on one key compute the value once."""
+    
+    def _calcular_devagar(self):
+        """Append to a counter file (visible across processes) and take a while."""
+        import time
+        with open(os.path.join(self.temp_dir, 'calculos.txt'), 'a') as f:
+            f.write('x\n')
+        time.sleep(0.3)
+        return {"total": 42}
+    
+    def _calculos(self):
+        with open(os.path.join(self.temp_dir, 'calculos.txt')) as f:
+            return len(f.readlines())
+    
+    def test_threads_share_one_computation(self):
+        """Test threads missing together wait for the first one's result."""
+        import threading
+        cache = DataCache(self.temp_dir)
+        resultados = []
+        threads = [threading.Thread(target=lambda: resultados.append(cache.get_or_compute("k", self._calcular_devagar)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(resultados, [{"total": 42}] * 4)
+        self.assertEqual(self._calculos(), 1)
+    
+    @unittest.skipUnless(backend.fcntl is not None and hasattr(os, 'fork'), "requires flock and fork")
+    def test_processes_share_one_computation(self):
+        """Test processes with their own DataCache coordinate through the key lock file."""
+        import multiprocessing
+        contexto = multiprocessing.get_context('fork')
+        
+        def trabalhador():
+            DataCache(self.temp_dir).get_or_compute("k", self._calcular_devagar)
+        
+        processos = [contexto.Process(target=trabalhador) for _ in range(3)]
+        for processo in processos:
+            processo.start()
+        for processo in processos:
+            processo.join(timeout=10)
+        
+        self.assertEqual([processo.exitcode for processo in processos], [0, 0, 0])
+        self.assertEqual(self._calculos(), 1)
+        self.assertEqual(DataCache(self.temp_dir).get("k"), {"total": 42})
+        self.assertEqual([f for f in os.listdir(self.temp_dir) if f.endswith('.tmp')], [])
+    
+    def test_lock_files_bounded_by_stripes(self):
+        """Test locking many keys reuses the striped lock files instead of one per key."""
+        cache = DataCache(self.temp_dir)
+        for i in range(500):
+            cache.get_or_compute(f"chave_{i}", lambda: {"i": 1})
+        
+        lock_files = os.listdir(os.path.join(self.temp_dir, DataCache.LOCK_DIR))
+        self.assertLessEqual(len(lock_files), DataCache.LOCK_STRIPES)
+    
+    def test_lock_reentrant_within_thread(self):
+        """Test a thread re-locking a stripe it already holds does not deadlock."""
+        cache = DataCache(self.temp_dir)
+        with cache.lock("externa"):
+            self.assertEqual(cache.get_or_compute("externa", lambda: {"v": 2}), {"v": 2})
+
+class TestCacheMetrics(TemporaryFolderTestCase):
+    """Test caches report to the metrics registry."""
+    
+    def setUp(self):
+        """Set up a fresh registry in place of the global one."""
+        super().setUp()
+        self.metrics = CacheMetrics()
+        self.start_patch(patch.object(backend, 'cache_metrics', self.metrics))
+    
+    def test_data_cache_reports_per_tier(self):
+        """Test hits, misses, evictions and sizes are reported per tier."""
+        cache = DataCache(self.temp_dir, ttl=0, max_bytes=2500, namespace='teste')
+        cache.set("a", b"x" * 1000)
+        cache.set("b", b"y" * 1000)
+        cache.get("a")
+        DataCache(self.temp_dir, namespace='teste').get("b")  # Cold memory tier: read from disk
+        cache.set("c", b"z" * 1000)
+        cache.get("ausente")
+        
+        report = self.metrics.report()
+        self.assertEqual(report.loc['teste.memory', 'hits'], 1)
+        self.assertEqual(report.loc['teste.disk', 'hits'], 1)
+        self.assertEqual(report.loc['teste.disk', 'misses'], 1)
+        self.assertEqual(report.loc['teste.disk', 'evictions'], 1)
+        self.assertEqual(report.loc['teste.disk', 'entries'], 2)
+        self.assertEqual(report.loc['teste.disk', 'bytes'], cache.total_bytes())
+        self.assertGreater(report.loc['teste.disk', 'load_ms'], 0)
+    
+    def test_wrap_cache_counts_hits_and_misses(self):
+        """Test a wrapped memoizing decorator reports hits, misses and compute time."""
+        @self.metrics.wrap_cache('memo', functools.lru_cache(maxsize=None))
+        def dobro(x):
+            return 2 * x
+        
+        self.assertEqual([dobro(1), dobro(1), dobro(2), dobro(1)], [2, 2, 4, 2])
+        report = self.metrics.report()
+        self.assertEqual(report.loc['memo', 'hits'], 2)
+        self.assertEqual(report.loc['memo', 'misses'], 2)
+        self.assertAlmostEqual(report.loc['memo', 'hit_rate'], 0.5)
+        self.assertFalse(pd.isna(report.loc['memo', 'compute_ms']))
+
+class TestCachedFunction(TemporaryFolderTestCase):
+    """Test content-addressed keys for cached_function."""
+    
+    def setUp(self):
+        """Set up an isolated cache and an input folder."""
+        super().setUp()
+        self.entrada = os.path.join(self.temp_dir, 'entrada')
+        os.mkdir(self.entrada)
+        self.start_patch(patch.object(backend, 'data_cache', DataCache(os.path.join(self.temp_dir, 'cache'))))
+        self.chamadas = []
+        
+        @cached_function(depende_de=lambda: [self.entrada])
+        def somar(df, fator=1):
+            self.chamadas.append(fator)
+            return df['Valor'].sum() * fator
+        self.somar = somar
+    
+    def test_key_is_stable_and_content_based(self):
+        """Test equal arguments share a key regardless of object identity or hash seed."""
+        df = pd.DataFrame({'Valor': [1.0, 2.0]})
+        self.assertEqual(self.somar(df, fator=2), 6.0)
+        self.assertEqual(self.somar(df.copy(), fator=2), 6.0)
+        self.assertEqual(self.chamadas, [2])
+        
+        self.assertNotEqual(self.somar.cache_key((df,), {'fator': 3}), self.somar.cache_key((df,), {'fator': 2}))
+        self.assertNotEqual(self.somar.cache_key((df.assign(Valor=[1.0, 3.0]),), {}), self.somar.cache_key((df,), {}))
+    
+    def test_dependency_changes_invalidate(self):
+        """Test adding a file to a declared dependency changes the key."""
+        df = pd.DataFrame({'Valor': [1.0]})
+        self.somar(df)
+        with open(os.path.join(self.entrada, 'extrato.csv'), 'w') as f:
+            f.write('nova')
+        self.somar(df)
+        self.somar(df)
+        self.assertEqual(self.chamadas, [1, 1])
 
 class TestJSONFunctions(unittest.TestCase):
     """Test JSON utility functions."""
@@ -145,6 +406,49 @@ class TestJSONFunctions(unittest.TestCase):
         
         self.assertEqual(saved_data, test_data)
 
+class TestArquivoRegras(TemporaryFolderTestCase):
+    """Test the journaled JSON rules store."""
+    
+    def setUp(self):
+        """Set up a rules file in a temporary folder."""
+        super().setUp()
+        self.caminho = os.path.join(self.temp_dir, 'contexto_financeiro.json')
+        with open(self.caminho, 'w', encoding='utf-8') as f:
+            json.dump({'Padaria': {'categoria': 'Alimentação', 'pagador': None}}, f)
+    
+    def test_updates_go_to_the_journal(self):
+        """Test a rule update appends to the journal and leaves the JSON untouched."""
+        regras = ArquivoRegras(self.caminho)
+        regras.atualizar('Padaria', {'pagador': 'Ana'})
+        regras.atualizar('Posto', {'pagador': 'Bia'}, padrao={'categoria': 'Não Definida'})
+        
+        with open(self.caminho, encoding='utf-8') as f:
+            self.assertNotIn('Posto', json.load(f))
+        self.assertEqual(regras.obter('Padaria'), {'categoria': 'Alimentação', 'pagador': 'Ana'})
+        self.assertEqual(regras.obter('Posto'), {'categoria': 'Não Definida', 'pagador': 'Bia'})
+    
+    def test_other_instances_see_changes(self):
+        """Test a second instance (another process) replays the journal and snapshots."""
+        escritor, leitor = ArquivoRegras(self.caminho), ArquivoRegras(self.caminho)
+        escritor.definir('Mercado', {'categoria': 'Alimentação'})
+        leitor.remover('Padaria')
+        
+        self.assertEqual(escritor.dados(), {'Mercado': {'categoria': 'Alimentação'}})
+        escritor.substituir({'Cinema': {'categoria': 'Lazer'}})
+        self.assertEqual(leitor.dados(), {'Cinema': {'categoria': 'Lazer'}})
+    
+    def test_journal_is_compacted(self):
+        """Test the journal is folded into the JSON after LIMITE_DIARIO changes."""
+        regras = ArquivoRegras(self.caminho)
+        with patch.object(ArquivoRegras, 'LIMITE_DIARIO', 3):
+            for i in range(3):
+                regras.definir(f'Loja {i}', {'categoria': 'Outros'})
+        
+        self.assertEqual(os.path.getsize(regras.diario), 0)
+        with open(self.caminho, encoding='utf-8') as f:
+            self.assertEqual(len(json.load(f)), 4)
+        self.assertEqual(len(ArquivoRegras(self.caminho).dados()), 4)
+
 class TestDataProcessing(unittest.TestCase):
     """Test data processing functions."""
     
@@ -180,6 +484,84 @@ class TestDataProcessing(unittest.TestCase):
         self.assertIsInstance(fig_col, object)
         self.assertIsInstance(fig_line, object)
 
+class TestCurrencyParser(unittest.TestCase):
+    """Test the BRL amount parser."""
+    
+    def test_parse_valid_formats(self):
+        """Test common statement formats convert to exact centavos."""
+        valores = pd.Series(['R$ 1.234,56', '-1.234,56', '10,5', ' R$ 100,00 ', '1.000.000,00', '5,00-'])
+        centavos, invalidos = parse_brl_centavos(valores)
+        self.assertEqual(centavos.tolist(), [123456, -123456, 1050, 10000, 100000000, -500])
+        self.assertEqual(len(invalidos), 0)
+    
+    def test_parse_reports_invalid_positions(self):
+        """Test unparseable rows are reported by position."""
+        valores = pd.Series(['10,00', 'abc', None, '12.5', '1,234', '20,00'])
+        centavos, invalidos = parse_brl_centavos(valores)
+        self.assertEqual(invalidos.tolist(), [1, 2, 3, 4])
+        self.assertEqual(centavos[[0, 5]].tolist(), [1000, 2000])
+    
+    def test_parse_numeric_column(self):
+        """Test numeric input is scaled instead of parsed as text."""
+        centavos, invalidos = parse_brl_centavos(pd.Series([1.5, float('nan'), 100]))
+        self.assertEqual(centavos[[0, 2]].tolist(), [150, 10000])
+        self.assertEqual(invalidos.tolist(), [1])
+    
+    def test_parse_explicit_plus_sign(self):
+        """Test a leading or trailing '+' is accepted, but not together with '-'."""
+        centavos, invalidos = parse_brl_centavos(pd.Series(['+10,00', 'R$ +1.234,56', '5,00+', '+-1,00']))
+        self.assertEqual(centavos[:3].tolist(), [1000, 123456, 500])
+        self.assertEqual(invalidos.tolist(), [3])
+
+class TestDateParsing(unittest.TestCase):
+    """Test the statement date parser."""
+    
+    def test_detect_format(self):
+        """Test the format is detected from a sample."""
+        self.assertEqual(detectar_formato_data(['01/02/2025', '28/02/2025']), '%d/%m/%Y')
+        self.assertEqual(detectar_formato_data(['2025-02-01']), '%Y-%m-%d')
+        self.assertIsNone(detectar_formato_data(['ontem']))
+    
+    def test_matches_inference(self):
+        """Test unique-value parsing gives the same result as per-row inference."""
+        datas = pd.Series(['01/02/2025 às 10:00', '15/03/2025 às 09:00', None, 'xx', '01/02/2025 às 18:30'])
+        esperado = pd.to_datetime(datas.astype(str).str.split(' às').str[0], errors='coerce', dayfirst=True)
+        pd.testing.assert_series_equal(converter_datas(datas, cortar_em=' às'), esperado)
+
+class TestValorEmCentavos(unittest.TestCase):
+    """Test the integer-centavos storage mode."""
+    
+    def setUp(self):
+        """Set up a frame whose float sum drifts."""
+        self.df = pd.DataFrame({
+            'Categoria': ['A', 'A', 'A', 'B'],
+            'Valor': [0.1, 0.2, 0.3, -10.05]
+        })
+    
+    def test_column_only_added_when_enabled(self):
+        """Test Valor_Centavos is opt-in."""
+        with patch.object(config, 'VALOR_EM_CENTAVOS', False):
+            self.assertNotIn('Valor_Centavos', adicionar_coluna_centavos(self.df).columns)
+        with patch.object(config, 'VALOR_EM_CENTAVOS', True):
+            df = adicionar_coluna_centavos(self.df)
+        self.assertEqual(df['Valor_Centavos'].tolist(), [10, 20, 30, -1005])
+    
+    def test_sums_are_exact(self):
+        """Test aggregations on centavos have no floating point drift."""
+        with patch.object(config, 'VALOR_EM_CENTAVOS', True):
+            df = adicionar_coluna_centavos(self.df)
+        self.assertEqual(somar_valores(df, 'Categoria')['A'], 0.6)
+        self.assertEqual(somar_valores(df[df['Categoria'] == 'A']), 0.6)
+    
+    def test_missing_values_keep_the_column(self):
+        """Test one NaN Valor leaves only that row without centavos."""
+        self.df.loc[1, 'Valor'] = float('nan')
+        with patch.object(config, 'VALOR_EM_CENTAVOS', True), self.assertLogs(backend.logger, 'WARNING'):
+            df = adicionar_coluna_centavos(self.df)
+        self.assertEqual(df['Valor_Centavos'].tolist(), [10, pd.NA, 30, -1005])
+        self.assertEqual(somar_valores(df, 'Categoria').tolist(), [0.4, -10.05])
+        self.assertEqual(somar_valores(df), -9.65)
+
 class TestCSVProcessing(unittest.TestCase):
     """Test CSV processing functions."""
     
@@ -212,5 +594,635 @@ class TestCSVProcessing(unittest.TestCase):
         with self.assertRaises(ValueError):
             processar_extrato_credito("../../../etc/passwd")
 
+class TestStatementFormats(unittest.TestCase):
+    """Test statement format detection and typed reads."""
+    
+    def setUp(self):
+        """Set up a comma-separated latin-1 debit export with an extra column."""
+        self.temp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', encoding='latin-1')
+        self.temp_file.write("Data,Descricao,Valor,Saldo\n")
+        self.temp_file.write('01/01/2025 às 10:00,Padaria São João,"-10,50","100,00"\n')
+        self.temp_file.write('02/01/2025 às 11:00,Salário,"1.000,00","1.100,00"\n')
+        self.temp_file.close()
+    
+    def tearDown(self):
+        """Clean up test file."""
+        os.unlink(self.temp_file.name)
+    
+    def test_detects_encoding_separator_and_format(self):
+        """Test the configured encodings/separators are tried until a format matches."""
+        leitura = detectar_leitura(self.temp_file.name, 'debito')
+        self.assertEqual(leitura.formato.nome, 'debito_padrao')
+        self.assertEqual(leitura.separador, ',')
+        self.assertNotEqual(leitura.encoding, 'utf-8')
+    
+    def test_reads_only_declared_columns(self):
+        """Test unused columns are skipped and rows are normalized."""
+        df = processar_extrato_debito(self.temp_file.name)
+        self.assertEqual(list(df.columns), ['Data', 'Estabelecimento', 'Valor', 'Tipo'])
+        self.assertEqual(df['Estabelecimento'].tolist(), ['Padaria São João', 'Salário'])
+        self.assertEqual(df['Tipo'].tolist(), ['Despesa', 'Receita'])
+    
+    def test_detection_cached_per_fingerprint(self):
+        """Test detection is reused until the file changes."""
+        leitura = detectar_leitura(self.temp_file.name, 'debito')
+        self.assertIs(detectar_leitura(self.temp_file.name, 'debito'), leitura)
+        
+        with open(self.temp_file.name, 'w', encoding='utf-8-sig') as f:
+            f.write("Data;Descricao;Valor\n01/01/2025 às 10:00;Padaria São João;-10,50\n")
+        leitura = detectar_leitura(self.temp_file.name, 'debito')
+        self.assertEqual((leitura.encoding, leitura.separador), ('utf-8-sig', ';'))
+        self.assertEqual(processar_extrato_debito(self.temp_file.name)['Estabelecimento'].tolist(), ['Padaria São João'])
+        self.assertLessEqual(backend._detectar_leitura.cache_info().currsize, backend._LEITURAS_EM_CACHE)
+    
+    def test_unknown_format(self):
+        """Test a header without a registered format is rejected."""
+        with self.assertRaises(ValueError):
+            detectar_leitura(self.temp_file.name, 'credito')
+
+class TestCSVEngine(unittest.TestCase):
+    """Test the configurable CSV reader."""
+    
+    def setUp(self):
+        """Set up a consolidated-style CSV."""
+        self.temp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', encoding='utf-8')
+        self.temp_file.write("Data;Estabelecimento;Valor;Pagador\n")
+        self.temp_file.write("2025-01-01;Padaria;-10.5;Ana\n")
+        self.temp_file.write("2025-01-02;Salário;5000.0;\n")
+        self.temp_file.close()
+    
+    def tearDown(self):
+        """Clean up test file."""
+        os.unlink(self.temp_file.name)
+    
+    def test_engines_agree(self):
+        """Test the pyarrow path returns the same data as the C engine."""
+        with patch.object(config, 'CSV_ENGINE', 'c'):
+            df_c = ler_csv(self.temp_file.name, sep=';', parse_dates=['Data'])
+        df_arrow = ler_csv(self.temp_file.name, sep=';', parse_dates=['Data'])
+        
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df_arrow['Data']))
+        self.assertEqual(df_arrow['Data'].tolist(), df_c['Data'].tolist())
+        self.assertEqual(df_arrow['Valor'].tolist(), df_c['Valor'].tolist())
+        self.assertTrue(df_arrow['Pagador'].isna().iloc[1])
+    
+    def test_unsupported_arguments_fall_back(self):
+        """Test arguments pyarrow cannot honour use the C engine."""
+        with patch('backend._ler_csv_pyarrow') as mock_arrow:
+            chunks = list(ler_csv(self.temp_file.name, sep=';', chunksize=1))
+            mock_arrow.assert_not_called()
+        self.assertEqual(len(chunks), 2)
+
+class TestIngestionManifest(TemporaryFolderTestCase):
+    """Test incremental ingestion through the manifest."""
+    
+    def setUp(self):
+        """Set up temporary data folders with one credit statement."""
+        super().setUp()
+        self.credito = os.path.join(self.temp_dir, 'credito')
+        self.debito = os.path.join(self.temp_dir, 'debito')
+        os.makedirs(self.credito)
+        os.makedirs(self.debito)
+        self.csv_path = os.path.join(self.credito, 'fatura.csv')
+        with open(self.csv_path, 'w', encoding='utf-8') as f:
+            f.write("Data movimento;Nome do fornecedor/cliente;Valor (R$)\n")
+            f.write("01/01/2025;Padaria Central;10,50\n")
+            f.write("02/01/2025;Posto Shell;120,00\n")
+        
+        self.patch_config(PASTA_CREDITO=Path(self.credito), PASTA_DEBITO=Path(self.debito))
+        self.processor = DataProcessor()
+        self.processor.manifest = IngestionManifest(os.path.join(self.temp_dir, 'manifesto'))
+    
+    def test_unchanged_files_are_reused(self):
+        """Test second run merges from the manifest without reprocessing."""
+        df_first, _ = self.processor.process_all_files(incremental=True)
+        
+        with patch.object(self.processor, 'process_file') as mock_process:
+            df_second, results = self.processor.process_all_files(incremental=True)
+            mock_process.assert_not_called()
+        
+        self.assertEqual(len(results), 1)
+        pd.testing.assert_frame_equal(df_first, df_second)
+    
+    def test_changed_file_is_reprocessed(self):
+        """Test a modified statement is processed again."""
+        self.processor.process_all_files(incremental=True)
+        with open(self.csv_path, 'a', encoding='utf-8') as f:
+            f.write("03/01/2025;Farmacia Raia;35,90\n")
+        
+        df, _ = self.processor.process_all_files(incremental=True)
+        self.assertEqual(len(df), 3)
+    
+    def test_manifest_persisted(self):
+        """Test a fresh manifest instance reads the saved index."""
+        self.processor.process_all_files(incremental=True)
+        manifest = IngestionManifest(os.path.join(self.temp_dir, 'manifesto'))
+        self.assertIsNotNone(manifest.lookup(self.csv_path, 'credito'))
+        self.assertIsNone(manifest.lookup(self.csv_path, 'debito'))
+    
+    @unittest.skipIf(backend.pa is None, "requires pyarrow")
+    def test_frames_stored_as_arrow(self):
+        """Test manifest frames are Arrow IPC files written in place, never pickles."""
+        self.processor.process_all_files(incremental=True)
+        arquivos = os.listdir(os.path.join(self.temp_dir, 'manifesto'))
+        self.assertEqual(len([f for f in arquivos if f.endswith('.arrow')]), 1)
+        self.assertEqual([f for f in arquivos if f.endswith(('.pkl', '.tmp'))], [])
+    
+    def test_concurrent_runs_are_serialized(self):
+        """Test runs from several threads never overlap on the shared manifest."""
+        import threading
+        import time
+        ativos, maximo = [0], [0]
+        executar = self.processor._process_all_files
+        
+        def medir(*args):
+            ativos[0] += 1
+            maximo[0] = max(maximo[0], ativos[0])
+            time.sleep(0.05)
+            try:
+                return executar(*args)
+            finally:
+                ativos[0] -= 1
+        
+        with patch.object(self.processor, '_process_all_files', medir):
+            threads = [threading.Thread(target=self.processor.process_all_files, kwargs={'incremental': True})
+                       for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        
+        self.assertEqual(maximo[0], 1)
+        with self.processor.manifest.locked():
+            # Reentrant: a caller holding the lock can still run an ingestion
+            df, _ = self.processor.process_all_files(incremental=True)
+        self.assertEqual(len(df), 2)
+    
+    def test_overlapping_statements_are_deduplicated(self):
+        """Test a partial re-download does not duplicate transactions."""
+        with open(os.path.join(self.credito, 'fatura_parcial.csv'), 'w', encoding='utf-8') as f:
+            f.write("Data movimento;Nome do fornecedor/cliente;Valor (R$)\n")
+            f.write("02/01/2025;POSTO  SHELL;120,00\n")
+            f.write("03/01/2025;Farmacia Raia;35,90\n")
+        
+        df, _ = self.processor.process_all_files(incremental=False)
+        self.assertEqual(sorted(df['Estabelecimento']), ['Farmacia Raia', 'Padaria Central', 'Posto Shell'])
+        self.assertTrue(df['Id_Transacao'].is_unique)
+    
+    def test_parallel_matches_sequential(self):
+        """Test the process pool returns the same data and result order."""
+        with open(os.path.join(self.debito, 'extrato.csv'), 'w', encoding='utf-8') as f:
+            f.write("Data;Descricao;Valor\n")
+            f.write("05/01/2025 às 10:00;Salario;5.000,00\n")
+            f.write("06/01/2025 às 12:30;Mercado Extra;-250,40\n")
+        
+        df_seq, results_seq = self.processor.process_all_files(incremental=False, workers=1)
+        df_par, results_par = self.processor.process_all_files(incremental=False, workers=2)
+        
+        pd.testing.assert_frame_equal(df_seq, df_par)
+        self.assertEqual(results_seq, results_par)
+
+class TestStreamingIngestion(TemporaryFolderTestCase):
+    """Test chunked processing of large statements."""
+    
+    def setUp(self):
+        """Set up a debit statement with a few rows."""
+        super().setUp()
+        self.temp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', encoding='utf-8')
+        self.temp_file.write("Data;Descricao;Valor\n")
+        for dia, (descricao, valor) in enumerate([
+            ("Salario", "5.000,00"), ("Mercado Extra", "-250,40"), ("Farmacia Raia", "-35,90"),
+            ("Posto Shell", "-120,00"), ("Padaria Central", "-10,50")
+        ], start=1):
+            self.temp_file.write(f"{dia:02d}/01/2025 às 10:00;{descricao};{valor}\n")
+        self.temp_file.close()
+        self.processor = DataProcessor()
+    
+    def tearDown(self):
+        """Clean up test file."""
+        os.unlink(self.temp_file.name)
+    
+    def test_chunked_matches_full_read(self):
+        """Test streaming in chunks gives the same rows and summed counts."""
+        df_full = self.processor._apply_categorization(self.processor._load_debit_file(self.temp_file.name))
+        chunks = []
+        validation = self.processor.process_file_streaming(self.temp_file.name, 'debito', chunks.append, chunk_rows=2)
+        
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        pd.testing.assert_frame_equal(df_full.reset_index(drop=True), pd.concat(chunks, ignore_index=True))
+        self.assertTrue(validation.is_valid)
+        self.assertEqual(validation.processed_rows, 5)
+    
+    def test_large_file_uses_streaming(self):
+        """Test process_file streams large files through the spool and loads the same frame."""
+        df_full = self.processor._apply_categorization(self.processor._load_debit_file(self.temp_file.name))
+        self.processor.manifest = IngestionManifest(self.temp_dir)
+        with patch.object(config, 'INGESTAO_STREAMING_BYTES', 0), patch.object(config, 'INGESTAO_CHUNK_LINHAS', 2):
+            with patch.object(self.processor, 'process_file_streaming', wraps=self.processor.process_file_streaming) as mock_stream:
+                df, validation = self.processor.process_file(self.temp_file.name, 'debito')
+                mock_stream.assert_called_once()
+        
+        pd.testing.assert_frame_equal(df_full.reset_index(drop=True), df)
+        self.assertEqual(os.listdir(self.temp_dir), [])  # Spool removed
+    
+    def test_duplicates_counted_across_chunks(self):
+        """Test a row repeated in a later chunk is reported like in a full read."""
+        with open(self.temp_file.name, 'a', encoding='utf-8') as f:
+            f.write("01/01/2025 às 10:00;Salario;5.000,00\n")
+        full = self.processor.validator.validate_dataframe(self.processor._load_debit_file(self.temp_file.name), 'debito')
+        validation = self.processor.process_file_streaming(self.temp_file.name, 'debito', lambda df: None, chunk_rows=2)
+        
+        self.assertIn("1 duplicate rows found", full.warnings)
+        self.assertIn("1 duplicate rows found", validation.warnings)
+
+class TestTransactionIdentity(unittest.TestCase):
+    """Test the transaction identity index."""
+    
+    def setUp(self):
+        """Set up a statement with a legitimate repeated purchase."""
+        self.df = pd.DataFrame({
+            'Data': pd.to_datetime(['2025-01-01', '2025-01-01', '2025-01-02', '2025-01-05']),
+            'Estabelecimento': ['Cafe', 'Cafe', 'Mercado', 'Mercado'],
+            'Valor': [-5.0, -5.0, -80.0, -80.0],
+            'Tipo': ['Despesa'] * 4
+        })
+    
+    def test_repeats_within_statement_are_distinct(self):
+        """Test identical rows in one statement get different ids, stable across runs."""
+        ids = identificar_transacoes(self.df, 'credito')['Id_Transacao']
+        self.assertTrue(ids.is_unique)
+        pd.testing.assert_series_equal(ids, identificar_transacoes(self.df, 'credito')['Id_Transacao'])
+        self.assertFalse(ids.isin(identificar_transacoes(self.df, 'debito')['Id_Transacao']).any())
+    
+    def test_near_duplicates_flagged(self):
+        """Test same merchant and amount within a day is flagged for review."""
+        df = self.df.assign(Data=pd.to_datetime(['2025-01-01', '2025-01-01', '2025-01-02', '2025-01-03']))
+        df.loc[1, 'Valor'] = -6.0
+        self.assertEqual(marcar_possiveis_duplicatas(df).tolist(), [False, False, True, True])
+        self.assertFalse(marcar_possiveis_duplicatas(self.df.drop(index=[1])).any())
+
+class TestArmazemTransacoes(TemporaryFolderTestCase):
+    """Test the partitioned Parquet transaction store."""
+    
+    def setUp(self):
+        """Set up a store in a temporary folder and three months of data."""
+        super().setUp()
+        self.armazem = ArmazemTransacoes(self.temp_dir)
+        self.df = pd.DataFrame({
+            'Data': pd.to_datetime(['2025-03-10', '2025-02-28', '2025-02-01', '2024-12-31']),
+            'Estabelecimento': ['Mercado', 'Farmacia', 'Padaria', 'Posto'],
+            'Valor': [-80.0, -35.9, -10.5, -120.0],
+            'Tipo': ['Despesa'] * 4,
+            'Categoria': ['Alimentação', 'Saúde', 'Alimentação', 'Transporte']
+        })
+    
+    def test_roundtrip(self):
+        """Test a published version reads back with types and order."""
+        self.assertIsNone(self.armazem.versao())
+        self.armazem.publicar(self.df)
+        
+        pd.testing.assert_frame_equal(self.armazem.ler(), self.df, check_dtype=False)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(self.armazem.ler()['Data']))
+        self.assertTrue(os.path.isdir(os.path.join(self.temp_dir, self.armazem.versao(), 'ano=2025', 'mes=2')))
+    
+    def test_reads_columns_and_date_range(self):
+        """Test only the requested columns and period are returned."""
+        self.armazem.publicar(self.df)
+        df = self.armazem.ler(['Estabelecimento', 'Valor', 'Inexistente'], inicio='2025-02-01', fim='2025-02-28')
+        
+        self.assertEqual(list(df.columns), ['Estabelecimento', 'Valor'])
+        self.assertEqual(sorted(df['Estabelecimento']), ['Farmacia', 'Padaria'])
+    
+    def test_new_version_replaces_current(self):
+        """Test publishing switches the pointer and prunes old versions."""
+        for _ in range(3):
+            versao = self.armazem.publicar(self.df)
+        
+        self.assertEqual(self.armazem.versao(), versao)
+        self.assertEqual(len([p for p in os.listdir(self.temp_dir) if p.startswith('v')]), ArmazemTransacoes.VERSOES_MANTIDAS)
+        
+        csv = self.armazem.exportar_csv(os.path.join(self.temp_dir, 'export.csv'))
+        self.assertEqual(len(pd.read_csv(csv, sep=';')), 4)
+    
+    def test_deltas_overlay_base_until_compaction(self):
+        """Test appended segments replace rows by id and compaction folds them in."""
+        df = self.df.assign(Id_Transacao=[1, 2, 3, 4])
+        versao = self.armazem.publicar(df)
+        self.armazem.anexar(df.iloc[[1]].assign(Categoria='Farmácia'))
+        self.armazem.anexar(pd.DataFrame({'Data': pd.to_datetime(['2025-02-15']), 'Estabelecimento': ['Cinema'],
+                                          'Valor': [-40.0], 'Tipo': ['Despesa'], 'Categoria': ['Lazer'],
+                                          'Id_Transacao': [5]}))
+        
+        self.assertEqual(self.armazem.versao(), versao)
+        self.assertEqual(len(self.armazem.deltas()), 2)
+        fevereiro = self.armazem.ler(['Estabelecimento', 'Categoria'], inicio='2025-02-01', fim='2025-02-28')
+        self.assertEqual(sorted(fevereiro['Categoria']), ['Alimentação', 'Farmácia', 'Lazer'])
+        
+        self.assertNotEqual(self.armazem.compactar(), versao)
+        self.assertEqual(self.armazem.deltas(), [])
+        self.assertEqual(len(self.armazem.ler()), 5)
+        self.assertIsNone(self.armazem.compactar())
+
+class TestConsolidatedDeltas(TemporaryFolderTestCase):
+    """Test consolidated saves append only the changed transactions."""
+    
+    def setUp(self):
+        """Set up the store in a temporary folder and publish a first version."""
+        super().setUp()
+        self.patch_config(COMPACTAR_APOS_DELTAS=2, **consolidated_paths(self.temp_dir))
+        self.df = pd.DataFrame({
+            'Data': pd.to_datetime(['2025-03-10', '2025-02-28', '2025-02-01']),
+            'Estabelecimento': ['Mercado', 'Farmacia', 'Padaria'],
+            'Valor': [-80.0, -35.9, -10.5],
+            'Pagador': [None, None, None],
+            'Id_Transacao': [1, 2, 3]
+        })
+        salvar_dados_consolidados(self.df)
+    
+    def test_only_changes_are_appended(self):
+        """Test a payer assignment writes a one-row segment and compaction runs at the threshold."""
+        versao = versao_dados_consolidados()
+        salvar_dados_consolidados(self.df)
+        self.assertEqual(versao_dados_consolidados(), versao)
+        
+        self.df.loc[1, 'Pagador'] = 'Ana'
+        salvar_dados_consolidados(self.df)
+        self.assertNotEqual(versao_dados_consolidados(), versao)
+        self.assertEqual(len(backend.armazem_transacoes.deltas()), 1)
+        self.assertEqual(len(pd.read_parquet(backend.armazem_transacoes.deltas()[0])), 1)
+        
+        self.df.loc[2, 'Pagador'] = 'Ana'
+        salvar_dados_consolidados(self.df)
+        self.assertEqual(backend.armazem_transacoes.deltas(), [])
+        self.assertEqual(pd.read_csv(config.ARQUIVO_CONSOLIDADO, sep=';')['Pagador'].fillna('').tolist(), ['', 'Ana', 'Ana'])
+    
+    def test_period_catalog_follows_publications(self):
+        """Test the period catalog sidecar is kept in step with each publication."""
+        self.df['Tipo'] = ['Despesa', 'Despesa', 'Receita']
+        salvar_dados_consolidados(self.df)
+        catalogo = backend.carregar_json(str(config.ARQUIVO_CATALOGO_PERIODOS))
+        self.assertEqual(catalogo['versao'], versao_dados_consolidados())
+        self.assertEqual(catalogo['periodos'][0], {'ano': 2025, 'mes': 2, 'transacoes': 2, 'receitas': -10.5, 'despesas': -35.9})
+        
+        novo = pd.DataFrame({'Data': pd.to_datetime(['2025-04-02']), 'Estabelecimento': ['Cinema'], 'Valor': [-40.0],
+                             'Pagador': [None], 'Id_Transacao': [4], 'Tipo': ['Despesa']})
+        salvar_dados_consolidados(pd.concat([self.df, novo], ignore_index=True))
+        periodos = backend.obter_periodos_disponiveis()
+        self.assertEqual(periodos['meses_por_ano'], {2025: [2, 3, 4]})
+        self.assertEqual(periodos['resumo'][(2025, 4)]['despesas'], -40.0)
+        
+        os.remove(config.ARQUIVO_CATALOGO_PERIODOS)
+        self.assertEqual(len(backend.catalogo_periodos()), 3)
+    
+    def test_changes_found_without_reading_the_store(self):
+        """Test a save diffs against the per-row digests instead of the published data."""
+        self.df.loc[0, 'Pagador'] = 'Ana'
+        with patch.object(backend, 'obter_dados_consolidados', side_effect=AssertionError), \
+             patch.object(backend.armazem_transacoes, 'ler', side_effect=AssertionError):
+            salvar_dados_consolidados(self.df)
+        self.assertEqual(len(pd.read_parquet(backend.armazem_transacoes.deltas()[0])), 1)
+        
+        resumo, colunas = backend.armazem_transacoes.resumo(['Id_Transacao', 'Digest'])
+        self.assertEqual(sorted(resumo['Id_Transacao']), [1, 2, 3])
+        self.assertNotIn('Id_Transacao', colunas)
+    
+    def test_period_catalog_updated_from_changes(self):
+        """Test the catalog after a delta matches one computed over the whole data."""
+        self.df['Tipo'] = ['Despesa', 'Despesa', 'Receita']
+        salvar_dados_consolidados(self.df)
+        self.df.loc[1, ['Valor', 'Tipo']] = [-50.0, 'Receita']
+        self.df.loc[2, 'Data'] = pd.Timestamp('2025-03-05')
+        with patch.object(backend, 'calcular_catalogo_periodos', wraps=backend.calcular_catalogo_periodos) as calcular:
+            salvar_dados_consolidados(self.df)
+        self.assertTrue(all(len(chamada.args[0]) <= 2 for chamada in calcular.call_args_list))
+        
+        catalogo = backend.carregar_json(str(config.ARQUIVO_CATALOGO_PERIODOS))
+        self.assertEqual(catalogo['versao'], versao_dados_consolidados())
+        self.assertEqual(catalogo['periodos'], backend.calcular_catalogo_periodos(backend.obter_dados_consolidados()))
+    
+    def test_removed_transactions_republish(self):
+        """Test dropping a transaction publishes a full version."""
+        versao = backend.armazem_transacoes.versao()
+        salvar_dados_consolidados(self.df.iloc[:2])
+        self.assertNotEqual(backend.armazem_transacoes.versao(), versao)
+        self.assertEqual(len(backend.obter_dados_consolidados()), 2)
+
+class TestBancoTransacoes(TemporaryFolderTestCase):
+    """Test the optional SQLite query backend."""
+    
+    def setUp(self):
+        """Set up a database in a temporary folder."""
+        super().setUp()
+        self.banco = BancoTransacoes(os.path.join(self.temp_dir, 'transacoes.sqlite'))
+        self.addCleanup(self.banco.fechar)
+        self.df = pd.DataFrame({
+            'Data': pd.to_datetime(['2025-03-10', '2025-02-28', '2025-02-01', '2024-12-31']),
+            'Estabelecimento': ['Mercado', 'Farmacia', 'Padaria', 'Salario'],
+            'Valor': [-80.1, -35.9, -10.2, 5000.0],
+            'Tipo': ['Despesa', 'Despesa', 'Despesa', 'Receita'],
+            'Categoria': ['Alimentação', 'Saúde', 'Alimentação', 'Salário'],
+            'Pagador': ['Ana', None, 'Ana', 'Ana']
+        })
+    
+    def test_connection_reused_per_thread(self):
+        """Test queries from one thread share a connection, reopened if the file is replaced."""
+        self.banco.publicar(self.df)
+        conexao = self.banco._conectar()
+        self.assertEqual(self.banco.contar(), 4)
+        self.assertIs(self.banco._conectar(), conexao)
+        
+        import threading
+        outras = []
+        thread = threading.Thread(target=lambda: outras.append(self.banco._conectar()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(outras[0], conexao)
+        
+        os.replace(self.banco.caminho, self.banco.caminho.with_suffix('.antigo'))
+        BancoTransacoes(self.banco.caminho).publicar(self.df.head(1))
+        self.assertEqual(self.banco.contar(), 1)
+    
+    def test_null_groups_match_pandas_path(self):
+        """Test somar_por drops null groups the same way with and without the database."""
+        self.banco.publicar(self.df)
+        recorte = lambda colunas, inicio=None, fim=None: self.df[[c for c in colunas if c in self.df.columns]]
+        resultados = {}
+        with patch.object(backend, 'banco_transacoes', self.banco), \
+             patch.object(backend, 'obter_dados_consolidados', side_effect=recorte):
+            for banco_sql in (True, False):
+                with patch.object(config, 'BANCO_SQL', banco_sql):
+                    resultados[banco_sql] = backend.somar_por('Pagador', tipo='Despesa')
+        
+        self.assertEqual(resultados[True].to_dict(), {'Ana': -90.3})
+        self.assertEqual(resultados[False].round(2).to_dict(), resultados[True].to_dict())
+    
+    def test_missing_values_match_pandas_path(self):
+        """Test a NaN Valor is stored as NULL: counted as a transaction, left out of sums."""
+        self.df.loc[0, 'Valor'] = float('nan')
+        self.banco.publicar(self.df)
+        recorte = lambda colunas, inicio=None, fim=None: self.df[[c for c in dict.fromkeys(colunas) if c in self.df.columns]]
+        resultados = {}
+        with patch.object(backend, 'banco_transacoes', self.banco), \
+             patch.object(backend, 'obter_dados_consolidados', side_effect=recorte):
+            for banco_sql in (True, False):
+                with patch.object(config, 'BANCO_SQL', banco_sql):
+                    resultados[banco_sql] = (backend.contar_transacoes(), round(backend.somar_por(), 2),
+                                             backend.somar_por('Tipo').round(2).to_dict())
+        
+        self.assertEqual(resultados[True], resultados[False])
+        self.assertEqual(resultados[True][0], len(self.df))
+        nulos = self.banco._conectar().execute('SELECT COUNT(*) FROM transacoes WHERE Valor_Centavos IS NULL')
+        self.assertEqual(nulos.fetchone()[0], 1)
+    
+    def test_publish_creates_indexes(self):
+        """Test the table is populated and indexed."""
+        self.assertFalse(self.banco.populado())
+        self.banco.publicar(self.df)
+        
+        self.assertTrue(self.banco.populado())
+        import sqlite3
+        with sqlite3.connect(self.banco.caminho) as conexao:
+            indices = {linha[1] for linha in conexao.execute("PRAGMA index_list('transacoes')")}
+        self.assertEqual(indices, {'idx_transacoes_data', 'idx_transacoes_categoria',
+                                   'idx_transacoes_pagador', 'idx_transacoes_estabelecimento',
+                                   'idx_transacoes_id_transacao'})
+    
+    def test_filtered_aggregates(self):
+        """Test periods, counts and grouped sums with date and type filters."""
+        self.banco.publicar(self.df)
+        
+        self.assertEqual(self.banco.periodos(), {2024: [12], 2025: [2, 3]})
+        self.assertEqual(self.banco.contar('2025-02-01', '2025-02-28 23:59:59'), 2)
+        self.assertEqual(self.banco.somar(tipo='Despesa'), -126.2)
+        
+        por_categoria = self.banco.somar('Categoria', inicio='2025-01-01', tipo='Despesa')
+        self.assertEqual(por_categoria.to_dict(), {'Alimentação': -90.3, 'Saúde': -35.9})
+        with self.assertRaises(ValueError):
+            self.banco.somar('Valor; DROP TABLE transacoes')
+
+class TestProvedorDados(TemporaryFolderTestCase):
+    """Test the process-wide consolidated data provider."""
+    
+    def setUp(self):
+        """Set up a provider over a mocked loader."""
+        super().setUp()
+        self.carregar = MagicMock(return_value=pd.DataFrame({
+            'Data': ['2025-03-10', '2025-02-01', 'invalida'],
+            'Valor': ['-80.5', '-10', '5000'],
+            'Tipo': ['Despesa', 'Despesa', 'Receita']
+        }))
+        self.provedor = ProvedorDados(self.carregar)
+    
+    def test_loads_once_per_version(self):
+        """Test repeated reads reuse the loaded frame until the version changes."""
+        with patch('backend.versao_dados_consolidados', return_value=1):
+            self.provedor.obter()
+            self.provedor.obter(['Valor'])
+            self.assertEqual(self.carregar.call_count, 1)
+        with patch('backend.versao_dados_consolidados', return_value=2):
+            self.provedor.obter()
+            self.assertEqual(self.carregar.call_count, 2)
+            self.assertEqual(self.provedor.versao, 2)
+    
+    def test_normalized_views(self):
+        """Test dtypes are normalized and callers cannot alter the shared frame."""
+        with patch('backend.versao_dados_consolidados', return_value=1):
+            df = self.provedor.obter()
+            self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['Data']))
+            self.assertEqual(df['Valor'].tolist(), [-80.5, -10.0, 5000.0])
+            
+            df['Valor'] = 0
+            df['Mes'] = df['Data'].dt.month
+            self.assertEqual(list(self.provedor.obter().columns), ['Data', 'Valor', 'Tipo'])
+            self.assertEqual(self.provedor.obter()['Valor'].iloc[0], -80.5)
+            self.assertEqual(len(self.provedor.obter(inicio='2025-03-01')), 1)
+    
+    def test_categorical_compaction(self):
+        """Test repeated text columns become categoricals and the memory report shows the gain."""
+        self.carregar.return_value = pd.DataFrame({
+            'Data': pd.date_range('2025-01-01', periods=300, freq='D'),
+            'Estabelecimento': [f'Loja {i}' for i in range(300)],
+            'Valor': [-10.0] * 300,
+            'Tipo': ['Despesa', 'Despesa', 'Receita'] * 100,
+            'Categoria': ['Alimentação', 'Transporte', 'Salário'] * 100
+        })
+        with patch('backend.versao_dados_consolidados', return_value=1):
+            df = self.provedor.obter()
+            self.assertIsInstance(df['Categoria'].dtype, pd.CategoricalDtype)
+            self.assertNotIsInstance(df['Estabelecimento'].dtype, pd.CategoricalDtype)
+            
+            despesas = somar_valores(df[df['Tipo'] == 'Despesa'], 'Categoria')
+            self.assertEqual(sorted(despesas.index), ['Alimentação', 'Transporte'])
+            
+            memoria = self.provedor.relatorio_memoria()
+            self.assertLess(memoria.loc['Categoria', 'Depois'], memoria.loc['Categoria', 'Antes'])
+            self.assertEqual(memoria.loc['Valor', 'Depois'], memoria.loc['Valor', 'Antes'])
+    
+    def test_arrow_snapshot_shared_between_providers(self):
+        """Test a second provider (another replica) maps the snapshot instead of loading."""
+        self.carregar.return_value = pd.DataFrame({
+            'Data': pd.date_range('2025-01-01', periods=4, freq='D'),
+            'Estabelecimento': ['Mercado', 'Posto', 'Padaria', 'Cinema'],
+            'Valor': [-10.0, -20.0, -30.0, 100.0],
+            'Tipo': ['Despesa', 'Despesa', 'Despesa', 'Receita']
+        })
+        with patch('backend.versao_dados_consolidados', return_value=7):
+            primeiro = ProvedorDados(self.carregar, InstantaneoArrow(self.temp_dir)).obter()
+            outro_carregar = MagicMock()
+            segundo = ProvedorDados(outro_carregar, InstantaneoArrow(self.temp_dir)).obter()
+        
+        outro_carregar.assert_not_called()
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir, 'consolidado_7.arrow')))
+        pd.testing.assert_frame_equal(segundo, primeiro)
+        self.assertIsInstance(segundo['Tipo'].dtype, pd.CategoricalDtype)
+        self.assertFalse(segundo['Valor'].to_numpy().flags.writeable)
+
+class TestMonitorPastas(TemporaryFolderTestCase):
+    """Test the background folder watcher and consolidated publishing."""
+    
+    def setUp(self):
+        """Set up empty temporary data folders."""
+        super().setUp()
+        self.credito = os.path.join(self.temp_dir, 'credito')
+        os.makedirs(self.credito)
+        self.patch_config(PASTA_CREDITO=Path(self.credito), PASTA_DEBITO=Path(self.temp_dir) / 'debito',
+                          **consolidated_paths(self.temp_dir))
+        self.start_patch(patch.object(backend.data_processor, 'manifest',
+                                      IngestionManifest(Path(self.temp_dir) / 'manifesto')))
+    
+    def test_ingests_after_debounce(self):
+        """Test a new statement is ingested once, after it stopped changing, under the ingestion lock."""
+        monitor = MonitorPastas(intervalo=1, debounce=2)
+        travado = []
+        
+        def refresh():
+            travado.append(backend.data_processor.manifest._lock_depth > 0)
+            return pd.DataFrame()
+        
+        with patch.object(backend.processar_faturas, 'refresh', side_effect=refresh) as mock_refresh:
+            self.assertFalse(monitor.verificar(agora=0))
+            
+            with open(os.path.join(self.credito, 'fatura.csv'), 'w') as f:
+                f.write("Data movimento;Nome do fornecedor/cliente;Valor (R$)\n")
+            self.assertFalse(monitor.verificar(agora=1))
+            self.assertFalse(monitor.verificar(agora=2))
+            self.assertTrue(monitor.verificar(agora=3))
+            self.assertFalse(monitor.verificar(agora=10))
+        
+        mock_refresh.assert_called_once()
+        self.assertEqual(travado, [True])
+    
+    def test_publish_is_atomic(self):
+        """Test publishing replaces the file and bumps the version token."""
+        self.assertEqual(versao_dados_consolidados(), 0)
+        with patch.object(config, 'ARMAZENAMENTO_PARQUET', False):
+            salvar_dados_consolidados(pd.DataFrame({'Data': [pd.Timestamp('2025-01-01')], 'Valor': [1.5]}))
+            self.assertNotEqual(versao_dados_consolidados(), 0)
+        
+        arquivos = os.listdir(self.temp_dir)
+        self.assertIn('dados_consolidados.csv', arquivos)
+        self.assertEqual([nome for nome in arquivos if nome.endswith('.tmp')], [])
+        self.assertEqual(pd.read_csv(config.ARQUIVO_CONSOLIDADO, sep=';')['Valor'].tolist(), [1.5])
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file